@@ -0,0 +1,146 @@
+import json
+import threading
+from datetime import datetime
+from sqlalchemy import delete, func, insert, select
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from Backend.database import engine as db_engine, read_engine as db_read_engine
+from Backend.events import broadcaster, flush_events, to_json
+from Backend.models import CollectorStatus, Event
+from Backend.versions import host_versions
+
+# Ponte entre o coletor (único processo que checa e grava) e os workers da
+# API, que só leem. Tudo passa pelo banco:
+# - eventos do SSE: o coletor grava na tabela events, cada worker repassa
+#   para o seu broadcaster com o mesmo id (Last-Event-ID vale em qualquer um)
+# - status: métricas, ciclos, retenção e cache DNS do coletor numa linha
+
+# Intervalo e tamanho da leitura de eventos novos pela API
+RELAY_INTERVAL = 0.5
+RELAY_BATCH = 1000
+
+# Eventos mantidos na tabela (o resto é apagado pelo coletor)
+EVENTS_KEEP = 20000
+
+STATUS_NAME = "collector"
+
+
+# =====================
+# LADO DO COLETOR
+# =====================
+def store_events(checks, alerts, incidents, hosts, engine=db_engine):
+    # listener do write buffer (depois do commit)
+    items = flush_events(checks, alerts, incidents, hosts)
+    if not items:
+        return
+
+    now = datetime.utcnow()
+
+    with engine.begin() as conn:
+        conn.execute(insert(Event), [
+            {"kind": kind, "data": to_json(data), "created_time": now}
+            for kind, data in items
+        ])
+
+
+def trim_events(engine=db_engine):
+    with engine.begin() as conn:
+        last = conn.execute(select(func.max(Event.id))).scalar()
+
+        if last and last > EVENTS_KEEP:
+            conn.execute(delete(Event).where(Event.id <= last - EVENTS_KEEP))
+
+
+def publish_status(owner, payload, engine=db_engine):
+    values = {
+        "name": STATUS_NAME,
+        "owner": owner,
+        "payload": to_json(payload),
+        "updated_time": datetime.utcnow(),
+    }
+
+    stmt = sqlite_insert(CollectorStatus).values(values)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=["name"],
+        set_={k: stmt.excluded[k] for k in ("owner", "payload", "updated_time")}
+    )
+
+    with engine.begin() as conn:
+        conn.execute(stmt)
+
+
+# =====================
+# LADO DA API
+# =====================
+def read_status(engine=db_read_engine):
+    # {"owner", "updated_time", **payload} ou None se o coletor nunca publicou
+    with engine.connect() as conn:
+        row = conn.execute(
+            select(CollectorStatus).where(CollectorStatus.name == STATUS_NAME)
+        ).first()
+
+    if not row:
+        return None
+
+    return {"owner": row.owner, "updated_time": row.updated_time, **json.loads(row.payload)}
+
+
+class EventRelay:
+
+    def __init__(self, engine=db_read_engine, interval=RELAY_INTERVAL):
+        self.engine = engine
+        self.interval = interval
+        self.cursor = None
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        if self._thread:
+            return
+
+        # só o que chegar daqui para frente
+        with self.engine.connect() as conn:
+            self.cursor = conn.execute(select(func.max(Event.id))).scalar() or 0
+            host_versions.read(conn)
+
+        broadcaster.resume_from(self.cursor)
+
+        self._thread = threading.Thread(target=self._run, name="event-relay", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+    def poll(self):
+        with self.engine.connect() as conn:
+            rows = conn.execute(
+                select(Event.id, Event.kind, Event.data)
+                .where(Event.id > self.cursor)
+                .order_by(Event.id)
+                .limit(RELAY_BATCH)
+            ).all()
+
+            # ETag do /hosts/changes acompanha o coletor sem consulta no request
+            host_versions.read(conn)
+
+        if rows:
+            broadcaster.publish_many(
+                [(kind, json.loads(data)) for _, kind, data in rows],
+                ids=[event_id for event_id, _, _ in rows]
+            )
+            self.cursor = rows[-1][0]
+
+        return len(rows)
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                # lote cheio: lê de novo sem esperar
+                if self.poll() == RELAY_BATCH:
+                    continue
+            except Exception as e:
+                print(f"[RELAY ERROR] {e}")
+
+            self._stop.wait(self.interval)
+
+
+event_relay = EventRelay()
@@ -1,22 +1,42 @@
+import os
 import subprocess
 import time
 import socket
-import json
 import re
 import requests
 import httpx
+import httpcore
+import contextvars
 import dns.resolver
-from datetime import datetime, timedelta
-from Backend.models import DNSCache
+import dns.asyncresolver
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
 
-def resolve_dns_real(address):
+# Pool HTTP compartilhado pelos checks (keep-alive entre ciclos)
+HTTP_MAX_CONNECTIONS = 500
+HTTP_KEEPALIVE_EXPIRY = 30
+
+# HTTP/2 nos checks: NOC_HTTP2=1 (precisa do extra http2, pacote h2)
+HTTP2_ENABLED = os.getenv("NOC_HTTP2", "0").lower() in ("1", "true", "yes")
+
+# threads para a consulta AAAA paralela no caminho síncrono
+_dns_executor = ThreadPoolExecutor(max_workers=8, thread_name_prefix="dns")
+
+def _query_dns(address, rdtype):
     try:
-        answers = dns.resolver.resolve(address, "A")
+        return dns.resolver.resolve(address, rdtype)
     except:
-        try:
-            answers = dns.resolver.resolve(address, "AAAA")
-        except:
-            return [], None
+        return None
+
+async def _query_dns_async(address, rdtype):
+    try:
+        return await dns.asyncresolver.resolve(address, rdtype)
+    except:
+        return None
+
+def _dns_answer(answers):
+    if answers is None:
+        return [], None
 
     ips = [r.to_text() for r in answers]
 
@@ -25,87 +45,89 @@ def resolve_dns_real(address):
 
     return ips, ttl
 
-def resolve_dns_cached(address: str, db):
+def resolve_dns_real(address):
+    # A e AAAA em paralelo; A tem preferência, AAAA só se não houver A
+    aaaa = _dns_executor.submit(_query_dns, address, "AAAA")
+    answers = _query_dns(address, "A") or aaaa.result()
 
-    # ---------- já é IP ----------
-    try:
-        socket.inet_pton(socket.AF_INET, address)
-        return [address], None, None
-    except:
-        pass
+    return _dns_answer(answers)
 
-    try:
-        socket.inet_pton(socket.AF_INET6, address)
-        return [address], None, None
-    except:
-        pass
-
-    # ---------- cache ----------
-    record = db.query(DNSCache).filter(
-        DNSCache.hostname == address
-    ).first()
-
-    now = datetime.utcnow()
-    ttl_remaining = 0
-
-    if record:
-        ttl_remaining = (record.expires_time - now).total_seconds()
-
-        # cache válido (com margem)
-        if ttl_remaining > record.ttl * 0.1:
-            return json.loads(record.ip_list), record.ttl, int(ttl_remaining)
-
-    # resolve DNS real
-    ips, ttl = resolve_dns_real(address)
-
-    if not ips and record:
-        return json.loads(record.ip_list), record.ttl, int(ttl_remaining)
-    elif not ips:
-        return [], None, None
-
-    ttl = ttl or 60
-
-    expires = now + timedelta(seconds=ttl)
-
-    # ---------- salvar ----------
-    if record:
-        record.ip_list = json.dumps(ips)
-        record.ttl = ttl
-        record.resolved_time = now
-        record.expires_time = expires
-    else:
-        record = DNSCache(
-            hostname=address,
-            ip_list=json.dumps(ips),
-            ttl=ttl,
-            resolved_time=now,
-            expires_time=expires
-        )
-        db.add(record)
+async def resolve_dns_real_async(address):
+    a, aaaa = await asyncio.gather(
+        _query_dns_async(address, "A"),
+        _query_dns_async(address, "AAAA")
+    )
 
-    db.flush()
+    return _dns_answer(a or aaaa)
+
+def is_ip_address(address: str) -> bool:
+    for familia in (socket.AF_INET, socket.AF_INET6):
+        try:
+            socket.inet_pton(familia, address)
+            return True
+        except:
+            pass
 
-    return ips, ttl, ttl
+    return False
 
 
 import platform
 import subprocess
 import re
 
-def ping_host(ip: str, count: int = 3, timeout: int = 5, max_ms=5000):
+def ping_command(ip: str, count: int = 3, timeout: int = 5):
     is_windows = platform.system().lower() == "windows"
     
     # Montagem do comando baseada no SO e tipo de IP
     if is_windows:
         # Windows: -n (count), -w (timeout em ms)
         # O Windows resolve IPv6 automaticamente, mas podemos forçar se necessário
-        cmd = ["ping", "-n", str(count), "-w", str(timeout * 1000), ip]
-    else:
-        # Linux/Unix: -c (count), -W (timeout em segundos)
-        if ":" in ip:
-            cmd = ["ping", "-6", "-c", str(count), "-W", str(timeout), ip]
-        else:
-            cmd = ["ping", "-c", str(count), "-W", str(timeout), ip]
+        return ["ping", "-n", str(count), "-w", str(timeout * 1000), ip]
+
+    # Linux/Unix: -c (count), -W (timeout em segundos)
+    if ":" in ip:
+        return ["ping", "-6", "-c", str(count), "-W", str(timeout), ip]
+
+    return ["ping", "-c", str(count), "-W", str(timeout), ip]
+
+def parse_ping_output(returncode, stdout, stderr, max_ms=5000):
+
+    # falhou totalmente
+    if returncode != 0:
+        return {
+            "success": False,
+            "error": stderr[:120] if stderr else "Host inalcançável",
+            "latency": None
+        }
+
+    # Extrair RTT real (o regex funciona para ambos: "time=25ms" ou "time<1ms")
+    match = re.search(r"time[=<]([\d\.]+)\s*ms", stdout)
+
+    if not match:
+        return {
+            "success": False,
+            "error": "RTT não encontrado",
+            "latency": None
+        }
+
+    latency = float(match.group(1))
+
+    # respondeu mas lento demais
+    if latency > max_ms:
+        return {
+            "success": True,
+            "error": "high latency",
+            "latency": latency
+        }
+
+    return {
+        "success": True,
+        "error": None,
+        "latency": latency
+    }
+
+def ping_host(ip: str, count: int = 3, timeout: int = 5, max_ms=5000):
+    cmd = ping_command(ip, count, timeout)
 
     try:
         result = subprocess.run(
@@ -115,39 +137,32 @@ def ping_host(ip: str, count: int = 3, timeout: int = 5, max_ms=5000):
             text=True
         )
 
-        # falhou totalmente
-        if result.returncode != 0:
-            return {
-                "success": False,
-                "error": result.stderr[:120] if result.stderr else "Host inalcançável",
-                "latency": None
-            }
-
-        # Extrair RTT real (o regex funciona para ambos: "time=25ms" ou "time<1ms")
-        match = re.search(r"time[=<]([\d\.]+)\s*ms", result.stdout)
+        return parse_ping_output(result.returncode, result.stdout, result.stderr, max_ms)
 
-        if not match:
-            return {
-                "success": False,
-                "error": "RTT não encontrado",
-                "latency": None
-            }
+    except Exception as e:
+        return {
+            "success": False,
+            "error": str(e),
+            "latency": None
+        }
 
-        latency = float(match.group(1))
+async def ping_host_async(ip: str, count: int = 3, timeout: int = 5, max_ms=5000):
+    cmd = ping_command(ip, count, timeout)
 
-        # respondeu mas lento demais
-        if latency > max_ms:
-            return {
-                "success": True,
-                "error": "high latency",
-                "latency": latency
-            }
+    try:
+        proc = await asyncio.create_subprocess_exec(
+            *cmd,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.PIPE
+        )
+        stdout, stderr = await proc.communicate()
 
-        return {
-            "success": True,
-            "error": None,
-            "latency": latency
-        }
+        return parse_ping_output(
+            proc.returncode,
+            stdout.decode(errors="replace"),
+            stderr.decode(errors="replace"),
+            max_ms
+        )
 
     except Exception as e:
         return {
@@ -187,6 +202,39 @@ def tcp_check(ip: str, port: int, timeout: int = 5):
         except:
              pass
 
+async def tcp_check_async(ip: str, port: int, timeout: int = 5):
+
+    start = time.time()
+
+    try:
+        _, writer = await asyncio.wait_for(
+            asyncio.open_connection(ip, port),
+            timeout
+        )
+        latency = round((time.time() - start) * 1000, 2)
+
+        writer.close()
+
+        return {
+                "success": True,
+                "error": None,
+                "latency": latency
+        }
+
+    except asyncio.TimeoutError:
+        return {
+                "success": False,
+                "error": "timed out",
+                "latency": None
+        }
+
+    except Exception as e:
+        return {
+                "success": False,
+                "error": str(e),
+                "latency": None
+        }
+
 def http_check(url: str, timeout=3):
 
     start = time.time()
@@ -245,3 +293,236 @@ def http_check(url: str, timeout=3):
             "status_code": None,
             "error": str(e)
         }
+
+# tempos da requisição HTTP corrente (preenchidos pelo backend e pelo trace)
+_http_timings = contextvars.ContextVar("http_timings", default=None)
+
+class TimedNetworkBackend(httpcore.AsyncNetworkBackend):
+    # Resolve o DNS aqui para separar o tempo de DNS do tempo de connect
+
+    def __init__(self, backend):
+        self._backend = backend
+
+    async def connect_tcp(self, host, port, timeout=None, local_address=None, socket_options=None):
+        start = time.perf_counter()
+
+        try:
+            infos = await asyncio.wait_for(
+                asyncio.get_running_loop().getaddrinfo(host, port, type=socket.SOCK_STREAM),
+                timeout
+            )
+        except asyncio.TimeoutError:
+            raise httpcore.ConnectTimeout(f"DNS timeout: {host}")
+        except OSError as e:
+            raise httpcore.ConnectError(str(e))
+
+        timings = _http_timings.get()
+        if timings is not None:
+            timings["dns_ms"] += (time.perf_counter() - start) * 1000
+
+        error = None
+        for ip in dict.fromkeys(info[4][0] for info in infos):
+            try:
+                return await self._backend.connect_tcp(ip, port, timeout, local_address, socket_options)
+            except (httpcore.ConnectError, httpcore.ConnectTimeout) as e:
+                error = e
+
+        raise error
+
+    async def connect_unix_socket(self, path, timeout=None, socket_options=None):
+        return await self._backend.connect_unix_socket(path, timeout, socket_options)
+
+    async def sleep(self, seconds):
+        await self._backend.sleep(seconds)
+
+# exceções do httpcore viram as do httpx (que o check trata); as mais
+# específicas primeiro
+HTTPCORE_ERRORS = (
+    (httpcore.ConnectTimeout, httpx.ConnectTimeout),
+    (httpcore.ReadTimeout, httpx.ReadTimeout),
+    (httpcore.WriteTimeout, httpx.WriteTimeout),
+    (httpcore.PoolTimeout, httpx.PoolTimeout),
+    (httpcore.TimeoutException, httpx.TimeoutException),
+    (httpcore.ConnectError, httpx.ConnectError),
+    (httpcore.ReadError, httpx.ReadError),
+    (httpcore.WriteError, httpx.WriteError),
+    (httpcore.NetworkError, httpx.NetworkError),
+    (httpcore.RemoteProtocolError, httpx.RemoteProtocolError),
+    (httpcore.LocalProtocolError, httpx.LocalProtocolError),
+    (httpcore.ProtocolError, httpx.ProtocolError),
+)
+
+def _httpx_error(e, request):
+    for core_error, error in HTTPCORE_ERRORS:
+        if isinstance(e, core_error):
+            return error(str(e), request=request)
+
+    return e
+
+class _ResponseStream(httpx.AsyncByteStream):
+
+    def __init__(self, stream, request):
+        self._stream = stream
+        self._request = request
+
+    async def __aiter__(self):
+        try:
+            async for part in self._stream:
+                yield part
+        except Exception as e:
+            raise _httpx_error(e, self._request) from e
+
+    async def aclose(self):
+        await self._stream.aclose()
+
+class TimedTransport(httpx.AsyncBaseTransport):
+    # transporte httpx sobre um AsyncConnectionPool montado pela API pública
+    # do httpcore, com o TimedNetworkBackend no lugar do backend padrão
+
+    def __init__(self, limits, http2=False):
+        self._pool = httpcore.AsyncConnectionPool(
+            max_connections=limits.max_connections,
+            max_keepalive_connections=limits.max_keepalive_connections,
+            keepalive_expiry=limits.keepalive_expiry,
+            http1=True,
+            http2=http2,
+            network_backend=TimedNetworkBackend(httpcore.AnyIOBackend()),
+        )
+
+    async def handle_async_request(self, request):
+        core_request = httpcore.Request(
+            method=request.method,
+            url=httpcore.URL(
+                scheme=request.url.raw_scheme,
+                host=request.url.raw_host,
+                port=request.url.port,
+                target=request.url.raw_path,
+            ),
+            headers=request.headers.raw,
+            content=request.stream,
+            extensions=request.extensions,
+        )
+
+        try:
+            response = await self._pool.handle_async_request(core_request)
+        except Exception as e:
+            raise _httpx_error(e, request) from e
+
+        return httpx.Response(
+            status_code=response.status,
+            headers=response.headers,
+            stream=_ResponseStream(response.stream, request),
+            extensions=response.extensions,
+        )
+
+    async def aclose(self):
+        await self._pool.aclose()
+
+def make_http_client(max_connections=HTTP_MAX_CONNECTIONS, http2=HTTP2_ENABLED):
+    if http2:
+        try:
+            import h2
+        except ImportError:
+            print("[HTTP] pacote h2 não instalado, usando HTTP/1.1")
+            http2 = False
+
+    limits = httpx.Limits(
+        max_connections=max_connections,
+        max_keepalive_connections=max_connections,
+        keepalive_expiry=HTTP_KEEPALIVE_EXPIRY
+    )
+
+    return httpx.AsyncClient(
+        transport=TimedTransport(limits, http2=http2),
+        follow_redirects=True,
+        headers={
+            "User-Agent": "NOC-Lite-Monitor"
+        }
+    )
+
+async def _trace_http(event_name, info):
+    timings = _http_timings.get()
+    if timings is None:
+        return
+
+    parts = event_name.split(".")
+    if len(parts) != 3:
+        return
+
+    now = time.perf_counter()
+    _, step, phase = parts
+
+    if step == "send_request_headers" and phase == "started":
+        timings["_request"] = now
+    elif step == "receive_response_headers" and phase == "complete":
+        timings["ttfb_ms"] += (now - timings.pop("_request", now)) * 1000
+    elif step in ("connect_tcp", "start_tls"):
+        if phase == "started":
+            timings["_" + step] = now
+        elif phase == "complete":
+            field = "connect_ms" if step == "connect_tcp" else "tls_ms"
+            timings[field] += (now - timings.pop("_" + step, now)) * 1000
+
+# check que falhou: mesmos campos, sem valores
+NO_TIMINGS = {"dns_ms": None, "connect_ms": None, "tls_ms": None, "ttfb_ms": None, "total_ms": None}
+
+def _timing_fields(timings, total_ms):
+    # conexão reaproveitada do pool: DNS/connect/TLS ficam em 0
+    return {
+        "dns_ms": round(timings["dns_ms"], 2),
+        "connect_ms": round(max(0.0, timings["connect_ms"] - timings["dns_ms"]), 2),
+        "tls_ms": round(timings["tls_ms"], 2),
+        "ttfb_ms": round(timings["ttfb_ms"], 2),
+        "total_ms": total_ms,
+    }
+
+async def http_check_async(url: str, client: httpx.AsyncClient, timeout=3):
+
+    timings = {"dns_ms": 0.0, "connect_ms": 0.0, "tls_ms": 0.0, "ttfb_ms": 0.0}
+    _http_timings.set(timings)
+
+    start = time.perf_counter()
+
+    try:
+        r = await client.get(
+            url,
+            timeout=timeout,
+            extensions={"trace": _trace_http}
+        )
+
+        latency = round((time.perf_counter() - start) * 1000, 2)
+
+        return {
+            "success": 200 <= r.status_code < 400,
+            "latency": latency,
+            "status_code": r.status_code,
+            "error": None,
+            **_timing_fields(timings, latency)
+        }
+
+    except httpx.TimeoutException:
+        return {
+            "success": False,
+            "latency": None,
+            "status_code": None,
+            "error": "timeout",
+            **NO_TIMINGS
+        }
+
+    except httpx.ConnectError:
+        return {
+            "success": False,
+            "latency": None,
+            "status_code": None,
+            "error": "connection_error",
+            **NO_TIMINGS
+        }
+
+    except Exception as e:
+        return {
+            "success": False,
+            "latency": None,
+            "status_code": None,
+            "error": str(e),
+            **NO_TIMINGS
+        }
@@ -0,0 +1,52 @@
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+
+
+def system_utcnow():
+    # UTC sem fuso, como o resto do banco (datetime.utcnow está obsoleto)
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
+# Relógio do ciclo de checagem. Em produção é o relógio do sistema; numa
+# simulação (benchmarks/replay.py) vira um relógio virtual que só anda quando
+# mandam, então horas de monitoramento rodam em segundos com timestamps
+# coerentes em checks, alertas e incidentes.
+class Clock:
+
+    def __init__(self):
+        self._virtual = None
+        self._lock = threading.Lock()
+
+    @property
+    def virtual(self):
+        return self._virtual is not None
+
+    def utcnow(self):
+        return self._virtual or system_utcnow()
+
+    def time(self):
+        # epoch em segundos (mesma escala de time.time())
+        if self._virtual is None:
+            return time.time()
+
+        return (self._virtual - datetime(1970, 1, 1)).total_seconds()
+
+    def freeze(self, start=None):
+        with self._lock:
+            self._virtual = start or system_utcnow()
+
+    def advance(self, seconds):
+        with self._lock:
+            if self._virtual is None:
+                raise RuntimeError("relógio não está em modo virtual")
+
+            self._virtual += timedelta(seconds=seconds)
+            return self._virtual
+
+    def resume(self):
+        with self._lock:
+            self._virtual = None
+
+
+clock = Clock()
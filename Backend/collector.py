@@ -0,0 +1,146 @@
+import argparse
+import signal
+import threading
+import time
+from Backend import retention
+from Backend.bridge import publish_status, store_events, trim_events
+from Backend.cycles import cycle_log
+from Backend.database import engine
+from Backend.dns_cache import dns_cache
+from Backend.leases import COLLECTOR_LEASE, acquire, lease_expiring, process_owner, release
+from Backend.migrations import migrate
+from Backend.scheduler import start_scheduler, stop_scheduler
+from Backend.shards import ShardPool
+from Backend.telemetry import registry
+from Backend.tsdb import tsdb
+from Backend.writer import write_buffer
+
+# Processo coletor: o único que checa hosts e grava resultados.
+#
+#   python -m Backend.collector [--workers N]
+#
+# A API (uvicorn, quantos workers quiser) só lê. Um lease no banco garante um
+# coletor ativo por vez: um segundo coletor fica em espera e assume quando o
+# lease do primeiro vence (processo morto ou travado).
+#
+# Com --workers N as checagens rodam em N processos, cada um com uma parte dos
+# hosts (Backend/shards.py); este processo fica só como escritor único.
+#
+# Lease perdido: o processo sai com código 1 sem gravar mais nada. Quem o
+# iniciou (run.py, systemd, supervisor...) deve subir outro, que entra em
+# espera até o lease vencer.
+
+# Prazo do lease e de quanto em quanto tempo ele é renovado
+LEASE_TTL = 30
+RENEW_INTERVAL = 5
+
+# Coletor em espera tenta pegar o lease nesse intervalo
+STANDBY_INTERVAL = 5
+
+
+def collector_payload(owner, pool=None):
+    # o que a API mostra em /metrics e /system/*
+    return {
+        "owner": owner,
+        "metrics": registry.render(),
+        "cycles": cycle_log.summary(),
+        "retention": retention.last_report,
+        "dns_cache": dns_cache.stats(),
+        "shards": pool.status() if pool else None,
+    }
+
+
+def run(owner=None, workers=0):
+    owner = owner or process_owner()
+    stopping = threading.Event()
+
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        signal.signal(sig, lambda *_: stopping.set())
+
+    migrate(engine)
+
+    while True:
+        renewed_at = time.monotonic()
+        if acquire(COLLECTOR_LEASE, owner, LEASE_TTL):
+            break
+
+        print(f"[COLLECTOR] outro coletor ativo, {owner} em espera")
+        if stopping.wait(STANDBY_INTERVAL):
+            return 0
+
+    print(f"[COLLECTOR] {owner} ativo")
+
+    # eventos do SSE vão para o banco; os workers da API repassam
+    write_buffer.listeners.append(store_events)
+
+    # amostras cruas também na série temporal em disco (Backend/tsdb.py)
+    tsdb.start_writing()
+    write_buffer.listeners.append(tsdb.store_checks)
+
+    pool = ShardPool(workers) if workers else None
+    start_scheduler(check_hosts=not pool)
+
+    if pool:
+        pool.start()
+
+    lost = False
+
+    try:
+        while True:
+            try:
+                if pool:
+                    pool.supervise()
+
+                publish_status(owner, collector_payload(owner, pool))
+                trim_events()
+            except Exception as e:
+                print(f"[COLLECTOR ERROR] {e}")
+
+            if stopping.wait(RENEW_INTERVAL):
+                break
+
+            attempt = time.monotonic()
+
+            try:
+                renewed = acquire(COLLECTOR_LEASE, owner, LEASE_TTL)
+            except Exception as e:
+                print(f"[COLLECTOR ERROR] renovação do lease: {e}")
+
+                # banco ocupado: tenta de novo na próxima volta, se o lease
+                # ainda não estiver para vencer
+                if not lease_expiring(renewed_at, LEASE_TTL, RENEW_INTERVAL):
+                    continue
+
+                renewed = False
+
+            if renewed:
+                renewed_at = attempt
+                continue
+
+            # ficou parado ou sem banco além do prazo: outro coletor assume.
+            # Daqui em diante nada é gravado, nem o que sobrou no buffer
+            print(f"[COLLECTOR ERROR] lease perdido, {owner} saindo")
+            write_buffer.fence()
+            lost = True
+            break
+
+    finally:
+        if pool:
+            pool.stop()
+
+        stop_scheduler(flush=not lost)
+
+        if not lost:
+            release(COLLECTOR_LEASE, owner)
+
+        print(f"[COLLECTOR] {owner} parado")
+
+    return 1 if lost else 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Coletor do NOC Lite")
+    parser.add_argument("--workers", type=int, default=0, help="processos de checagem (0: neste processo)")
+    args = parser.parse_args()
+
+    raise SystemExit(run(workers=args.workers))
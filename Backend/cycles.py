@@ -0,0 +1,145 @@
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from datetime import datetime
+
+# Ciclos recentes guardados para /system/cycles
+RECENT_CYCLES = 60
+
+# Hosts mais lentos guardados por ciclo
+SLOWEST_HOSTS = 10
+
+# Etapas medidas por host (probes no engine, métricas no save_batch)
+PROBE_STAGES = ("dns", "ping", "tcp", "http")
+STAGES = PROBE_STAGES + ("metrics",)
+
+
+def _ms(seconds):
+    return round(seconds * 1000, 2)
+
+
+def host_wall(timings):
+    # DNS antes; ping, TCP e HTTP em paralelo; métricas depois
+    checks = max((timings.get(k, 0) for k in ("ping", "tcp", "http")), default=0)
+    return timings.get("dns", 0) + checks + timings.get("metrics", 0)
+
+
+# Tempos de um ciclo (um lote do agendador ou um check_all_hosts).
+# Fases são tempo de parede do ciclo; etapas são somadas host a host (os
+# probes rodam juntos, então a soma pode passar do tempo do ciclo).
+class CycleTimer:
+
+    def __init__(self, source):
+        self.source = source
+        self.started_at = datetime.utcnow()
+        self.started = time.perf_counter()
+        self.phases = {}
+
+    @contextmanager
+    def phase(self, name):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.phases[name] = self.phases.get(name, 0) + time.perf_counter() - started
+
+    def finish(self, targets, probes):
+        seconds = time.perf_counter() - self.started
+        names = {t["id"]: t.get("name") for t in targets or []}
+        stages = dict.fromkeys(STAGES, 0.0)
+        hosts = []
+
+        for host_id, probe in (probes or {}).items():
+            timings = probe.get("timings") or {}
+
+            for stage in STAGES:
+                stages[stage] += timings.get(stage, 0)
+
+            hosts.append((host_wall(timings), host_id, timings))
+
+        hosts.sort(key=lambda h: h[0], reverse=True)
+
+        # banco = carga + gravação, tirando o cálculo de métricas que roda no save
+        db = self.phases.get("load", 0) + self.phases.get("save", 0) - stages["metrics"]
+
+        return {
+            "source": self.source,
+            "started": self.started_at.isoformat(),
+            "hosts": len(probes or {}),
+            "ms": _ms(seconds),
+            "phases_ms": {name: _ms(v) for name, v in self.phases.items()},
+            "stages_ms": {**{name: _ms(v) for name, v in stages.items()}, "db": _ms(max(db, 0))},
+            "slowest": [
+                {
+                    "host_id": host_id,
+                    "name": names.get(host_id),
+                    "ms": _ms(wall),
+                    "stages_ms": {k: _ms(v) for k, v in timings.items()},
+                }
+                for wall, host_id, timings in hosts[:SLOWEST_HOSTS]
+            ],
+        }
+
+
+class CycleLog:
+
+    def __init__(self, size=RECENT_CYCLES):
+        self._cycles = deque(maxlen=size)
+        self._lock = threading.Lock()
+        self._last_id = 0
+
+    def record(self, cycle):
+        with self._lock:
+            self._last_id += 1
+            self._cycles.append({"id": self._last_id, **cycle})
+
+    def recent(self, limit=None):
+        with self._lock:
+            cycles = list(self._cycles)
+
+        cycles.reverse()
+        return cycles[:limit] if limit else cycles
+
+    def summary(self, limit=None):
+        cycles = self.recent(limit)
+
+        stages = {}
+        worst = {}
+
+        for c in cycles:
+            for name, ms in c["stages_ms"].items():
+                stages[name] = round(stages.get(name, 0) + ms, 2)
+
+            # host que mais aparece entre os lentos e o pior tempo dele
+            for h in c["slowest"]:
+                entry = worst.setdefault(h["host_id"], {
+                    "host_id": h["host_id"],
+                    "name": h["name"],
+                    "appearances": 0,
+                    "worst_ms": 0,
+                    "worst_stages_ms": {},
+                })
+                entry["appearances"] += 1
+
+                if h["ms"] > entry["worst_ms"]:
+                    entry["worst_ms"] = h["ms"]
+                    entry["worst_stages_ms"] = h["stages_ms"]
+
+        durations = sorted(c["ms"] for c in cycles)
+
+        return {
+            "cycles": len(cycles),
+            "max_ms": durations[-1] if durations else None,
+            "median_ms": durations[len(durations) // 2] if durations else None,
+            "stages_ms": stages,
+            "slowest_hosts": sorted(
+                worst.values(),
+                key=lambda h: (h["appearances"], h["worst_ms"]),
+                reverse=True
+            )[:SLOWEST_HOSTS],
+            "recent": cycles,
+        }
+
+
+cycle_log = CycleLog()
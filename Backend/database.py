@@ -1,17 +1,141 @@
-from sqlalchemy import create_engine
+import os
+import time
+from sqlalchemy import create_engine, event, make_url
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker, declarative_base
+from Backend.telemetry import db_busy, db_lock_wait
 
-DATABASE_URL = "sqlite:///./noclite.db"
+# NOC_DATABASE_URL troca o banco (benchmarks, testes)
+DATABASE_URL = os.getenv("NOC_DATABASE_URL", "sqlite:///./noclite.db")
 
+# Pragmas de toda conexão: WAL deixa leitores lendo enquanto o escritor grava
+# (sem "database is locked" nos dashboards); synchronous=NORMAL é seguro com
+# WAL e só troca fsync por commit por fsync no checkpoint
+SQLITE_PRAGMAS = {
+    "synchronous": "NORMAL",
+    "cache_size": -32000,          # KiB (32 MB por conexão)
+    "mmap_size": 268435456,        # 256 MB lidos direto do mapeamento
+    "temp_store": "MEMORY",
+}
+
+# Quanto o escritor espera pelo lock de outro processo antes de desistir (ms)
+WRITER_BUSY_TIMEOUT = 10000
+READER_BUSY_TIMEOUT = 5000
+
+# Conexões de leitura por processo (rotas da API, cargas do agendador)
+READ_POOL_SIZE = 8
+READ_POOL_OVERFLOW = 8
+
+
+def _pragmas(dbapi_connection, extra):
+    cursor = dbapi_connection.cursor()
+    for name, value in {**SQLITE_PRAGMAS, **extra}.items():
+        cursor.execute(f"PRAGMA {name} = {value}")
+    cursor.close()
+
+
+def _count_busy(role):
+    def handle_error(context):
+        if "database is locked" in str(context.original_exception):
+            db_busy.inc(role=role)
+
+    return handle_error
+
+
+# =====================
+# ESCRITOR
+# =====================
+# Uma conexão por processo: quem grava (write buffer, retenção, leases, CRUD
+# da API) espera a vez no pool em vez de brigar pelo lock dentro do SQLite.
+# Toda transação abre com BEGIN IMMEDIATE: pega o lock de escrita logo no
+# início (sem o upgrade de leitura para escrita que falha no meio) e o tempo
+# desse BEGIN é a espera pelo lock, exposta em noc_db_lock_wait_seconds.
 engine = create_engine(
     DATABASE_URL,
-    connect_args={"check_same_thread": False}
+    connect_args={"check_same_thread": False},
+    pool_size=1,
+    max_overflow=0,
+    pool_timeout=60,
 )
 
+
+@event.listens_for(engine, "connect")
+def _writer_connect(dbapi_connection, connection_record):
+    # o pysqlite não abre transação sozinho; quem abre é o _writer_begin
+    dbapi_connection.isolation_level = None
+    _pragmas(dbapi_connection, {"journal_mode": "WAL", "busy_timeout": WRITER_BUSY_TIMEOUT})
+
+
+@event.listens_for(engine, "begin")
+def _writer_begin(conn):
+    # VACUUM e afins (migrações) rodam fora de transação
+    if conn.get_execution_options().get("isolation_level") == "AUTOCOMMIT":
+        return
+
+    started = time.perf_counter()
+    conn.exec_driver_sql("BEGIN IMMEDIATE")
+    db_lock_wait.observe(time.perf_counter() - started)
+
+
+event.listen(engine, "handle_error", _count_busy("writer"))
+
 SessionLocal = sessionmaker(
     autocommit=False,
     autoflush=False,
     bind=engine
 )
 
+
+# =====================
+# LEITORES
+# =====================
+# Pool de conexões somente leitura (query_only): com WAL não esperam commit
+# nenhum, leem o último estado gravado
+read_engine = create_engine(
+    DATABASE_URL,
+    connect_args={"check_same_thread": False},
+    pool_size=READ_POOL_SIZE,
+    max_overflow=READ_POOL_OVERFLOW,
+)
+
+
+@event.listens_for(read_engine, "connect")
+def _reader_connect(dbapi_connection, connection_record):
+    _pragmas(dbapi_connection, {"busy_timeout": READER_BUSY_TIMEOUT, "query_only": "ON"})
+
+
+event.listen(read_engine, "handle_error", _count_busy("reader"))
+
+ReadSession = sessionmaker(
+    autocommit=False,
+    autoflush=False,
+    bind=read_engine
+)
+
+
+# =====================
+# LEITORES ASSÍNCRONOS (rotas da API)
+# =====================
+# Mesmo banco pelo aiosqlite: a rota espera a consulta no event loop em vez
+# de segurar um thread do pool do Starlette; o limite passa a ser o pool
+async_read_engine = create_async_engine(
+    make_url(DATABASE_URL).set(drivername="sqlite+aiosqlite"),
+    pool_size=READ_POOL_SIZE,
+    max_overflow=READ_POOL_OVERFLOW,
+)
+
+
+@event.listens_for(async_read_engine.sync_engine, "connect")
+def _async_reader_connect(dbapi_connection, connection_record):
+    _pragmas(dbapi_connection, {"busy_timeout": READER_BUSY_TIMEOUT, "query_only": "ON"})
+
+
+event.listen(async_read_engine.sync_engine, "handle_error", _count_busy("reader"))
+
+AsyncReadSession = async_sessionmaker(
+    async_read_engine,
+    autoflush=False,
+    expire_on_commit=False
+)
+
 Base = declarative_base()
@@ -0,0 +1,392 @@
+import asyncio
+import heapq
+import json
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future
+from datetime import timedelta
+from Backend.checker import is_ip_address, resolve_dns_real, resolve_dns_real_async
+from Backend.clock import clock
+from Backend.models import DNSCache
+from Backend.telemetry import counter, gauge
+
+# Máximo de nomes mantidos em memória (LRU)
+DNS_CACHE_SIZE = 10000
+
+# Falha de resolução fica em cache por pouco tempo antes de tentar de novo
+NEGATIVE_TTL = 30
+
+# Entrada é renovada quando sobra menos que isso do TTL (mesma margem de antes)
+REFRESH_MARGIN = 0.1
+
+DEFAULT_TTL = 60
+
+# Prefetch: renova o nome quando sobra PREFETCH_MARGIN do TTL (antes da margem
+# de renovação, então a checagem quase sempre acha o nome no cache)
+PREFETCH_MARGIN = 0.2
+PREFETCH_CONCURRENCY = 20
+
+# Nome que ninguém consultou nesse tempo deixa de ser renovado (host removido)
+PREFETCH_IDLE = 600
+
+
+def _positive_entry(ips, ttl, resolved):
+    ttl = ttl or DEFAULT_TTL
+    expires = resolved + timedelta(seconds=ttl)
+
+    return {
+        "ips": ips,
+        "ttl": ttl,
+        "resolved": resolved,
+        "expires": expires,
+        "refresh_at": expires - timedelta(seconds=ttl * REFRESH_MARGIN),
+        "prefetch_at": expires - timedelta(seconds=ttl * PREFETCH_MARGIN),
+    }
+
+
+def _negative_entry(now):
+    return {
+        "ips": [],
+        "ttl": None,
+        "resolved": now,
+        "expires": now,
+        "refresh_at": now + timedelta(seconds=NEGATIVE_TTL),
+        "prefetch_at": None,
+    }
+
+
+def _result(entry, now):
+    if not entry["ips"]:
+        return [], None, None
+
+    return entry["ips"], entry["ttl"], int((entry["expires"] - now).total_seconds())
+
+
+# Cache de DNS em memória na frente da tabela dns_cache.
+# - TTL real do registro, limitado por LRU
+# - consultas simultâneas ao mesmo nome esperam a mesma resolução (sync ou async)
+# - falhas ficam em cache negativo por NEGATIVE_TTL (servindo o IP antigo se houver)
+# - a tabela só recebe escrita atrasada (flush) e serve para aquecer o cache
+class DNSMemoryCache:
+
+    def __init__(self, max_size=DNS_CACHE_SIZE):
+        self.max_size = max_size
+
+        self._entries = OrderedDict()
+        self._inflight = {}
+        self._dirty = {}
+        self._lock = threading.Lock()
+
+        # fila (prefetch_at, nome) para o prefetcher e último uso de cada nome
+        self._prefetch = []
+        self._last_used = {}
+
+        self.counters = {
+            "hits": 0,
+            "misses": 0,
+            "coalesced": 0,
+            "refreshes": 0,
+            "refresh_failures": 0,
+        }
+
+    def _claim(self, name, now, force=False):
+        # devolve (resultado em cache, future em andamento, se é o responsável)
+        with self._lock:
+            entry = self._entries.get(name)
+
+            if not force:
+                self._last_used[name] = clock.time()
+
+            if entry and not force and now < entry["refresh_at"]:
+                self._entries.move_to_end(name)
+                self.counters["hits"] += 1
+                return _result(entry, now), None, False
+
+            future = self._inflight.get(name)
+            if future:
+                if not force:
+                    self.counters["coalesced"] += 1
+                return None, future, False
+
+            if not force:
+                self.counters["misses"] += 1
+
+            future = Future()
+            self._inflight[name] = future
+            return None, future, True
+
+    def _push_prefetch(self, name, entry):
+        if entry["prefetch_at"] is not None:
+            heapq.heappush(self._prefetch, (entry["prefetch_at"], name))
+
+    def _store(self, name, ips, ttl, future):
+        now = clock.utcnow()
+
+        with self._lock:
+            old = self._entries.get(name)
+
+            if ips:
+                entry = _positive_entry(ips, ttl, now)
+                self._dirty[name] = entry
+
+            elif old and old["ips"]:
+                # falhou: continua servindo o IP antigo e tenta de novo depois
+                entry = dict(
+                    old,
+                    refresh_at=now + timedelta(seconds=NEGATIVE_TTL),
+                    prefetch_at=now + timedelta(seconds=NEGATIVE_TTL / 2)
+                )
+
+            else:
+                entry = _negative_entry(now)
+
+            self._entries[name] = entry
+            self._entries.move_to_end(name)
+            self._push_prefetch(name, entry)
+
+            while len(self._entries) > self.max_size:
+                evicted, _ = self._entries.popitem(last=False)
+                self._last_used.pop(evicted, None)
+
+            self._inflight.pop(name, None)
+
+        future.set_result(_result(entry, now))
+
+    def resolve(self, name):
+        if is_ip_address(name):
+            return [name], None, None
+
+        cached, future, leader = self._claim(name, clock.utcnow())
+        if cached:
+            return cached
+
+        if leader:
+            ips, ttl = [], None
+            try:
+                ips, ttl = resolve_dns_real(name)
+            except Exception:
+                pass
+            finally:
+                self._store(name, ips, ttl, future)
+
+        return future.result()
+
+    async def resolve_async(self, name, resolver=resolve_dns_real_async):
+        if is_ip_address(name):
+            return [name], None, None
+
+        cached, future, leader = self._claim(name, clock.utcnow())
+        if cached:
+            return cached
+
+        if leader:
+            ips, ttl = [], None
+            try:
+                ips, ttl = await resolver(name)
+            except Exception:
+                pass
+            finally:
+                self._store(name, ips, ttl, future)
+
+        return await asyncio.wrap_future(future)
+
+    async def refresh_async(self, name, resolver=resolve_dns_real_async):
+        # renovação antecipada: resolve mesmo com a entrada ainda válida
+        _, future, leader = self._claim(name, clock.utcnow(), force=True)
+
+        if not leader:
+            return await asyncio.wrap_future(future)
+
+        ips, ttl = [], None
+        try:
+            ips, ttl = await resolver(name)
+        except Exception:
+            pass
+        finally:
+            self._store(name, ips, ttl, future)
+
+        with self._lock:
+            self.counters["refreshes" if ips else "refresh_failures"] += 1
+
+        return future.result()
+
+    def due_for_prefetch(self, now):
+        # nomes cuja hora de prefetch chegou; devolve também a próxima hora
+        idle_limit = clock.time() - PREFETCH_IDLE
+        due = []
+
+        with self._lock:
+            while self._prefetch and self._prefetch[0][0] <= now:
+                when, name = heapq.heappop(self._prefetch)
+                entry = self._entries.get(name)
+
+                # entrada velha (já renovada ou removida do cache)
+                if not entry or entry["prefetch_at"] != when:
+                    continue
+
+                if self._last_used.get(name, 0) < idle_limit:
+                    continue
+
+                due.append(name)
+
+            next_at = self._prefetch[0][0] if self._prefetch else None
+
+        return due, next_at
+
+    def stats(self):
+        with self._lock:
+            counters = dict(self.counters)
+            size = len(self._entries)
+
+        lookups = counters["hits"] + counters["misses"] + counters["coalesced"]
+
+        return {
+            **counters,
+            "size": size,
+            "hit_ratio": round(counters["hits"] / lookups, 4) if lookups else None,
+        }
+
+    def warm(self, db):
+        # carrega a tabela dns_cache na memória (startup)
+        rows = db.query(DNSCache).all()
+
+        with self._lock:
+            for r in rows:
+                if r.hostname in self._entries:
+                    continue
+
+                entry = _positive_entry(json.loads(r.ip_list), r.ttl, r.resolved_time)
+                self._entries[r.hostname] = entry
+                self._last_used[r.hostname] = clock.time()
+                self._push_prefetch(r.hostname, entry)
+
+            while len(self._entries) > self.max_size:
+                evicted, _ = self._entries.popitem(last=False)
+                self._last_used.pop(evicted, None)
+
+        return len(rows)
+
+    def take_dirty(self):
+        # resoluções novas ainda não gravadas (worker de shard manda ao escritor)
+        with self._lock:
+            dirty, self._dirty = self._dirty, {}
+
+        return dirty
+
+    def merge_dirty(self, dirty):
+        # resoluções vindas de um worker, gravadas no próximo flush daqui
+        with self._lock:
+            self._dirty.update(dirty)
+
+    def flush(self, db):
+        # write-behind: grava na tabela as resoluções novas desde o último flush
+        dirty = self.take_dirty()
+
+        if not dirty:
+            return 0
+
+        try:
+            records = {
+                r.hostname: r
+                for r in db.query(DNSCache).filter(DNSCache.hostname.in_(list(dirty)))
+            }
+
+            for name, entry in dirty.items():
+                record = records.get(name)
+
+                if record is None:
+                    record = DNSCache(hostname=name)
+                    db.add(record)
+
+                record.ip_list = json.dumps(entry["ips"])
+                record.ttl = entry["ttl"]
+                record.resolved_time = entry["resolved"]
+                record.expires_time = entry["expires"]
+
+            db.commit()
+
+        except Exception:
+            db.rollback()
+
+            # devolve para o próximo flush (sem sobrescrever resolução mais nova)
+            with self._lock:
+                for name, entry in dirty.items():
+                    self._dirty.setdefault(name, entry)
+            raise
+
+        return len(dirty)
+
+
+# Worker de refresh-ahead: renova cada nome pouco antes de expirar, com
+# concorrência limitada, num thread com loop asyncio próprio. Tempo e
+# resolução seguem o relógio (Backend/clock.py) e o resolver de quem o usa
+# (Backend/scheduler.py aponta para o backend de probe do engine)
+class DNSPrefetcher:
+
+    def __init__(self, cache, concurrency=PREFETCH_CONCURRENCY, resolver=resolve_dns_real_async):
+        self.cache = cache
+        self.concurrency = concurrency
+        self.resolver = resolver
+        self._thread = None
+        self._stopping = False
+
+    def start(self):
+        if self._thread:
+            return
+
+        self._thread = threading.Thread(
+            target=lambda: asyncio.run(self._main()),
+            name="dns-prefetcher",
+            daemon=True
+        )
+        self._thread.start()
+
+    def stop(self):
+        self._stopping = True
+
+    async def _refresh(self, name, sem):
+        async with sem:
+            try:
+                await self.cache.refresh_async(name, self.resolver)
+            except Exception as e:
+                print(f"[DNS PREFETCH ERROR] {name}: {e}")
+
+    async def _main(self):
+        sem = asyncio.Semaphore(self.concurrency)
+        tasks = set()
+
+        while not self._stopping:
+            now = clock.utcnow()
+            due, next_at = self.cache.due_for_prefetch(now)
+
+            for name in due:
+                task = asyncio.create_task(self._refresh(name, sem))
+                tasks.add(task)
+                task.add_done_callback(tasks.discard)
+
+            wait = 1.0
+            if next_at is not None:
+                wait = min(wait, max(0.05, (next_at - clock.utcnow()).total_seconds()))
+
+            await asyncio.sleep(wait)
+
+
+dns_cache = DNSMemoryCache()
+dns_prefetcher = DNSPrefetcher(dns_cache)
+
+counter(
+    "noc_dns_cache_lookups_total",
+    "Consultas ao cache DNS por resultado",
+    lambda: {k: dns_cache.counters[k] for k in ("hits", "misses", "coalesced")},
+    ("result",)
+)
+gauge(
+    "noc_dns_cache_hit_ratio",
+    "Acertos / consultas do cache DNS desde o início",
+    lambda: dns_cache.stats()["hit_ratio"]
+)
+gauge("noc_dns_cache_entries", "Nomes no cache DNS", lambda: dns_cache.stats()["size"])
+
+
+def resolve_dns_cached(address: str, db=None):
+    return dns_cache.resolve(address)
@@ -0,0 +1,155 @@
+import asyncio
+import time
+from Backend.clock import clock
+from Backend.dns_cache import dns_cache
+from Backend.probes import NetworkBackend
+from Backend.telemetry import probe_seconds, probes_in_flight
+
+# Limite global de probes simultâneos (todas as checagens somadas)
+MAX_CONCURRENCY = 1000
+
+# Limites por tipo de checagem
+CHECK_LIMITS = {
+    "dns": 200,
+    "ping": 500,
+    "tcp": 1000,
+    "http": 500,
+}
+
+
+def _succeeded(result):
+    # checagens devolvem dict com "success"; DNS devolve (ips, ttl)
+    if isinstance(result, dict):
+        return bool(result.get("success"))
+
+    return bool(result and result[0])
+
+
+# Executa DNS, ping, TCP e HTTP de vários hosts ao mesmo tempo.
+# O engine só faz I/O: recebe alvos já montados (dicts simples, sem ORM)
+# e devolve os resultados por host_id. Gravar no banco fica com o scheduler.
+# Quem fala com a rede é o backend (Backend/probes.py): real ou simulado.
+class CheckEngine:
+
+    def __init__(self, max_concurrency=MAX_CONCURRENCY, limits=None, backend=None):
+        self.max_concurrency = max_concurrency
+        self.limits = {**CHECK_LIMITS, **(limits or {})}
+        self.backend = backend or NetworkBackend()
+
+        # {loop: (semáforo global, semáforos por tipo)}: um conjunto por loop
+        # asyncio (check_all_hosts e a agenda por host rodam em loops próprios)
+        self._bound = {}
+
+    def run(self, targets):
+        return asyncio.run(self._run_once(targets))
+
+    async def _run_once(self, targets):
+        # loop descartável: fecha o pool HTTP antes do loop acabar
+        try:
+            return await self.probe_hosts(targets)
+        finally:
+            await self.backend.close()
+            self._bound.pop(asyncio.get_running_loop(), None)
+
+    def _bind_loop(self):
+        # Semáforos valem para o loop corrente e são compartilhados entre lotes
+        # concorrentes do loop
+        loop = asyncio.get_running_loop()
+
+        if loop not in self._bound:
+            self._bound[loop] = (
+                asyncio.Semaphore(self.max_concurrency),
+                {kind: asyncio.Semaphore(limit) for kind, limit in self.limits.items()},
+            )
+
+            self.backend.bind(self.limits["http"])
+
+    async def probe_hosts(self, targets):
+        self._bind_loop()
+
+        probes = await asyncio.gather(
+            *(self._probe_host(t) for t in targets)
+        )
+
+        return {t["id"]: p for t, p in zip(targets, probes)}
+
+    async def _limited(self, kind, coro):
+        limit, sems = self._bound[asyncio.get_running_loop()]
+
+        async with sems[kind]:
+            async with limit:
+                # tempo medido só depois de conseguir a vaga
+                probes_in_flight.inc(check_type=kind)
+                started = time.perf_counter()
+
+                try:
+                    result = await coro
+                finally:
+                    probes_in_flight.dec(check_type=kind)
+
+                probe_seconds.observe(
+                    time.perf_counter() - started,
+                    check_type=kind,
+                    success="true" if _succeeded(result) else "false"
+                )
+
+                return result
+
+    async def _timed(self, timings, kind, coro):
+        started = time.perf_counter()
+
+        try:
+            return await self._limited(kind, coro)
+        finally:
+            timings[kind] = time.perf_counter() - started
+
+    def _resolve_limited(self, address):
+        # só a resolução real consome vaga de DNS; quem espera a mesma
+        # resolução (ou acerta o cache) não ocupa vaga
+        return self._limited("dns", self.backend.resolve(address))
+
+    async def _probe_host(self, target):
+        probe = {
+            "dns": ([], None, None),
+            "ip": None,
+            "ping": None,
+            "tcp": None,
+            "http": None,
+            # segundos de parede por etapa, contando a espera por vaga
+            "timings": {},
+        }
+
+        timings = probe["timings"]
+        started = time.perf_counter()
+
+        try:
+            probe["dns"] = await dns_cache.resolve_async(target["address"], self._resolve_limited)
+        except Exception as e:
+            print(f"[ENGINE DNS ERROR] {target['address']}: {e}")
+            return probe
+        finally:
+            timings["dns"] = time.perf_counter() - started
+
+        ips = probe["dns"][0]
+        if not ips:
+            return probe
+
+        # =====================
+        # Escolha IP rotativo
+        # =====================
+        index = (target["id"] + int(clock.time()/20)) % len(ips)
+        ip = ips[index]
+        probe["ip"] = ip
+
+        checks = {"ping": self._timed(timings, "ping", self.backend.ping(ip))}
+
+        if target["port"]:
+            checks["tcp"] = self._timed(timings, "tcp", self.backend.tcp(ip, target["port"]))
+
+        if target["url"]:
+            checks["http"] = self._timed(timings, "http", self.backend.http(target["url"]))
+
+        results = await asyncio.gather(*checks.values())
+        probe.update(zip(checks.keys(), results))
+
+        return probe
@@ -0,0 +1,217 @@
+import asyncio
+import json
+import threading
+import time
+from collections import deque
+
+# Eventos guardados para quem reconecta retomar pelo cursor (Last-Event-ID)
+EVENT_BUFFER = 5000
+
+# Sem evento nesse tempo o stream manda um comentário (mantém proxies abertos)
+KEEPALIVE_SECONDS = 15
+
+# Tempo que o navegador espera antes de reconectar
+RETRY_MS = 3000
+
+# O que o card do host mostra: sem mudança aqui, o flush não gera evento "host"
+DISPLAY_FIELDS = ("status", "severity", "health_score")
+DISPLAY_CHECK_FIELDS = ("success", "error")
+
+# Latência muda a cada checagem: só conta quando se afasta 25% (ou mais) da
+# que o card mostra. Mesmo sem mudança o card é atualizado nesse intervalo
+LATENCY_STEP = 1.25
+DISPLAY_REFRESH_SECONDS = 60
+
+
+def latency_moved(shown, latency):
+    # abaixo de 1ms tudo conta como 1ms
+    if shown is None or latency is None:
+        return shown != latency
+    low, high = sorted((max(shown, 1.0), max(latency, 1.0)))
+    return high / low >= LATENCY_STEP
+
+
+def to_json(data):
+    return json.dumps(data, default=lambda v: v.isoformat() if hasattr(v, "isoformat") else str(v))
+
+
+# Último estado exibido de cada host (no processo que gera os eventos)
+class DisplayedHosts:
+
+    def __init__(self, refresh=DISPLAY_REFRESH_SECONDS):
+        self.refresh = refresh
+        self._shown = {}
+        self._lock = threading.Lock()
+
+    def changed(self, host_id, fields, checks, now=None):
+        now = time.monotonic() if now is None else now
+        shown = (
+            tuple(fields.get(f) for f in DISPLAY_FIELDS),
+            tuple(sorted(
+                (check_type, tuple(c.get(f) for f in DISPLAY_CHECK_FIELDS))
+                for check_type, c in checks.items()
+            )),
+        )
+        latencies = {check_type: c.get("latency") for check_type, c in checks.items()}
+
+        with self._lock:
+            last = self._shown.get(host_id)
+            if (
+                last
+                and last[0] == shown
+                and now - last[2] < self.refresh
+                and not any(latency_moved(last[1].get(t), v) for t, v in latencies.items())
+            ):
+                return False
+
+            self._shown[host_id] = (shown, latencies, now)
+            return True
+
+
+displayed_hosts = DisplayedHosts()
+
+
+def flush_events(checks, alerts, incidents, hosts, displayed=displayed_hosts):
+    # [(tipo, dados)] de um flush do write buffer (depois do commit)
+    names = {c["host_id"]: c["host_name"] for c in checks}
+    latest = {}
+
+    for c in checks:
+        latest.setdefault(c["host_id"], {})[c["check_type"]] = {
+            "success": c["success"],
+            "latency": c["latency"],
+            "error": c["error"],
+            "timestamp": c["timestamp"],
+        }
+
+    items = []
+
+    for host_id, fields in hosts.items():
+        if not displayed.changed(host_id, fields, latest.get(host_id, {})):
+            continue
+
+        items.append(("host", {
+            "id": host_id,
+            "name": names.get(host_id),
+            **fields,
+            "checks": latest.get(host_id, {}),
+        }))
+
+    for a in alerts:
+        items.append(("alert", {**a, "host_name": names.get(a["host_id"])}))
+
+    for op in incidents:
+        items.append(("incident", op))
+
+    return items
+
+
+# Broadcaster em processo: um anel de eventos numerados e, por loop asyncio,
+# um Event que acorda todos os inscritos de uma vez (publicar custa o mesmo
+# com 1 ou 1000 clientes). Cada inscrito lê do anel a partir do seu cursor.
+class EventBroadcaster:
+
+    def __init__(self, size=EVENT_BUFFER):
+        self._events = deque(maxlen=size)
+        self._last_id = 0
+        self._lock = threading.Lock()
+        self._wakeups = {}
+
+    @property
+    def last_id(self):
+        return self._last_id
+
+    def resume_from(self, last_id):
+        # numeração vinda de fora começa no id atual (anel ainda vazio)
+        with self._lock:
+            if not self._events:
+                self._last_id = last_id
+
+    def publish(self, kind, data):
+        self.publish_many([(kind, data)])
+
+    def publish_many(self, items, ids=None):
+        # ids: numeração de fora (eventos repassados do banco, mesmos ids em
+        # todos os workers da API)
+        if not items:
+            return
+
+        with self._lock:
+            for i, (kind, data) in enumerate(items):
+                self._last_id = ids[i] if ids else self._last_id + 1
+                self._events.append((self._last_id, kind, data))
+
+            loops = list(self._wakeups)
+
+        for loop in loops:
+            try:
+                loop.call_soon_threadsafe(self._wake, loop)
+            except RuntimeError:
+                # loop já fechado
+                self._wakeups.pop(loop, None)
+
+    def _wake(self, loop):
+        event = self._wakeups.get(loop)
+        if event:
+            # troca por um novo: quem acordar espera o próximo
+            self._wakeups[loop] = asyncio.Event()
+            event.set()
+
+    def waiter(self):
+        loop = asyncio.get_running_loop()
+
+        with self._lock:
+            event = self._wakeups.get(loop)
+            if event is None:
+                event = self._wakeups[loop] = asyncio.Event()
+
+        return event
+
+    def since(self, cursor):
+        # (eventos depois do cursor, se o cursor ainda é válido)
+        with self._lock:
+            if cursor is None:
+                return [], True
+
+            # cursor de antes do anel ou de outra execução do servidor
+            oldest = self._events[0][0] if self._events else self._last_id + 1
+            if cursor > self._last_id or cursor < oldest - 1:
+                return [], False
+
+            return [e for e in self._events if e[0] > cursor], True
+
+    async def stream(self, cursor, is_disconnected):
+        # gerador SSE: id/event/data por evento, comentário de keepalive
+        yield f"retry: {RETRY_MS}\n\n"
+
+        if cursor is None:
+            cursor = self._last_id
+            yield f"id: {cursor}\nevent: hello\ndata: {{}}\n\n"
+
+        while not await is_disconnected():
+            wakeup = self.waiter()
+            events, valid = self.since(cursor)
+
+            if not valid:
+                # perdeu eventos: cliente recarrega tudo e segue do fim
+                cursor = self._last_id
+                yield f"id: {cursor}\nevent: reset\ndata: {{}}\n\n"
+                continue
+
+            for event_id, kind, data in events:
+                cursor = event_id
+                yield f"id: {event_id}\nevent: {kind}\ndata: {to_json(data)}\n\n"
+
+            if events:
+                continue
+
+            try:
+                await asyncio.wait_for(wakeup.wait(), KEEPALIVE_SECONDS)
+            except asyncio.TimeoutError:
+                yield ": keepalive\n\n"
+
+    def on_flush(self, checks, alerts, incidents, hosts):
+        self.publish_many(flush_events(checks, alerts, incidents, hosts))
+
+
+broadcaster = EventBroadcaster()
@@ -0,0 +1,258 @@
+import asyncio
+import heapq
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from Backend.cycles import CycleTimer, cycle_log
+from Backend.telemetry import cycle_overruns, cycle_seconds
+
+# Intervalo padrão de cada host (segundos), quando o host não define o seu
+DEFAULT_INTERVAL = 10
+
+# Adaptação: host com problema é checado mais vezes, host estável menos
+MIN_INTERVAL = 2
+MIN_FACTOR = 0.25
+MAX_FACTOR = 3
+SPEEDUP = 0.5
+BACKOFF = 1.5
+
+# Hosts vencendo dentro dessa janela saem juntos no mesmo lote
+BATCH_WINDOW = 0.5
+
+# De quanto em quanto tempo a lista de hosts ativos é relida do banco
+SYNC_INTERVAL = 30
+
+# Sem lotes chegando, o flush periódico ainda roda nesse intervalo
+FLUSH_INTERVAL = 1.0
+
+# Espalha o primeiro disparo de cada host pelo intervalo (razão áurea)
+GOLDEN = 0.6180339887
+
+DEGRADED_SEVERITIES = ("DEGRADED", "CRITICAL")
+
+
+def stagger_offset(host_id, interval):
+    return ((host_id * GOLDEN) % 1.0) * interval
+
+
+# Agenda por host: fila de prioridade (heap) com o próximo horário de cada um.
+# Roda num thread próprio com um loop asyncio persistente; o acesso ao banco
+# vai para um executor de um thread só, então só existe um escritor.
+class HostScheduler:
+
+    def __init__(self, engine, load_hosts, load_batch, save_batch, flush=None, sync_interval=SYNC_INTERVAL):
+        self.engine = engine
+        self.load_hosts = load_hosts
+        self.load_batch = load_batch
+        self.save_batch = save_batch
+        self.flush = flush
+        self.sync_interval = sync_interval
+
+        self._heap = []
+        self._due = {}
+        self._base = {}
+        self._interval = {}
+        self._tasks = set()
+
+        self._thread = None
+        self._loop = None
+        self._wakeup = None
+        self._stopping = False
+        self._db = ThreadPoolExecutor(max_workers=1, thread_name_prefix="host-scheduler-db")
+
+    def start(self):
+        if self._thread:
+            return
+
+        self._thread = threading.Thread(
+            target=lambda: asyncio.run(self._main()),
+            name="host-scheduler",
+            daemon=True
+        )
+        self._thread.start()
+
+    def stop(self, wait=None):
+        # wait: segundos esperando os lotes em andamento e o último flush
+        self._stopping = True
+
+        if self._loop:
+            self._loop.call_soon_threadsafe(self._wakeup.set)
+
+        if wait and self._thread:
+            self._thread.join(wait)
+
+    def queue_depth(self):
+        # hosts com horário vencido esperando sair num lote
+        now = time.monotonic()
+        return sum(1 for due in list(self._due.values()) if due <= now)
+
+    def scheduled(self):
+        return len(self._due)
+
+    def batches_running(self):
+        return len(self._tasks)
+
+    def _schedule(self, host_id, due):
+        self._due[host_id] = due
+        heapq.heappush(self._heap, (due, host_id))
+
+    def _pop_due(self, limit):
+        due = {}
+
+        while self._heap and self._heap[0][0] <= limit:
+            when, host_id = heapq.heappop(self._heap)
+
+            # entrada velha (host removido ou reagendado)
+            if self._due.get(host_id) != when:
+                continue
+
+            del self._due[host_id]
+            due[host_id] = when
+
+        return due
+
+    async def _sync_hosts(self):
+        try:
+            intervals = await self._loop.run_in_executor(self._db, self.load_hosts)
+        except Exception as e:
+            print(f"[SCHEDULER ERROR] {e}")
+            return
+
+        now = time.monotonic()
+
+        for host_id in list(self._base):
+            if host_id not in intervals:
+                del self._base[host_id]
+                del self._interval[host_id]
+                self._due.pop(host_id, None)
+
+        for host_id, base in intervals.items():
+            # intervalo gravado antes da validação (0 ou negativo) não trava a agenda
+            base = max(MIN_INTERVAL, base or DEFAULT_INTERVAL)
+
+            if host_id not in self._base:
+                self._base[host_id] = base
+                self._interval[host_id] = base
+                self._schedule(host_id, now + stagger_offset(host_id, base))
+
+            elif self._base[host_id] != base:
+                self._base[host_id] = base
+                self._interval[host_id] = base
+
+    def _adapt(self, host_id, state):
+        base = self._base[host_id]
+        current = self._interval[host_id]
+
+        if state is None:
+            return base
+
+        status, severity = state
+
+        if status != "UP" or severity in DEGRADED_SEVERITIES:
+            floor = min(base, max(MIN_INTERVAL, base * MIN_FACTOR))
+            interval = max(floor, current * SPEEDUP)
+
+        elif severity == "HEALTHY":
+            interval = min(base * MAX_FACTOR, current * BACKOFF)
+
+        else:
+            interval = base
+
+        return max(MIN_INTERVAL, interval)
+
+    def _reschedule(self, due, outcome):
+        now = time.monotonic()
+
+        for host_id, when in due.items():
+            # host removido enquanto estava sendo checado
+            if host_id not in self._base:
+                continue
+
+            interval = self._adapt(host_id, outcome.get(host_id))
+            self._interval[host_id] = interval
+
+            # o ciclo demorou mais que o intervalo do host
+            if when + interval < now:
+                cycle_overruns.inc()
+
+            # mantém a fase do host; se atrasou, roda já (sem pular execução)
+            self._schedule(host_id, max(when + interval, now))
+
+    async def _run_batch(self, due):
+        outcome = {}
+        targets = probes = None
+        cycle = CycleTimer("scheduler")
+
+        try:
+            with cycle.phase("load"):
+                targets = await self._loop.run_in_executor(
+                    self._db, self.load_batch, list(due)
+                )
+
+            with cycle.phase("probe"):
+                probes = await self.engine.probe_hosts(targets)
+
+            with cycle.phase("save"):
+                outcome = await self._loop.run_in_executor(
+                    self._db, self.save_batch, probes
+                )
+
+        except Exception as e:
+            print(f"[SCHEDULER ERROR] {e}")
+
+        finally:
+            summary = cycle.finish(targets, probes)
+            cycle_log.record(summary)
+            cycle_seconds.observe(summary["ms"] / 1000, source="scheduler")
+
+            self._reschedule(due, outcome)
+            self._wakeup.set()
+
+    async def _flush(self):
+        try:
+            await self._loop.run_in_executor(self._db, self.flush)
+        except Exception as e:
+            print(f"[SCHEDULER ERROR] {e}")
+
+    async def _main(self):
+        self._loop = asyncio.get_running_loop()
+        self._wakeup = asyncio.Event()
+        next_sync = 0
+        next_flush = 0
+
+        while not self._stopping:
+            now = time.monotonic()
+
+            if now >= next_sync:
+                await self._sync_hosts()
+                next_sync = now + self.sync_interval
+
+            if self.flush and now >= next_flush:
+                await self._flush()
+                next_flush = now + FLUSH_INTERVAL
+
+            due = self._pop_due(now + BATCH_WINDOW)
+
+            if due:
+                task = asyncio.create_task(self._run_batch(due))
+                self._tasks.add(task)
+                task.add_done_callback(self._tasks.discard)
+
+            wake = next_sync
+            if self.flush:
+                wake = min(wake, next_flush)
+            if self._heap:
+                wake = min(wake, self._heap[0][0])
+
+            self._wakeup.clear()
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), max(0.05, wake - time.monotonic()))
+            except asyncio.TimeoutError:
+                pass
+
+        if self._tasks:
+            await asyncio.gather(*self._tasks, return_exceptions=True)
+
+        # grava o que ficou no buffer antes de sair
+        if self.flush:
+            await self._flush()
@@ -0,0 +1,281 @@
+import asyncio
+import ipaddress
+import os
+import socket
+import struct
+import time
+
+# Tipos ICMP de echo (request, reply) por família
+ECHO_TYPES = {
+    socket.AF_INET: (8, 0),
+    socket.AF_INET6: (128, 129),
+}
+
+# Espaço entre as rodadas de probes de um mesmo alvo
+PING_INTERVAL = 0.2
+
+
+def icmp_checksum(data: bytes) -> int:
+    if len(data) % 2:
+        data += b"\0"
+
+    total = sum(struct.unpack(f"!{len(data) // 2}H", data))
+    total = (total >> 16) + (total & 0xFFFF)
+    total += total >> 16
+
+    return ~total & 0xFFFF
+
+
+def open_icmp_socket(family):
+    proto = socket.IPPROTO_ICMP if family == socket.AF_INET else socket.IPPROTO_ICMPV6
+
+    # Linux: socket ICMP datagrama não precisa de root (net.ipv4.ping_group_range)
+    try:
+        sock = socket.socket(family, socket.SOCK_DGRAM, proto)
+        raw = False
+    except (PermissionError, OSError):
+        # fallback: socket raw (root ou CAP_NET_RAW)
+        sock = socket.socket(family, socket.SOCK_RAW, proto)
+        raw = True
+
+    sock.setblocking(False)
+    return sock, raw
+
+
+def normalize_ip(ip: str) -> str:
+    # chave para casar a resposta (recvfrom devolve o endereço sem o escopo)
+    return ipaddress.ip_address(ip.split("%")[0]).compressed
+
+
+def ip_family(ip: str):
+    return socket.AF_INET6 if ":" in ip else socket.AF_INET
+
+
+def icmp_target(ip: str):
+    # (família, chave, sockaddr do sendto). IPv6 link-local ("fe80::1%eth0")
+    # mantém a interface: (endereço, 0, 0, scope_id)
+    key = normalize_ip(ip)
+
+    if ip_family(key) == socket.AF_INET:
+        return socket.AF_INET, key, (key, 0)
+
+    if "%" in ip:
+        # interface desconhecida: socket.gaierror (OSError)
+        return socket.AF_INET6, key, socket.getaddrinfo(ip, 0, socket.AF_INET6, socket.SOCK_DGRAM)[0][4]
+
+    return socket.AF_INET6, key, (key, 0, 0, 0)
+
+
+# Pinger nativo: manda echo requests para vários alvos por um único socket
+# por família (IPv4/IPv6) e casa as respostas por (ip, sequência).
+# Preso ao primeiro loop asyncio que o usa: _pending, _seq e o add_reader não
+# têm lock, então cada loop (thread) tem o seu pinger.
+class IcmpPinger:
+
+    def __init__(self, interval=PING_INTERVAL):
+        self.interval = interval
+        self.ident = os.getpid() & 0xFFFF
+
+        self._sockets = {}
+        self._loop = None
+        self._seq = 0
+
+        # (ip, seq) -> (send_time, estado do alvo)
+        self._pending = {}
+
+    def _socket(self, family):
+        loop = asyncio.get_running_loop()
+
+        if self._loop is None:
+            self._loop = loop
+        elif self._loop is not loop:
+            raise RuntimeError("IcmpPinger usado fora do loop asyncio em que começou")
+
+        if family not in self._sockets:
+            sock, raw = self._sockets[family] = open_icmp_socket(family)
+            loop.add_reader(sock.fileno(), self._on_readable, family)
+
+        return self._sockets[family]
+
+    def _next_seq(self):
+        self._seq = (self._seq + 1) & 0xFFFF
+        return self._seq
+
+    def _on_readable(self, family):
+        sock, raw = self._sockets[family]
+        _, reply_type = ECHO_TYPES[family]
+
+        while True:
+            try:
+                data, addr = sock.recvfrom(2048)
+            except (BlockingIOError, InterruptedError):
+                return
+            except OSError:
+                return
+
+            received = time.perf_counter()
+
+            # socket raw IPv4 entrega o cabeçalho IP junto
+            if raw and family == socket.AF_INET:
+                data = data[(data[0] & 0x0F) * 4:]
+
+            if len(data) < 8:
+                continue
+
+            icmp_type, _, _, ident, seq = struct.unpack("!BBHHH", data[:8])
+
+            if icmp_type != reply_type:
+                continue
+
+            # no socket datagrama o kernel troca o id e já filtra as respostas
+            if raw and ident != self.ident:
+                continue
+
+            entry = self._pending.pop((normalize_ip(addr[0]), seq), None)
+            if entry is None:
+                continue
+
+            sent, state, probe = entry
+            state["rtts"][probe] = (received - sent) * 1000
+            state["waiting"] -= 1
+
+            if state["waiting"] == 0:
+                state["done"].set()
+
+    def _send(self, sock, family, ip, addr, state, probe):
+        request_type, _ = ECHO_TYPES[family]
+        seq = self._next_seq()
+
+        payload = struct.pack("!d", time.time())
+        header = struct.pack("!BBHHH", request_type, 0, 0, self.ident, seq)
+        checksum = icmp_checksum(header + payload)
+        packet = struct.pack("!BBHHH", request_type, 0, checksum, self.ident, seq) + payload
+
+        self._pending[(ip, seq)] = (time.perf_counter(), state, probe)
+
+        try:
+            sock.sendto(packet, addr)
+        except OSError as e:
+            self._pending.pop((ip, seq), None)
+            state["error"] = str(e)
+            state["waiting"] -= 1
+
+            if state["waiting"] == 0:
+                state["done"].set()
+
+        return seq
+
+    async def ping_many_async(self, ips, count: int = 3, timeout: int = 5, max_ms=5000):
+        targets = {}
+
+        for ip in dict.fromkeys(ips):
+            try:
+                family, key, addr = icmp_target(ip)
+            except (ValueError, OSError):
+                targets[ip] = None
+                continue
+
+            targets[ip] = {
+                "ip": key,
+                "addr": addr,
+                "family": family,
+                "rtts": {},
+                "seqs": [],
+                "error": None,
+                "waiting": count,
+                "done": asyncio.Event(),
+            }
+
+        live = [s for s in targets.values() if s]
+
+        try:
+            for probe in range(count):
+                if probe:
+                    await asyncio.sleep(self.interval)
+
+                for state in live:
+                    sock, _ = self._socket(state["family"])
+                    state["seqs"].append(
+                        self._send(sock, state["family"], state["ip"], state["addr"], state, probe)
+                    )
+
+            # espera as respostas até o timeout contado a partir do último envio
+            await asyncio.wait_for(
+                asyncio.gather(*(s["done"].wait() for s in live)),
+                timeout
+            )
+        except asyncio.TimeoutError:
+            pass
+        finally:
+            for state in live:
+                for seq in state["seqs"]:
+                    self._pending.pop((state["ip"], seq), None)
+
+        return {ip: self._result(state, max_ms) for ip, state in targets.items()}
+
+    async def ping(self, ip: str, count: int = 3, timeout: int = 5, max_ms=5000):
+        results = await self.ping_many_async([ip], count, timeout, max_ms)
+        return results[ip]
+
+    def close(self):
+        for sock, _ in self._sockets.values():
+            if self._loop and not self._loop.is_closed():
+                self._loop.remove_reader(sock.fileno())
+            sock.close()
+
+        self._sockets.clear()
+
+    def _result(self, state, max_ms):
+        if state is None:
+            return {
+                "success": False,
+                "error": "IP inválido",
+                "latency": None
+            }
+
+        if not state["rtts"]:
+            return {
+                "success": False,
+                "error": state["error"] or "Host inalcançável",
+                "latency": None
+            }
+
+        # mesmo critério do ping do sistema: RTT da primeira resposta
+        latency = round(state["rtts"][min(state["rtts"])], 2)
+
+        # respondeu mas lento demais
+        if latency > max_ms:
+            return {
+                "success": True,
+                "error": "high latency",
+                "latency": latency
+            }
+
+        return {
+            "success": True,
+            "error": None,
+            "latency": latency
+        }
+
+
+def icmp_available(family=socket.AF_INET) -> bool:
+    # por família: ICMPv6 pode faltar (sem IPv6, outra permissão) com ICMP ok
+    try:
+        sock, _ = open_icmp_socket(family)
+        sock.close()
+        return True
+    except OSError:
+        return False
+
+
+def ping_many(ips, count: int = 3, timeout: int = 5, max_ms=5000):
+    # API em lote síncrona: uma varredura, todos os resultados de uma vez
+    pinger = IcmpPinger()
+
+    async def sweep():
+        try:
+            return await pinger.ping_many_async(ips, count, timeout, max_ms)
+        finally:
+            pinger.close()
+
+    return asyncio.run(sweep())
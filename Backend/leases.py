@@ -0,0 +1,96 @@
+import os
+import socket
+import time
+from datetime import datetime, timedelta
+from sqlalchemy import delete, insert, or_, select, update
+from Backend.database import engine as db_engine, read_engine as db_read_engine
+from Backend.models import Lease
+
+# Leases com prazo no banco: um nome, um dono. O dono renova antes de vencer;
+# se o processo morre, o lease vence e outro processo assume.
+
+# Lease do coletor ativo (Backend/collector.py)
+COLLECTOR_LEASE = "collector"
+
+
+def process_owner(pid=None):
+    return f"{socket.gethostname()}:{pid or os.getpid()}"
+
+
+def acquire(name, owner, ttl, engine=db_engine):
+    # pega ou renova; False se outro dono ainda está dentro do prazo
+    now = datetime.utcnow()
+
+    with engine.begin() as conn:
+        conn.execute(
+            insert(Lease).prefix_with("OR IGNORE").values(name=name, owner=None, expires_time=now)
+        )
+
+        taken = conn.execute(
+            update(Lease)
+            .where(
+                Lease.name == name,
+                or_(Lease.owner == owner, Lease.owner.is_(None), Lease.expires_time < now)
+            )
+            .values(owner=owner, expires_time=now + timedelta(seconds=ttl), renewed_time=now)
+        ).rowcount
+
+    return taken == 1
+
+
+def lease_expiring(renewed_at, ttl, interval):
+    # sem renovar desde renewed_at (time.monotonic), o lease vence antes da
+    # próxima tentativa: outro processo pode assumir e este tem que parar
+    return time.monotonic() - renewed_at + interval >= ttl
+
+
+def release(name, owner, engine=db_engine):
+    with engine.begin() as conn:
+        conn.execute(
+            update(Lease)
+            .where(Lease.name == name, Lease.owner == owner)
+            .values(owner=None, expires_time=datetime.utcnow())
+        )
+
+
+def holders(prefix, engine=db_read_engine):
+    # {nome: dono} dos leases válidos que começam com o prefixo
+    now = datetime.utcnow()
+
+    with engine.connect() as conn:
+        rows = conn.execute(
+            select(Lease.name, Lease.owner).where(
+                Lease.name.like(f"{prefix}%"),
+                Lease.owner.isnot(None),
+                Lease.expires_time >= now,
+            )
+        ).all()
+
+    return {name: owner for name, owner in rows}
+
+
+def prune(prefix, engine=db_engine):
+    # apaga leases soltos ou vencidos (nomes de processos que não voltam)
+    with engine.begin() as conn:
+        conn.execute(
+            delete(Lease).where(
+                Lease.name.like(f"{prefix}%"),
+                or_(Lease.owner.is_(None), Lease.expires_time < datetime.utcnow())
+            )
+        )
+
+
+def lease_info(name, engine=db_read_engine):
+    with engine.connect() as conn:
+        row = conn.execute(select(Lease).where(Lease.name == name)).first()
+
+    if not row:
+        return None
+
+    return {
+        "name": row.name,
+        "owner": row.owner,
+        "expires_time": row.expires_time,
+        "renewed_time": row.renewed_time,
+        "active": bool(row.owner) and row.expires_time >= datetime.utcnow(),
+    }
@@ -1,11 +1,13 @@
-from fastapi import FastAPI
+import time
+from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
-from Backend.database import engine
-from Backend.models import Base
+from Backend.bridge import event_relay
+from Backend.database import async_read_engine, engine
+from Backend.migrations import migrate
 from Backend.routes.hosts import router
-from Backend.scheduler import start_scheduler
+from Backend.telemetry import request_seconds
 
-Base.metadata.create_all(bind=engine)
+migrate(engine)
 
 
 app = FastAPI()
@@ -17,6 +19,34 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+@app.middleware("http")
+async def request_timing(request: Request, call_next):
+    # latência por rota (caminho com parâmetros, não a URL concreta)
+    started = time.perf_counter()
+    status = 500
+
+    try:
+        response = await call_next(request)
+        status = response.status_code
+        return response
+    finally:
+        route = request.scope.get("route")
+        request_seconds.observe(
+            time.perf_counter() - started,
+            method=request.method,
+            route=route.path if route else "unmatched",
+            status=status
+        )
+
+# A API só lê: checagens e gravações ficam com o coletor
+# (python -m Backend.collector). Eventos do SSE chegam pelo banco.
 @app.on_event("startup")
 def startup_event():
-    start_scheduler()
\ No newline at end of file
+    event_relay.start()
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    event_relay.stop()
+
+    # conexões do aiosqlite têm thread próprio
+    await async_read_engine.dispose()
\ No newline at end of file
@@ -1,4 +1,5 @@
 from datetime import datetime, timedelta
+from sqlalchemy import and_, case, func, or_
 from Backend.models import CheckResult, Incident
 
 def compute_health(ping_result, tcp_result, http_result):
@@ -352,32 +353,223 @@ def total_downtime(db, host_name):
 
     return sum(i.duration_seconds for i in incidents)
 
+# Resumo de incidentes de vários hosts com número fixo de consultas
+# (uma agregada por host_name + uma com os incidentes dos últimos 10 min)
+def host_summaries(db, host_names, now=None):
+    now = now or datetime.utcnow()
+    since = now - timedelta(minutes=10)
+
+    summaries = {
+        name: {
+            "mttr": 0,
+            "total_incidents": 0,
+            "total_downtime": 0,
+            "availability_10m": 100.0,
+        }
+        for name in host_names
+    }
+
+    closed = and_(
+        Incident.status == "CLOSED",
+        Incident.duration_seconds != None
+    )
+
+    rows = (
+        db.query(
+            Incident.host_name,
+            func.count(Incident.id),
+            func.count(case((closed, 1))),
+            func.sum(case((closed, Incident.duration_seconds), else_=0)),
+        )
+        .group_by(Incident.host_name)
+        .all()
+    )
+
+    for name, total, closed_count, downtime in rows:
+        summary = summaries.get(name)
+        if summary is None:
+            continue
+
+        summary["total_incidents"] = total
+        summary["total_downtime"] = downtime or 0
+        summary["mttr"] = downtime / closed_count if closed_count else 0
+
+    # só incidentes que encostam na janela de 10 min
+    recent = (
+        db.query(Incident.host_name, Incident.started_time, Incident.ended_time)
+        .filter(
+            Incident.started_time <= now,
+            or_(Incident.ended_time == None, Incident.ended_time > since)
+        )
+        .all()
+    )
+
+    intervals = {}
+    for name, start, end in recent:
+        intervals.setdefault(name, []).append((start, end or now))
+
+    for name, spans in intervals.items():
+        if name in summaries:
+            availability = availability_buckets(merge_intervals(spans), since, now, 600)[0][1]
+            summaries[name]["availability_10m"] = round(availability, 4)
+
+    return summaries
+
 def availability_last_10_min(db, host_name):
     now = datetime.utcnow()
     since = now - timedelta(minutes=10)
 
-    incidents = (
+    intervals = incident_intervals(db, host_name, since, now)
+    availability = availability_buckets(intervals, since, now, 600)[0][1]
+
+    return round(availability, 4)
+
+# =====================
+# DISPONIBILIDADE (sweep-line)
+# =====================
+# Os incidentes que encostam no intervalo são lidos uma vez, viram uma união
+# de intervalos ordenada e os baldes são percorridos junto com ela numa
+# passada só (incidentes sobrepostos não contam duas vezes)
+
+DURATION_UNITS = {
+    "m": timedelta(minutes=1),
+    "h": timedelta(hours=1),
+    "d": timedelta(days=1),
+}
+
+def parse_duration(value):
+    # "15m", "2h", "7d" -> timedelta
+    value = value.strip().lower()
+    unit = DURATION_UNITS.get(value[-1:])
+
+    if unit is None or not value[:-1].isdigit() or int(value[:-1]) <= 0:
+        raise ValueError(f"duração inválida: {value} (use m, h ou d)")
+
+    return int(value[:-1]) * unit
+
+def overlapping_incidents(db, host_name, since, until):
+    return (
         db.query(Incident)
         .filter(
             Incident.host_name == host_name,
-            Incident.started_time <= now
+            Incident.started_time <= until,
+            or_(Incident.ended_time == None, Incident.ended_time > since)
         )
+        .order_by(Incident.started_time)
         .all()
     )
 
-    downtime = 0
+def merge_intervals(intervals):
+    merged = []
 
-    for incident in incidents:
-        start = incident.started_time
-        end = incident.ended_time or now
-
-        overlap_start = max(start, since)
-        overlap_end = min(end, now)
+    for start, end in sorted(intervals):
+        if merged and start <= merged[-1][1]:
+            merged[-1][1] = max(merged[-1][1], end)
+        else:
+            merged.append([start, end])
 
-        if overlap_end > overlap_start:
-            downtime += (overlap_end - overlap_start).total_seconds()
+    return merged
 
-    total_period = 600
-    availability = ((total_period - downtime) / total_period) * 100
+def incident_intervals(db, host_name, since, until):
+    # incidente aberto conta até `until`
+    return merge_intervals(
+        (i.started_time, i.ended_time or until)
+        for i in overlapping_incidents(db, host_name, since, until)
+    )
 
-    return round(max(0, availability), 4)
+def availability_buckets(intervals, since, until, bucket_seconds):
+    # [(início do balde, % disponível)] de since até until; intervals já unidos
+    step = timedelta(seconds=bucket_seconds)
+    out = []
+    k = 0
+
+    start = since
+    while start < until:
+        end = min(start + step, until)
+        down = 0.0
+
+        # pula o que já terminou antes desse balde
+        while k < len(intervals) and intervals[k][1] <= start:
+            k += 1
+
+        j = k
+        while j < len(intervals) and intervals[j][0] < end:
+            overlap = (min(intervals[j][1], end) - max(intervals[j][0], start)).total_seconds()
+            down += max(0.0, overlap)
+            j += 1
+
+        length = (end - start).total_seconds()
+        out.append((start, max(0.0, (length - down) / length * 100)))
+        start = end
+
+    return out
+
+# SLA em janela deslizante de `window` intervalos, numa passada só:
+# soma corrente de checagens e sucessos, tirando o que sai da janela
+def sliding_sla(buckets, window, step):
+    # buckets: [(início, count, successes)] em ordem de tempo, de tamanho step;
+    # janela em tempo (timedelta): baldes sem checagem não contam como intervalo
+    out = []
+    total = 0
+    ok = 0
+    oldest = 0
+
+    for t, count, successes in buckets:
+        total += count
+        ok += successes
+
+        # sai quem começou antes de (fim deste balde - janela)
+        while buckets[oldest][0] < t + step - window:
+            _, old_count, old_ok = buckets[oldest]
+            total -= old_count
+            ok -= old_ok
+            oldest += 1
+
+        # só depois de uma janela inteira desde o primeiro balde
+        if t + step - buckets[0][0] >= window and total:
+            out.append({"time": t, "sla": round(ok / total * 100, 2)})
+
+    return out
+
+# Largest-Triangle-Three-Buckets: reduz a série para `threshold` pontos
+# mantendo a forma (picos e vales) do gráfico
+def lttb(points, threshold, x=lambda p: p["time"].timestamp(), y=lambda p: p["sla"]):
+    n = len(points)
+
+    if threshold >= n or threshold < 3:
+        return points
+
+    sampled = [points[0]]
+    every = (n - 2) / (threshold - 2)
+    a = 0
+
+    for i in range(threshold - 2):
+        start = int(i * every) + 1
+        end = int((i + 1) * every) + 1
+
+        # média do próximo balde (terceiro vértice do triângulo)
+        next_start = end
+        next_end = min(int((i + 2) * every) + 1, n)
+        if next_start >= next_end:
+            next_start, next_end = n - 1, n
+
+        span = next_end - next_start
+        avg_x = sum(x(p) for p in points[next_start:next_end]) / span
+        avg_y = sum(y(p) for p in points[next_start:next_end]) / span
+
+        ax, ay = x(points[a]), y(points[a])
+        best, best_area = start, -1.0
+
+        for j in range(start, end):
+            area = abs(
+                (ax - avg_x) * (y(points[j]) - ay) -
+                (ax - x(points[j])) * (avg_y - ay)
+            )
+            if area > best_area:
+                best, best_area = j, area
+
+        sampled.append(points[best])
+        a = best
+
+    sampled.append(points[-1])
+    return sampled
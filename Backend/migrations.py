@@ -0,0 +1,173 @@
+import time
+from datetime import datetime
+from sqlalchemy import inspect, text
+from sqlalchemy.exc import IntegrityError, OperationalError
+from Backend.models import Base
+from Backend.rollups import backfill
+
+# Migrações versionadas do banco.
+# create_all só cria tabelas que não existem; tudo que muda tabela existente
+# (coluna, índice) entra aqui como uma nova versão. A versão aplicada fica na
+# tabela schema_version. Cada migração precisa funcionar tanto num banco
+# antigo quanto num banco recém criado pelo create_all (IF NOT EXISTS etc).
+
+
+def add_column(conn, table, column, column_type):
+    existing = {c["name"] for c in inspect(conn).get_columns(table)}
+
+    if column not in existing:
+        conn.execute(text(f"ALTER TABLE {table} ADD COLUMN {column} {column_type}"))
+
+
+def create_index(conn, name, table, columns):
+    conn.execute(text(
+        f"CREATE INDEX IF NOT EXISTS {name} ON {table} ({', '.join(columns)})"
+    ))
+
+
+# =====================
+# MIGRAÇÕES
+# =====================
+def m001_interval_and_http_timings(conn):
+    add_column(conn, "hosts", "check_interval", "INTEGER")
+
+    for column in ("dns_ms", "connect_ms", "tls_ms", "ttfb_ms"):
+        add_column(conn, "checks", column, "FLOAT")
+
+
+# Índices compostos das consultas quentes (mesmos nomes de models.py)
+INDEXES = [
+    # métricas, sla_chart, heatmap, trim_history: host + tipo ordenado por tempo
+    # (success e latency no índice: a consulta nem toca na tabela)
+    ("ix_checks_host_type_time", "checks", ("host_id", "check_type", "timestamp", "success", "latency")),
+    # host_history: todos os tipos do host ordenados por tempo
+    ("ix_checks_host_time", "checks", ("host_id", "timestamp")),
+    # consecutive_failures filtra por nome
+    ("ix_checks_hostname_time", "checks", ("host_name", "timestamp")),
+    # incidente aberto do host, histórico e disponibilidade
+    ("ix_incidents_host_status", "incidents", ("host_name", "status")),
+    ("ix_incidents_host_started", "incidents", ("host_name", "started_time")),
+    ("ix_incidents_started", "incidents", ("started_time",)),
+    # lista de alertas mais recentes
+    ("ix_alerts_timestamp", "alerts", ("timestamp",)),
+    ("ix_alerts_host_time", "alerts", ("host_id", "timestamp")),
+]
+
+
+def m002_composite_indexes(conn):
+    for name, table, columns in INDEXES:
+        create_index(conn, name, table, columns)
+
+    # estatísticas para o planejador escolher os índices novos
+    conn.execute(text("ANALYZE"))
+
+
+def m003_checks_type_time_index(conn):
+    # retenção por idade (Backend/retention.py) varre tipo + tempo
+    create_index(conn, "ix_checks_type_time", "checks", ("check_type", "timestamp"))
+
+
+def m004_incremental_vacuum(conn):
+    # auto_vacuum só muda num banco existente com VACUUM (reescreve o arquivo);
+    # depois disso a retenção devolve espaço com incremental_vacuum
+    if conn.execute(text("PRAGMA auto_vacuum")).scalar() != 2:
+        conn.execute(text("PRAGMA auto_vacuum = INCREMENTAL"))
+        conn.execute(text("VACUUM"))
+
+
+def m005_rollups(conn):
+    # tabelas checks_1m / checks_1h vêm do create_all; preenche com o histórico
+    backfill(conn)
+
+
+def m006_host_version(conn):
+    add_column(conn, "hosts", "version", "INTEGER DEFAULT 0")
+    create_index(conn, "ix_hosts_version", "hosts", ("version",))
+
+
+def m007_version_counter(conn):
+    # contador das versões dos hosts passa para o banco (API e coletor
+    # são processos diferentes); continua de onde os hosts estão
+    conn.execute(text(
+        "INSERT OR IGNORE INTO version_counters (name, value) "
+        "SELECT 'hosts', COALESCE(MAX(version), 0) FROM hosts"
+    ))
+
+
+MIGRATIONS = [
+    (1, "check_interval e tempos do check HTTP", m001_interval_and_http_timings),
+    (2, "índices compostos em checks, incidents e alerts", m002_composite_indexes),
+    (3, "índice de checks por tipo e tempo", m003_checks_type_time_index),
+    (4, "auto_vacuum incremental", m004_incremental_vacuum),
+    (5, "rollups por minuto e por hora", m005_rollups),
+    (6, "versão de estado dos hosts", m006_host_version),
+    (7, "contador de versões no banco", m007_version_counter),
+]
+
+# VACUUM não roda dentro de transação
+OUTSIDE_TRANSACTION = {4}
+
+
+# =====================
+# EXECUÇÃO
+# =====================
+def current_version(conn):
+    conn.execute(text(
+        "CREATE TABLE IF NOT EXISTS schema_version ("
+        "version INTEGER PRIMARY KEY, "
+        "description VARCHAR, "
+        "applied_time DATETIME)"
+    ))
+
+    return conn.execute(text("SELECT MAX(version) FROM schema_version")).scalar() or 0
+
+
+# API e coletor sobem juntos e os dois migram: quem perde a corrida
+# (tabela já criada, versão já gravada, banco ocupado) tenta de novo e
+# encontra o trabalho feito. As migrações são idempotentes.
+MIGRATE_ATTEMPTS = 5
+MIGRATE_RETRY = 1.0
+
+
+def migrate(engine, target=None):
+    for attempt in range(MIGRATE_ATTEMPTS):
+        try:
+            return _migrate(engine, target)
+        except (IntegrityError, OperationalError) as e:
+            if attempt == MIGRATE_ATTEMPTS - 1:
+                raise
+
+            print(f"[MIGRATION] concorrência, tentando de novo: {e.orig}")
+            time.sleep(MIGRATE_RETRY)
+
+
+def _migrate(engine, target=None):
+    # cria tabelas novas e aplica as versões pendentes, uma transação por versão
+    Base.metadata.create_all(bind=engine)
+
+    with engine.begin() as conn:
+        version = current_version(conn)
+
+    applied = []
+
+    for number, description, apply in MIGRATIONS:
+        if number <= version or (target is not None and number > target):
+            continue
+
+        if number in OUTSIDE_TRANSACTION:
+            with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+                apply(conn)
+
+        with engine.begin() as conn:
+            if number not in OUTSIDE_TRANSACTION:
+                apply(conn)
+
+            conn.execute(
+                text("INSERT INTO schema_version (version, description, applied_time) VALUES (:v, :d, :t)"),
+                {"v": number, "d": description, "t": datetime.utcnow()}
+            )
+
+        print(f"[MIGRATION] {number}: {description}")
+        applied.append(number)
+
+    return applied
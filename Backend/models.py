@@ -1,4 +1,4 @@
-from sqlalchemy import Boolean, Column, Float, Integer, String, DateTime, ForeignKey
+from sqlalchemy import Boolean, Column, Float, Index, Integer, String, DateTime, ForeignKey
 from sqlalchemy.orm import relationship
 from datetime import datetime
 from Backend.database import Base
@@ -12,6 +12,10 @@ class Host(Base):
     address = Column(String)
     port = Column(Integer, nullable=True)
     http_url = Column(String, nullable=True)
+    check_interval = Column(Integer, nullable=True)
+
+    # versão da última mudança de estado (Backend/versions.py)
+    version = Column(Integer, default=0, index=True)
 
     active = Column(Boolean, default=True)
     active_time = Column(DateTime, nullable=True)
@@ -68,10 +72,53 @@ class CheckResult(Base):
     latency = Column(Float, nullable=True)
     error = Column(String, nullable=True)
 
+    # quebra de tempo do check HTTP (latency = total)
+    dns_ms = Column(Float, nullable=True)
+    connect_ms = Column(Float, nullable=True)
+    tls_ms = Column(Float, nullable=True)
+    ttfb_ms = Column(Float, nullable=True)
+
     timestamp = Column(DateTime, default=datetime.utcnow)
 
     host = relationship("Host", back_populates="checks")
 
+    # criados em bancos existentes pela migração 2 (Backend/migrations.py)
+    __table_args__ = (
+        Index("ix_checks_host_type_time", "host_id", "check_type", "timestamp", "success", "latency"),
+        Index("ix_checks_host_time", "host_id", "timestamp"),
+        Index("ix_checks_hostname_time", "host_name", "timestamp"),
+        Index("ix_checks_type_time", "check_type", "timestamp"),
+    )
+
+# Agregados dos checks por host/tipo/intervalo (Backend/rollups.py).
+# lat_hist guarda a contagem de latências por faixa (ROLLUP_BOUNDS) para o
+# p95 poder ser recalculado ao juntar amostras novas no mesmo intervalo.
+class RollupColumns:
+    host_id = Column(Integer, primary_key=True)
+    check_type = Column(String, primary_key=True)
+    bucket = Column(DateTime, primary_key=True)
+
+    count = Column(Integer, default=0)
+    successes = Column(Integer, default=0)
+
+    lat_count = Column(Integer, default=0)
+    lat_sum = Column(Float, default=0)
+    lat_min = Column(Float, nullable=True)
+    lat_max = Column(Float, nullable=True)
+    lat_p95 = Column(Float, nullable=True)
+    lat_hist = Column(String, nullable=True)
+
+class CheckRollupMinute(RollupColumns, Base):
+    __tablename__ = "checks_1m"
+
+    # retenção apaga por tempo
+    __table_args__ = (Index("ix_checks_1m_bucket", "bucket"),)
+
+class CheckRollupHour(RollupColumns, Base):
+    __tablename__ = "checks_1h"
+
+    __table_args__ = (Index("ix_checks_1h_bucket", "bucket"),)
+
 class Alert(Base):
     __tablename__ = "alerts"
 
@@ -84,6 +131,11 @@ class Alert(Base):
 
     timestamp = Column(DateTime, default=datetime.utcnow)
 
+    __table_args__ = (
+        Index("ix_alerts_timestamp", "timestamp"),
+        Index("ix_alerts_host_time", "host_id", "timestamp"),
+    )
+
 class Incident(Base):
     __tablename__ = "incidents"
 
@@ -95,6 +147,12 @@ class Incident(Base):
     ended_time = Column(DateTime, nullable=True)
     duration_seconds = Column(Integer, nullable=True)
 
+    __table_args__ = (
+        Index("ix_incidents_host_status", "host_name", "status"),
+        Index("ix_incidents_host_started", "host_name", "started_time"),
+        Index("ix_incidents_started", "started_time"),
+    )
+
 class DNSCache(Base):
     __tablename__ = "dns_cache"
 
@@ -113,4 +171,42 @@ class User(Base):
     id = Column(Integer, primary_key=True)
     username = Column(String, unique=True, index=True)
     password_hash = Column(String)
-    must_change_password = Column(Boolean, default=True)
\ No newline at end of file
+    must_change_password = Column(Boolean, default=True)
+
+# =====================
+# COLETOR (Backend/collector.py)
+# =====================
+
+# Lease com prazo: quem tem o nome e não deixou vencer é o dono
+class Lease(Base):
+    __tablename__ = "leases"
+
+    name = Column(String, primary_key=True)
+    owner = Column(String, nullable=True)
+    expires_time = Column(DateTime)
+    renewed_time = Column(DateTime, nullable=True)
+
+# Estado publicado pelo coletor para a API (métricas, ciclos, retenção, DNS)
+class CollectorStatus(Base):
+    __tablename__ = "collector_status"
+
+    name = Column(String, primary_key=True)
+    owner = Column(String)
+    payload = Column(String)
+    updated_time = Column(DateTime)
+
+# Eventos do SSE gravados pelo coletor e repassados pelos workers da API
+class Event(Base):
+    __tablename__ = "events"
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    kind = Column(String)
+    data = Column(String)
+    created_time = Column(DateTime, default=datetime.utcnow)
+
+# Contadores compartilhados entre processos (versão dos hosts)
+class VersionCounter(Base):
+    __tablename__ = "version_counters"
+
+    name = Column(String, primary_key=True)
+    value = Column(Integer, default=0)
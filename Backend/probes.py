@@ -0,0 +1,261 @@
+import asyncio
+import math
+import random
+import threading
+from functools import lru_cache
+from urllib.parse import urlsplit
+from Backend.checker import (
+    HTTP2_ENABLED,
+    http_check_async,
+    is_ip_address,
+    make_http_client,
+    ping_host_async,
+    resolve_dns_real_async,
+    tcp_check_async,
+)
+from Backend.clock import clock
+from Backend.icmp import ECHO_TYPES, IcmpPinger, icmp_available, ip_family
+
+# Backends de probe: o CheckEngine só chama resolve/ping/tcp/http daqui e não
+# sabe se do outro lado está a rede de verdade ou uma simulação. Os resultados
+# têm o mesmo formato das funções de Backend/checker.py.
+
+
+class ProbeBackend:
+
+    def bind(self, http_limit):
+        # chamado pelo engine a cada loop asyncio novo
+        pass
+
+    async def close(self):
+        pass
+
+    async def resolve(self, address):
+        # (ips, ttl)
+        raise NotImplementedError
+
+    async def ping(self, ip):
+        raise NotImplementedError
+
+    async def tcp(self, ip, port):
+        raise NotImplementedError
+
+    async def http(self, url):
+        raise NotImplementedError
+
+
+# =====================
+# REDE REAL
+# =====================
+class NetworkBackend(ProbeBackend):
+
+    def __init__(self, http2=HTTP2_ENABLED):
+        self.http2 = http2
+
+        # ping nativo por socket ICMP, por família; sem permissão (ou sem
+        # IPv6) cai no binário do sistema
+        self.icmp = {family: icmp_available(family) for family in ECHO_TYPES}
+
+        # {loop: (cliente HTTP, pinger)}: check_all_hosts e a agenda por host
+        # podem rodar ao mesmo tempo, cada um no seu loop (thread)
+        self._loops = {}
+        self._lock = threading.Lock()
+
+    def _state(self):
+        return self._loops[asyncio.get_running_loop()]
+
+    def bind(self, http_limit):
+        # pool HTTP e pinger compartilhados por todos os lotes do loop
+        loop = asyncio.get_running_loop()
+
+        with self._lock:
+            if loop not in self._loops:
+                self._loops[loop] = (
+                    make_http_client(http_limit, http2=self.http2),
+                    IcmpPinger() if any(self.icmp.values()) else None,
+                )
+
+    async def close(self):
+        with self._lock:
+            state = self._loops.pop(asyncio.get_running_loop(), None)
+
+        if state:
+            client, pinger = state
+            await client.aclose()
+
+            if pinger:
+                pinger.close()
+
+    def resolve(self, address):
+        return resolve_dns_real_async(address)
+
+    def ping(self, ip):
+        pinger = self._state()[1]
+        if pinger and self.icmp[ip_family(ip)]:
+            return pinger.ping(ip)
+
+        return ping_host_async(ip)
+
+    def tcp(self, ip, port):
+        return tcp_check_async(ip, port)
+
+    def http(self, url):
+        return http_check_async(url, self._state()[0])
+
+
+# =====================
+# REDE SIMULADA
+# =====================
+
+# Cenário padrão da simulação (tudo sorteado a partir da semente)
+SCENARIO = {
+    # latência base de cada host (ms), sorteada uma vez por host
+    "latency_ms": (2, 150),
+    # variação relativa de cada checagem em torno da base
+    "jitter": 0.15,
+    # chance de uma checagem qualquer falhar
+    "loss": 0.005,
+    # fração de hosts instáveis e quanto a perda deles é maior
+    "flaky_hosts": 0.05,
+    "flaky_factor": 20,
+    # fração de hosts cuja latência sobe e desce ao longo do dia (tendência)
+    "slow_hosts": 0.05,
+    # quedas completas: média por host por dia e duração (minutos)
+    "outages_per_day": 0.5,
+    "outage_minutes": (1, 45),
+    # chance de HTTP 500 e de falha de DNS por checagem
+    "http_error": 0.005,
+    "dns_failure": 0.0005,
+    "dns_ttl": 300,
+}
+
+
+def _ms(value):
+    return round(max(0.05, value), 2)
+
+
+# Resultados determinísticos: cada checagem sorteia de um Random semeado com
+# (semente, alvo, tipo, segundo do relógio), então a mesma semente e o mesmo
+# relógio reproduzem exatamente a mesma rede, em qualquer ordem de execução.
+# Não dorme: a latência só é reportada, o que permite rodar com o relógio
+# virtual (Backend/clock.py) muito mais rápido que o tempo real.
+class SimulatedBackend(ProbeBackend):
+
+    def __init__(self, seed=0, scenario=None):
+        self.seed = seed
+        self.scenario = {**SCENARIO, **(scenario or {})}
+        self._outage = lru_cache(maxsize=200000)(self._outage_in_hour)
+        self._profile = lru_cache(maxsize=200000)(self._host_profile)
+
+    def _rng(self, *parts):
+        return random.Random(":".join(map(str, (self.seed, *parts))))
+
+    def address_ip(self, address):
+        # nome -> IP fixo em 10.0.0.0/8
+        if is_ip_address(address):
+            return address
+
+        bits = self._rng("ip", address).getrandbits(24)
+        return f"10.{bits >> 16}.{(bits >> 8) & 255}.{bits & 255}"
+
+    def _host_profile(self, key):
+        rng = self._rng("host", key)
+        s = self.scenario
+        low, high = s["latency_ms"]
+
+        return {
+            # mais hosts perto do mínimo (distribuição log-uniforme)
+            "base": math.exp(rng.uniform(math.log(low), math.log(high))),
+            "loss": s["loss"] * (s["flaky_factor"] if rng.random() < s["flaky_hosts"] else 1),
+            "slow": rng.random() < s["slow_hosts"],
+            "phase": rng.uniform(0, 2 * math.pi),
+        }
+
+    def _outage_in_hour(self, key, hour):
+        # (início, fim) em epoch de uma queda que começa nessa hora, ou None
+        rng = self._rng("outage", key, hour)
+
+        if rng.random() >= self.scenario["outages_per_day"] / 24:
+            return None
+
+        low, high = self.scenario["outage_minutes"]
+        start = hour * 3600 + rng.uniform(0, 3600)
+        return start, start + rng.uniform(low, high) * 60
+
+    def in_outage(self, key, now):
+        hour = int(now // 3600)
+        span = int(self.scenario["outage_minutes"][1] // 60) + 1
+
+        for h in range(hour - span, hour + 1):
+            outage = self._outage(key, h)
+            if outage and outage[0] <= now < outage[1]:
+                return True
+
+        return False
+
+    def _latency(self, key, rng, now, factor=1.0):
+        profile = self._profile(key)
+        latency = profile["base"] * factor
+
+        if profile["slow"]:
+            # até 4x no pico, ciclo de um dia
+            latency *= 2.5 + 1.5 * math.sin(now / 86400 * 2 * math.pi + profile["phase"])
+
+        return _ms(latency * (1 + rng.gauss(0, self.scenario["jitter"])))
+
+    def _attempt(self, key, kind):
+        # (Random da checagem, agora, falhou?)
+        now = clock.time()
+        rng = self._rng(kind, key, int(now))
+        failed = self.in_outage(key, now) or rng.random() < self._profile(key)["loss"]
+        return rng, now, failed
+
+    async def resolve(self, address):
+        rng = self._rng("dns", address, int(clock.time()))
+
+        if rng.random() < self.scenario["dns_failure"]:
+            return [], None
+
+        return [self.address_ip(address)], self.scenario["dns_ttl"]
+
+    async def ping(self, ip):
+        rng, now, failed = self._attempt(ip, "ping")
+
+        if failed:
+            return {"success": False, "error": "Host inalcançável", "latency": None}
+
+        return {"success": True, "error": None, "latency": self._latency(ip, rng, now)}
+
+    async def tcp(self, ip, port):
+        rng, now, failed = self._attempt(ip, "tcp")
+
+        if failed:
+            return {"success": False, "error": "timed out", "latency": None}
+
+        return {"success": True, "error": None, "latency": self._latency(ip, rng, now, 1.1)}
+
+    async def http(self, url):
+        parts = urlsplit(url)
+        ip = self.address_ip(parts.hostname or "")
+        rng, now, failed = self._attempt(ip, "http")
+
+        if failed:
+            return {"success": False, "latency": None, "status_code": None, "error": "timeout"}
+
+        connect = self._latency(ip, rng, now, 1.1)
+        tls = self._latency(ip, rng, now, 2.0) if parts.scheme == "https" else 0.0
+        ttfb = self._latency(ip, rng, now, 1.5)
+        total = _ms(connect + tls + ttfb)
+        status = 500 if rng.random() < self.scenario["http_error"] else 200
+
+        return {
+            "success": status < 400,
+            "latency": total,
+            "status_code": status,
+            "error": None,
+            "dns_ms": 0.0,
+            "connect_ms": connect,
+            "tls_ms": tls,
+            "ttfb_ms": ttfb,
+            "total_ms": total,
+        }
@@ -0,0 +1,173 @@
+import time
+from datetime import timedelta
+from sqlalchemy import delete, func, literal_column, select, text
+from Backend.clock import clock
+from Backend.database import engine as db_engine, read_engine as db_read_engine
+from Backend.models import CheckResult, CheckRollupHour, CheckRollupMinute
+from Backend.tsdb import epoch, tsdb
+
+# Retenção do histórico de checks, por tipo:
+# - min_hours: tudo que é mais novo que isso fica
+# - keep: além disso, fica só as últimas N checagens de cada host
+# - max_days: nada passa disso, mesmo dentro do keep
+#
+# Os checks brutos só servem às últimas N checagens (/host/history, warm-up
+# das métricas rolantes): gráficos leem os rollups e as amostras antigas
+# ficam na série temporal (Backend/tsdb.py). Por isso min_hours = 0 e a
+# tabela volta às 100 por host e tipo de antes, a cada passada.
+RETENTION = {
+    "dns": {"min_hours": 0, "keep": 100, "max_days": 7},
+    "ping": {"min_hours": 0, "keep": 100, "max_days": 30},
+    "tcp": {"min_hours": 0, "keep": 100, "max_days": 30},
+    "http": {"min_hours": 0, "keep": 100, "max_days": 30},
+}
+
+# Rollups (Backend/rollups.py): por minuto cobre os gráficos curtos, por hora
+# as janelas longas (30 dias)
+ROLLUP_RETENTION_DAYS = {
+    CheckRollupMinute: 2,
+    CheckRollupHour: 90,
+}
+
+# Cada lote é uma transação curta na conexão de escrita, devolvida ao pool
+# entre um lote e outro; a pausa deixa o write buffer gravar no meio
+DELETE_CHUNK = 5000
+CHUNK_PAUSE = 0.01
+
+# Páginas livres devolvidas ao sistema por passada de incremental_vacuum
+VACUUM_PAGES = 10000
+
+last_report = None
+
+
+def _delete_chunked(engine, where, model=CheckResult):
+    # DELETE ... WHERE rowid IN (SELECT rowid ... LIMIT n) até não sobrar nada
+    total = 0
+    rowid = literal_column("rowid")
+
+    while True:
+        chunk = select(rowid).select_from(model).where(*where).limit(DELETE_CHUNK).scalar_subquery()
+
+        with engine.begin() as conn:
+            removed = conn.execute(delete(model).where(rowid.in_(chunk))).rowcount
+
+        total += removed
+        if removed < DELETE_CHUNK:
+            return total
+
+        time.sleep(CHUNK_PAUSE)
+
+
+def _count_cutoffs(read_engine, check_type, keep):
+    # timestamp da (keep+1)-ésima checagem mais nova de cada host (ROW_NUMBER);
+    # consulta pesada, fica num leitor sem segurar o lock de escrita
+    ranked = select(
+        CheckResult.host_id,
+        CheckResult.timestamp,
+        func.row_number().over(
+            partition_by=CheckResult.host_id,
+            order_by=CheckResult.timestamp.desc()
+        ).label("rn"),
+    ).where(CheckResult.check_type == check_type).subquery()
+
+    with read_engine.connect() as conn:
+        rows = conn.execute(
+            select(ranked.c.host_id, ranked.c.timestamp).where(ranked.c.rn == keep + 1)
+        ).all()
+
+    return {host_id: ts for host_id, ts in rows}
+
+
+def trim_check_type(engine, read_engine, check_type, policy, now):
+    deleted = 0
+
+    # 1) idade máxima: um delete por faixa de tempo para todos os hosts
+    max_cut = now - timedelta(days=policy["max_days"])
+    deleted += _delete_chunked(engine, (
+        CheckResult.check_type == check_type,
+        CheckResult.timestamp < max_cut,
+    ))
+
+    # 2) contagem: por host, o que passou do keep e é mais velho que min_hours
+    min_cut = now - timedelta(hours=policy["min_hours"])
+
+    for host_id, cutoff in _count_cutoffs(read_engine, check_type, policy["keep"]).items():
+        # o corte é inclusivo: a (keep+1)-ésima também sai
+        cutoff = min(cutoff + timedelta(microseconds=1), min_cut)
+
+        deleted += _delete_chunked(engine, (
+            CheckResult.host_id == host_id,
+            CheckResult.check_type == check_type,
+            CheckResult.timestamp < cutoff,
+        ))
+
+    return deleted
+
+
+def incremental_vacuum(engine):
+    with engine.connect() as conn:
+        # só funciona com auto_vacuum=INCREMENTAL (migração 4)
+        if conn.execute(text("PRAGMA auto_vacuum")).scalar() != 2:
+            return 0
+
+        page_size = conn.execute(text("PRAGMA page_size")).scalar()
+        before = conn.execute(text("PRAGMA freelist_count")).scalar()
+
+    remaining = before
+
+    for _ in range(-(-before // VACUUM_PAGES)):
+        with engine.connect() as conn:
+            # pelo execute() do sqlite3 o pragma libera uma página por chamada;
+            # executescript roda a instrução até o fim
+            conn.connection.driver_connection.executescript(
+                f"PRAGMA incremental_vacuum({VACUUM_PAGES});"
+            )
+            remaining = conn.execute(text("PRAGMA freelist_count")).scalar()
+            conn.commit()
+
+        if not remaining:
+            break
+        time.sleep(CHUNK_PAUSE)
+
+    return (before - remaining) * page_size
+
+
+def run_retention(engine=db_engine, policies=None, read_engine=db_read_engine):
+    global last_report
+
+    policies = policies or RETENTION
+    started = time.perf_counter()
+    now = clock.utcnow()
+    deleted = {}
+
+    for check_type, policy in policies.items():
+        deleted[check_type] = trim_check_type(engine, read_engine, check_type, policy, now)
+
+    for model, days in ROLLUP_RETENTION_DAYS.items():
+        deleted[model.__tablename__] = _delete_chunked(
+            engine, (model.bucket < now - timedelta(days=days),), model
+        )
+
+    delete_seconds = time.perf_counter() - started
+    freed = incremental_vacuum(engine)
+
+    # série temporal: segmentos inteiros, só onde ela é gravada (coletor)
+    tsdb_segments = tsdb.trim(epoch(now)) if tsdb.writable else 0
+
+    report = {
+        "time": now.isoformat(),
+        "deleted": deleted,
+        "deleted_total": sum(deleted.values()),
+        "delete_seconds": round(delete_seconds, 3),
+        "vacuum_bytes": freed,
+        "tsdb_segments_removed": tsdb_segments,
+        "seconds": round(time.perf_counter() - started, 3),
+    }
+    last_report = report
+
+    print(
+        f"[RETENTION] {report['deleted_total']} linhas removidas {deleted} "
+        f"em {report['seconds']}s, {freed // 1024} KiB devolvidos"
+    )
+
+    return report
@@ -0,0 +1,343 @@
+import threading
+from array import array
+from sqlalchemy import and_, func, or_, select
+from Backend.models import CheckResult
+
+# Janelas (mesmas das funções calc_* de metrics.py)
+SLA_WINDOW = 50
+JITTER_WINDOW = 10
+SLOPE_WINDOW = 10
+SLOPE_MIN = 5
+
+# Amostras mínimas para jitter por tipo (http exige 3, como calc_jitter_http)
+JITTER_MIN = {"ping": 2, "tcp": 2, "http": 3}
+
+# Falhas seguidas (checagens ping/tcp/http do host, sem o DNS) que abrem incidente
+FAIL_WINDOW = 3
+
+# Somas incrementais acumulam erro de ponto flutuante; de tempos em tempos
+# são refeitas a partir do buffer (custo amortizado O(1))
+RESYNC_EVERY = 1000
+
+
+# Buffer circular de tamanho fixo sobre array('d')
+class Ring:
+
+    def __init__(self, size):
+        self.size = size
+        self.data = array("d", bytes(8 * size))
+        self.start = 0
+        self.count = 0
+
+    def __len__(self):
+        return self.count
+
+    def __getitem__(self, i):
+        # 0 = mais antigo, -1 = mais novo
+        if i < 0:
+            i += self.count
+        return self.data[(self.start + i) % self.size]
+
+    def push(self, value):
+        # devolve o valor que saiu (ou None se ainda não encheu)
+        if self.count < self.size:
+            self.data[(self.start + self.count) % self.size] = value
+            self.count += 1
+            return None
+
+        evicted = self.data[self.start]
+        self.data[self.start] = value
+        self.start = (self.start + 1) % self.size
+        return evicted
+
+    def values(self):
+        return [self[i] for i in range(self.count)]
+
+
+# % de sucesso nas últimas N checagens
+class RollingSLA:
+
+    def __init__(self, window=SLA_WINDOW):
+        self.ring = Ring(window)
+        self.ok = 0
+
+    def push(self, success):
+        value = 1.0 if success else 0.0
+        evicted = self.ring.push(value)
+
+        self.ok += value
+        if evicted is not None:
+            self.ok -= evicted
+
+    def value(self):
+        if not self.ring:
+            return None
+
+        return round(self.ok / len(self.ring) * 100, 2)
+
+
+# Média das diferenças absolutas entre latências consecutivas
+class RollingJitter:
+
+    def __init__(self, window=JITTER_WINDOW, minimum=2):
+        self.ring = Ring(window)
+        self.minimum = minimum
+        self.diffs = 0.0
+        self.pushes = 0
+
+    def push(self, latency):
+        ring = self.ring
+
+        if ring:
+            self.diffs += abs(latency - ring[-1])
+
+        # a diferença entre os dois mais antigos sai junto com o mais antigo
+        if len(ring) == ring.size:
+            self.diffs -= abs(ring[1] - ring[0])
+
+        ring.push(latency)
+
+        self.pushes += 1
+        if self.pushes % RESYNC_EVERY == 0:
+            values = ring.values()
+            self.diffs = sum(abs(values[i] - values[i-1]) for i in range(1, len(values)))
+
+    def value(self):
+        n = len(self.ring)
+        if n < self.minimum:
+            return None
+
+        return round(self.diffs / (n - 1), 2)
+
+
+# Inclinação da regressão linear (x = 0..n-1) das últimas N latências.
+# Guarda soma(y) e soma(x*y); ao sair o mais antigo todo x cai 1.
+class RollingSlope:
+
+    def __init__(self, window=SLOPE_WINDOW, minimum=SLOPE_MIN):
+        self.ring = Ring(window)
+        self.minimum = minimum
+        self.sum_y = 0.0
+        self.sum_xy = 0.0
+        self.pushes = 0
+
+    def push(self, latency):
+        ring = self.ring
+
+        if len(ring) == ring.size:
+            oldest = ring[0]
+            self.sum_xy -= self.sum_y - oldest
+            self.sum_y -= oldest
+
+        ring.push(latency)
+
+        self.sum_xy += (len(ring) - 1) * latency
+        self.sum_y += latency
+
+        self.pushes += 1
+        if self.pushes % RESYNC_EVERY == 0:
+            values = ring.values()
+            self.sum_y = sum(values)
+            self.sum_xy = sum(i * y for i, y in enumerate(values))
+
+    def value(self):
+        n = len(self.ring)
+        if n < self.minimum:
+            return None
+
+        x_mean = (n - 1) / 2
+        num = self.sum_xy - x_mean * self.sum_y
+        den = n * (n * n - 1) / 12
+
+        if den == 0:
+            return 0
+
+        return round(num / den, 2)
+
+
+# Métricas de uma checagem (ping/tcp/http) de um host
+class CheckSeries:
+
+    def __init__(self, check_type):
+        self.check_type = check_type
+        self.sla = RollingSLA()
+        self.jitter = RollingJitter(minimum=JITTER_MIN.get(check_type, 2))
+        self.slope = RollingSlope()
+
+    def push(self, success, latency):
+        self.sla.push(success)
+
+        # mesmos filtros das consultas antigas
+        if latency is not None and (success or self.check_type != "http"):
+            self.jitter.push(latency)
+
+        if success and latency is not None:
+            self.slope.push(latency)
+
+
+# Estado em memória de todos os hosts: séries por tipo + últimas checagens
+# (para falhas consecutivas). Reconstruído do banco uma vez, depois só
+# atualizado a cada resultado.
+class RollingMetrics:
+
+    def __init__(self):
+        self._series = {}
+        self._recent = {}
+        self._lock = threading.Lock()
+        self.loaded = False
+
+    def _get(self, host_id, check_type):
+        key = (host_id, check_type)
+        series = self._series.get(key)
+
+        if series is None:
+            series = self._series[key] = CheckSeries(check_type)
+
+        return series
+
+    def record(self, host_id, check_type, success, latency):
+        with self._lock:
+            # o DNS fica fora: o resultado dele entra antes de ping/tcp/http
+            # e um DNS OK esconderia as falhas seguidas
+            if check_type not in JITTER_MIN:
+                return
+
+            self._get(host_id, check_type).push(success, latency)
+
+            recent = self._recent.get(host_id)
+            if recent is None:
+                recent = self._recent[host_id] = Ring(FAIL_WINDOW)
+            recent.push(1.0 if success else 0.0)
+
+    def consecutive_failures(self, host_id):
+        with self._lock:
+            recent = self._recent.get(host_id)
+
+            if recent is None or len(recent) < recent.size:
+                return False
+
+            return not any(recent.values())
+
+    def snapshot(self, host_id):
+        # sla_rolling_*, jitter_ms_*, slope(_http) no formato das colunas do host
+        with self._lock:
+            values = {}
+
+            for check_type in JITTER_MIN:
+                series = self._series.get((host_id, check_type))
+                values[f"sla_rolling_{check_type}"] = series.sla.value() if series else None
+                values[f"jitter_ms_{check_type}"] = series.jitter.value() if series else None
+
+            ping = self._series.get((host_id, "ping"))
+            http = self._series.get((host_id, "http"))
+            values["slope"] = ping.slope.value() if ping else None
+            values["slope_http"] = http.slope.value() if http else None
+
+            return values
+
+    def forget(self, keep):
+        # hosts que saíram (shard rebalanceado): o estado deles fica velho
+        with self._lock:
+            for key in [k for k in self._series if k[0] not in keep]:
+                del self._series[key]
+
+            for host_id in [h for h in self._recent if h not in keep]:
+                del self._recent[host_id]
+
+    def warm(self, db, host_ids=None):
+        # reconstrói os buffers com as últimas checagens de cada host; com
+        # host_ids, só desses (hosts que chegaram ao shard), sempre do banco
+        if host_ids is None:
+            if self.loaded:
+                return 0
+        else:
+            host_ids = set(host_ids)
+
+        has_latency = CheckResult.latency.isnot(None)
+        probed = CheckResult.check_type.in_(list(JITTER_MIN))
+        ok_latency = and_(CheckResult.success == True, has_latency)
+        by_time = CheckResult.timestamp.desc()
+
+        ranked = select(
+            CheckResult.host_id,
+            CheckResult.check_type,
+            CheckResult.success,
+            CheckResult.latency,
+            CheckResult.timestamp,
+            CheckResult.id,
+            func.row_number().over(
+                partition_by=(CheckResult.host_id, CheckResult.check_type),
+                order_by=by_time
+            ).label("rn_all"),
+            func.row_number().over(
+                partition_by=(CheckResult.host_id, CheckResult.check_type, has_latency),
+                order_by=by_time
+            ).label("rn_latency"),
+            func.row_number().over(
+                partition_by=(CheckResult.host_id, CheckResult.check_type, ok_latency),
+                order_by=by_time
+            ).label("rn_ok"),
+            func.row_number().over(
+                partition_by=(CheckResult.host_id, probed),
+                order_by=by_time
+            ).label("rn_host"),
+        )
+
+        if host_ids is not None:
+            ranked = ranked.where(CheckResult.host_id.in_(list(host_ids)))
+
+        ranked = ranked.subquery()
+
+        rows = db.execute(
+            select(ranked)
+            .where(ranked.c.check_type.in_(list(JITTER_MIN)))
+            .where(or_(
+                ranked.c.rn_all <= SLA_WINDOW,
+                ranked.c.rn_latency <= JITTER_WINDOW,
+                ranked.c.rn_ok <= max(JITTER_WINDOW, SLOPE_WINDOW),
+                ranked.c.rn_host <= FAIL_WINDOW,
+            ))
+            .order_by(ranked.c.timestamp, ranked.c.id)
+        ).all()
+
+        with self._lock:
+            if host_ids is None:
+                self._series.clear()
+                self._recent.clear()
+            else:
+                for key in [k for k in self._series if k[0] in host_ids]:
+                    del self._series[key]
+
+                for host_id in host_ids:
+                    self._recent.pop(host_id, None)
+
+            for r in rows:
+                series = self._get(r.host_id, r.check_type)
+
+                if r.rn_all <= SLA_WINDOW:
+                    series.sla.push(r.success)
+
+                # http só conta latência de checagem com sucesso
+                if r.check_type == "http":
+                    in_jitter = r.success and r.latency is not None and r.rn_ok <= JITTER_WINDOW
+                else:
+                    in_jitter = r.latency is not None and r.rn_latency <= JITTER_WINDOW
+
+                if in_jitter:
+                    series.jitter.push(r.latency)
+
+                if r.success and r.latency is not None and r.rn_ok <= SLOPE_WINDOW:
+                    series.slope.push(r.latency)
+
+                if r.rn_host <= FAIL_WINDOW:
+                    recent = self._recent.get(r.host_id)
+                    if recent is None:
+                        recent = self._recent[r.host_id] = Ring(FAIL_WINDOW)
+                    recent.push(1.0 if r.success else 0.0)
+
+            self.loaded = True
+
+        return len(rows)
+
+
+rolling_metrics = RollingMetrics()
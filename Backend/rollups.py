@@ -0,0 +1,237 @@
+from datetime import timedelta
+from sqlalchemy import select, tuple_
+from sqlalchemy.dialects.sqlite import insert
+from Backend.models import CheckResult, CheckRollupHour, CheckRollupMinute
+
+# Resoluções mantidas: tabela e como truncar o timestamp no início do intervalo
+RESOLUTIONS = {
+    "1m": (CheckRollupMinute, lambda ts: ts.replace(second=0, microsecond=0)),
+    "1h": (CheckRollupHour, lambda ts: ts.replace(minute=0, second=0, microsecond=0)),
+}
+
+# Consultas de até esse tamanho usam a tabela por minuto, acima dela a por hora
+MINUTE_MAX_HOURS = 48
+
+# Limite superior (ms) de cada faixa do histograma de latência; a última é aberta
+ROLLUP_BOUNDS = (
+    1, 2, 5, 10, 20, 30, 50, 75, 100, 150, 200, 300,
+    500, 750, 1000, 1500, 2000, 3000, 5000, 10000,
+)
+
+# Upsert em lotes (limite de variáveis do SQLite)
+UPSERT_CHUNK = 500
+
+
+def _slot(latency):
+    for i, bound in enumerate(ROLLUP_BOUNDS):
+        if latency <= bound:
+            return i
+
+    return len(ROLLUP_BOUNDS)
+
+
+def _empty():
+    return {
+        "count": 0,
+        "successes": 0,
+        "lat_count": 0,
+        "lat_sum": 0.0,
+        "lat_min": None,
+        "lat_max": None,
+        "hist": [0] * (len(ROLLUP_BOUNDS) + 1),
+    }
+
+
+def _from_row(row):
+    hist = [int(v) for v in row.lat_hist.split(",")] if row.lat_hist else [0] * (len(ROLLUP_BOUNDS) + 1)
+
+    return {
+        "count": row.count or 0,
+        "successes": row.successes or 0,
+        "lat_count": row.lat_count or 0,
+        "lat_sum": row.lat_sum or 0.0,
+        "lat_min": row.lat_min,
+        "lat_max": row.lat_max,
+        "hist": hist,
+    }
+
+
+def _add(stats, success, latency):
+    stats["count"] += 1
+    stats["successes"] += 1 if success else 0
+
+    if latency is None:
+        return
+
+    stats["lat_count"] += 1
+    stats["lat_sum"] += latency
+    stats["lat_min"] = latency if stats["lat_min"] is None else min(stats["lat_min"], latency)
+    stats["lat_max"] = latency if stats["lat_max"] is None else max(stats["lat_max"], latency)
+    stats["hist"][_slot(latency)] += 1
+
+
+def _merge(into, other):
+    into["count"] += other["count"]
+    into["successes"] += other["successes"]
+    into["lat_count"] += other["lat_count"]
+    into["lat_sum"] += other["lat_sum"]
+
+    for key, pick in (("lat_min", min), ("lat_max", max)):
+        if other[key] is not None:
+            into[key] = other[key] if into[key] is None else pick(into[key], other[key])
+
+    into["hist"] = [a + b for a, b in zip(into["hist"], other["hist"])]
+
+
+def percentile(stats, q=0.95):
+    # interpolação linear dentro da faixa do histograma, presa em [min, max]
+    total = stats["lat_count"]
+    if not total:
+        return None
+
+    target = q * total
+    seen = 0
+
+    for i, n in enumerate(stats["hist"]):
+        if not n:
+            continue
+
+        if seen + n >= target:
+            low = ROLLUP_BOUNDS[i - 1] if i else 0
+            high = ROLLUP_BOUNDS[i] if i < len(ROLLUP_BOUNDS) else stats["lat_max"]
+            value = low + (high - low) * (target - seen) / n
+
+            return round(min(max(value, stats["lat_min"]), stats["lat_max"]), 2)
+
+        seen += n
+
+    return stats["lat_max"]
+
+
+def aggregate(checks):
+    # {resolução: {(host_id, check_type, bucket): stats}} das linhas novas
+    out = {res: {} for res in RESOLUTIONS}
+
+    for c in checks:
+        for res, (_, truncate) in RESOLUTIONS.items():
+            key = (c["host_id"], c["check_type"], truncate(c["timestamp"]))
+            stats = out[res].get(key)
+
+            if stats is None:
+                stats = out[res][key] = _empty()
+
+            _add(stats, c["success"], c["latency"])
+
+    return out
+
+
+def _load(db, model, keys):
+    # linhas já gravadas para as chaves do lote
+    rows = {}
+    keys = list(keys)
+
+    for i in range(0, len(keys), UPSERT_CHUNK):
+        chunk = keys[i:i + UPSERT_CHUNK]
+
+        query = select(*model.__table__.c).where(
+            tuple_(model.host_id, model.check_type, model.bucket).in_(chunk)
+        )
+
+        for row in db.execute(query):
+            rows[(row.host_id, row.check_type, row.bucket)] = _from_row(row)
+
+    return rows
+
+
+def upsert_rollups(db, checks):
+    # chamado pelo writer no mesmo commit das linhas brutas
+    if not checks:
+        return 0
+
+    written = 0
+
+    for res, fresh in aggregate(checks).items():
+        model = RESOLUTIONS[res][0]
+        existing = _load(db, model, fresh)
+
+        values = []
+        for (host_id, check_type, bucket), stats in fresh.items():
+            old = existing.get((host_id, check_type, bucket))
+            if old:
+                _merge(old, stats)
+                stats = old
+
+            values.append({
+                "host_id": host_id,
+                "check_type": check_type,
+                "bucket": bucket,
+                "count": stats["count"],
+                "successes": stats["successes"],
+                "lat_count": stats["lat_count"],
+                "lat_sum": stats["lat_sum"],
+                "lat_min": stats["lat_min"],
+                "lat_max": stats["lat_max"],
+                "lat_p95": percentile(stats),
+                "lat_hist": ",".join(map(str, stats["hist"])),
+            })
+
+        for i in range(0, len(values), UPSERT_CHUNK):
+            stmt = insert(model).values(values[i:i + UPSERT_CHUNK])
+            stmt = stmt.on_conflict_do_update(
+                index_elements=["host_id", "check_type", "bucket"],
+                set_={
+                    col: stmt.excluded[col]
+                    for col in ("count", "successes", "lat_count", "lat_sum",
+                                "lat_min", "lat_max", "lat_p95", "lat_hist")
+                }
+            )
+            db.execute(stmt)
+
+        written += len(values)
+
+    return written
+
+
+def pick_resolution(since, until):
+    return "1m" if until - since <= timedelta(hours=MINUTE_MAX_HOURS) else "1h"
+
+
+def read_rollups(db, host_id, check_types, since, until, resolution=None):
+    # {check_type: [linhas em ordem de tempo]}
+    resolution = resolution or pick_resolution(since, until)
+    model = RESOLUTIONS[resolution][0]
+    since = RESOLUTIONS[resolution][1](since)
+
+    rows = db.execute(
+        select(*model.__table__.c)
+        .where(
+            model.host_id == host_id,
+            model.check_type.in_(check_types),
+            model.bucket >= since,
+            model.bucket <= until,
+        )
+        .order_by(model.check_type, model.bucket)
+    )
+
+    out = {t: [] for t in check_types}
+    for row in rows:
+        out[row.check_type].append(row)
+
+    return out
+
+
+def backfill(conn, since=None):
+    # migração: gera os rollups a partir dos checks brutos que ainda existem
+    query = select(
+        CheckResult.host_id,
+        CheckResult.check_type,
+        CheckResult.success,
+        CheckResult.latency,
+        CheckResult.timestamp,
+    ).where(CheckResult.timestamp.isnot(None))
+
+    if since is not None:
+        query = query.where(CheckResult.timestamp >= since)
+
+    checks = [dict(r._mapping) for r in conn.execute(query)]
+    return upsert_rollups(conn, checks)
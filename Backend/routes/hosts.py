@@ -1,31 +1,89 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse, Response, StreamingResponse
+from jose import JWTError
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from datetime import datetime, timedelta
-from Backend.database import SessionLocal
-from Backend.metrics import get_mttr, total_downtime, total_incidents, availability_last_10_min
+from datetime import datetime, timedelta, timezone
+from typing import Optional
+from Backend.database import AsyncReadSession, ReadSession, SessionLocal
+from Backend.metrics import get_mttr, total_downtime, total_incidents, availability_last_10_min, host_summaries, incident_intervals, availability_buckets, lttb, overlapping_incidents, parse_duration, sliding_sla
 from Backend.models import CheckResult, Host, Alert, Incident, User
-from Backend.checker import ping_host, tcp_check, resolve_dns_cached
+from Backend.checker import ping_host, tcp_check
+from Backend.dns_cache import resolve_dns_cached
+from Backend.bridge import read_status
+from Backend.leases import COLLECTOR_LEASE, lease_info
+from Backend.rollups import pick_resolution, read_rollups
 from Backend.schemas import HostCreate, HostUpdate
 from Backend.utils import is_ip, normalize_http_url, reverse_dns
 from fastapi.security import OAuth2PasswordRequestForm
 from Backend.dependencies import get_current_user
-from Backend.security import verify_password, create_access_token, hash_password
+from Backend.security import verify_password, create_access_token, hash_password, decode_token
+from Backend.events import broadcaster
+from Backend import telemetry
+from Backend.versions import host_versions
+from Backend.tsdb import CHECK_TYPES, epoch, tsdb
 
 router = APIRouter()
 
+# Maior janela dos gráficos (lidos dos rollups por hora acima de 48h)
+MAX_CHART_HOURS = 24 * 30
+
+# Teto de pontos por série devolvidos pelo sla_chart (após o LTTB)
+MAX_CHART_POINTS = 2000
+
+# Janela padrão do SLA deslizante (nunca menor que um balde dos rollups)
+DEFAULT_SLA_WINDOW = timedelta(minutes=20)
+
+# Teto de baldes do histórico de disponibilidade
+MAX_AVAILABILITY_BUCKETS = 5000
+
+# Amostras cruas da série temporal (Backend/tsdb.py): padrão e teto por resposta
+DEFAULT_SAMPLES = 5000
+MAX_SAMPLES = 100000
+
+def naive_utc(dt):
+    # o banco guarda UTC sem fuso; "2026-10-01T00:00:00Z" vira naive em UTC
+    if dt is not None and dt.tzinfo is not None:
+        return dt.astimezone(timezone.utc).replace(tzinfo=None)
+    return dt
+
 def get_db():
+    # conexão de escrita (uma por processo): só rotas que gravam
     db = SessionLocal()
     try:
         yield db
     finally:
         db.close()
 
+def get_read_db():
+    # pool de leitura: não espera commit do coletor nem de outra rota
+    db = ReadSession()
+    try:
+        yield db
+    finally:
+        db.close()
+
+async def get_async_db():
+    # leitura assíncrona: a rota não ocupa thread enquanto espera o banco.
+    # Funções de Backend/metrics.py (Session síncrona) rodam via run_sync
+    async with AsyncReadSession() as db:
+        yield db
+
+
+def commit_host(db, host):
+    # toda mudança de host ganha versão nova (delta em /hosts/changes)
+    host.version = host_versions.allocate(db)
+    db.commit()
+
 
 @router.post("/host/create")
 def create_host(data: HostCreate, db: Session = Depends(get_db), user: str = Depends(get_current_user)):
-    existing_host = db.query(Host).filter(Host.name == data.name).first()
     resolved = None
 
+    # DNS antes da primeira consulta: a transação de escrita pega o lock já
+    # no início e não deve segurá-lo esperando resolução
     if is_ip(data.address):
         resolved = reverse_dns(data.address)
     else:
@@ -33,6 +91,8 @@ def create_host(data: HostCreate, db: Session = Depends(get_db), user: str = Dep
         
         if not ips:
             raise HTTPException(status_code=400, detail="Endereço inválido")
+
+    existing_host = db.query(Host).filter(Host.name == data.name).first()
                    
     if existing_host:
         if not existing_host.active:
@@ -48,7 +108,10 @@ def create_host(data: HostCreate, db: Session = Depends(get_db), user: str = Dep
                 normalized_url = normalize_http_url(data.http_url, data.port or existing_host.port)
                 existing_host.http_url = normalized_url
 
-            db.commit()
+            if data.check_interval is not None:
+                existing_host.check_interval = data.check_interval
+
+            commit_host(db, existing_host)
             db.refresh(existing_host)
             return existing_host
         else:
@@ -60,6 +123,7 @@ def create_host(data: HostCreate, db: Session = Depends(get_db), user: str = Dep
             address=data.address,
             port=data.port,
             hostname_resolved=resolved,
+            check_interval=data.check_interval,
         )
 
         if data.http_url is not None:
@@ -67,7 +131,7 @@ def create_host(data: HostCreate, db: Session = Depends(get_db), user: str = Dep
             host.http_url = normalized_url
 
         db.add(host)
-        db.commit()
+        commit_host(db, host)
         db.refresh(host)
 
         return host
@@ -75,26 +139,68 @@ def create_host(data: HostCreate, db: Session = Depends(get_db), user: str = Dep
 
 
 @router.get("/hosts/list")
-def list_hosts(db: Session = Depends(get_db), user: str = Depends(get_current_user)):
-    hosts = db.query(Host).filter(Host.active == True).all()
+async def list_hosts(db: AsyncSession = Depends(get_async_db), user: str = Depends(get_current_user)):
+    hosts = (await db.scalars(select(Host).where(Host.active == True))).all()
     
-    # Métricas em tempo real no objeto antes de enviar
+    # Métricas em tempo real no objeto antes de enviar (consultas agrupadas,
+    # mesmo custo para 10 ou 5000 hosts)
+    summaries = await db.run_sync(host_summaries, [h.name for h in hosts])
+
     for h in hosts:
-        h.mttr = get_mttr(db, h.name)
-        h.availability_10m = availability_last_10_min(db, h.name)
+        h.mttr = summaries[h.name]["mttr"]
+        h.availability_10m = summaries[h.name]["availability_10m"]
         
     return hosts
 
 
-@router.post("/host/check/{host_name}")
-def check_host(host_name: str, db: Session = Depends(get_db)):
+@router.get("/hosts/changes")
+async def host_changes(request: Request, since: int = 0, user: str = Depends(get_current_user)):
+    # delta da lista de hosts: só o que mudou depois do cursor "since".
+    # ETag = versão atual; frota parada responde 304 sem abrir o banco
+    current = host_versions.current
+    etag = f'"{current}"'
+
+    if current is not None and request.headers.get("if-none-match") == etag:
+        return Response(status_code=304, headers={"ETag": etag})
+
+    async with AsyncReadSession() as db:
+        # contador antes dos hosts: o que entrar depois volta na próxima
+        version = await db.run_sync(host_versions.read)
+        query = select(Host)
 
+        if since:
+            query = query.where(Host.version > since)
+        else:
+            # cursor zerado: lista completa
+            query = query.where(Host.active == True)
+
+        changed = (await db.scalars(query)).all()
+        hosts = [h for h in changed if h.active]
+        summaries = await db.run_sync(host_summaries, [h.name for h in hosts])
+
+        for h in hosts:
+            h.mttr = summaries[h.name]["mttr"]
+            h.availability_10m = summaries[h.name]["availability_10m"]
+
+        data = {
+            "version": version,
+            "full": not since,
+            "hosts": hosts,
+            "removed": [h.name for h in changed if not h.active],
+        }
+
+    return JSONResponse(jsonable_encoder(data), headers={"ETag": f'"{version}"'})
+
+
+@router.post("/host/check/{host_name}")
+def check_host(host_name: str, db: Session = Depends(get_read_db)):
+    # diagnóstico na hora, sem gravar: o estado do host é do coletor
     host = db.query(Host).filter(Host.name == host_name).first()
 
     if not host:
         raise HTTPException(status_code=404, detail="Host não encontrado")
 
-    ips = resolve_dns_cached(host.address, db)
+    ips, _, _ = resolve_dns_cached(host.address)
 
     if not ips:
         raise HTTPException(400, "DNS fail")
@@ -107,58 +213,49 @@ def check_host(host_name: str, db: Session = Depends(get_db)):
     if host.port is not None:
         tcp_result = tcp_check(ip, host.port)
 
-    host.status_ping = "UP" if ping_result["success"] else "DOWN"
-    host.latency_ping = ping_result["latency"]
-    
-    if tcp_result is not None:
-        host.status_tcp = "UP" if tcp_result["success"] else "DOWN"
-        host.latency_tcp = tcp_result["latency"]
-    else:
-        host.status_tcp = None
-        host.latency_tcp = None
+    status_ping = "UP" if ping_result["success"] else "DOWN"
+    status_tcp = None
 
-    host.last_check = datetime.now()
+    if tcp_result is not None:
+        status_tcp = "UP" if tcp_result["success"] else "DOWN"
 
-    if host.status_ping == "DOWN":
-        host.status = "DOWN"
+    if status_ping == "DOWN":
+        status = "DOWN"
 
-    elif host.status_tcp == "DOWN":
-        host.status = "DEGRADED"
+    elif status_tcp == "DOWN":
+        status = "DEGRADED"
 
     else:
-        host.status = "UP"
-
-    db.commit()
+        status = "UP"
 
     return {
     "host": host.name,
     "address": host.address,
-    "status": host.status,
+    "status": status,
     "ping": {
-        "status": host.status_ping,
-        "latency": host.latency_ping
+        "status": status_ping,
+        "latency": ping_result["latency"]
     },
 
     "tcp": {
-        "status": host.status_tcp,
-        "latency": host.latency_tcp
+        "status": status_tcp,
+        "latency": tcp_result["latency"] if tcp_result else None
     }
 }
 
 @router.get("/host/history/{host_name}")
-def host_history(host_name: str, db: Session = Depends(get_db)):
-    host = db.query(Host).filter(Host.name == host_name).first()
+async def host_history(host_name: str, db: AsyncSession = Depends(get_async_db)):
+    host = await db.scalar(select(Host).where(Host.name == host_name))
 
     if not host:
         raise HTTPException(status_code=404, detail="Host não encontrado")
 
-    checks = (
-        db.query(CheckResult)
-        .filter(CheckResult.host_id == host.id)
+    checks = (await db.scalars(
+        select(CheckResult)
+        .where(CheckResult.host_id == host.id)
         .order_by(CheckResult.timestamp.desc())
         .limit(200)
-        .all()
-    )
+    )).all()
 
     return {
         "host": host.name,
@@ -169,12 +266,53 @@ def host_history(host_name: str, db: Session = Depends(get_db)):
                 "success": c.success,
                 "latency": c.latency,
                 "error": c.error,
+                "dns_ms": c.dns_ms,
+                "connect_ms": c.connect_ms,
+                "tls_ms": c.tls_ms,
+                "ttfb_ms": c.ttfb_ms,
                 "timestamp": c.timestamp.isoformat()
             }
             for c in checks
         ]
     }
 
+@router.get("/host/samples/{host_name}")
+async def host_samples(
+    host_name: str,
+    check_type: str = "ping",
+    hours: int = Query(24, ge=1, le=MAX_CHART_HOURS),
+    limit: int = Query(DEFAULT_SAMPLES, ge=1, le=MAX_SAMPLES),
+    db: AsyncSession = Depends(get_async_db)
+):
+    # check_type vira caminho no disco da série
+    if check_type not in CHECK_TYPES:
+        raise HTTPException(400, f"check_type deve ser um de: {', '.join(CHECK_TYPES)}")
+
+    host = await db.scalar(select(Host).where(Host.name == host_name))
+
+    if not host:
+        raise HTTPException(status_code=404, detail="Host não encontrado")
+
+    now = datetime.utcnow()
+
+    # fatias dos segmentos mapeados; só as `limit` mais novas são decodificadas
+    views = tsdb.slices(host.id, check_type, epoch(now - timedelta(hours=hours)), epoch(now))
+
+    return {
+        "host": host.name,
+        "check_type": check_type,
+        "total": tsdb.count(views),
+        "samples": [
+            {
+                "timestamp": ts.isoformat(),
+                "latency": latency,
+                "success": success,
+                "error": error
+            }
+            for ts, latency, success, error in tsdb.decode(tsdb.last(views, limit))
+        ]
+    }
+
 @router.delete("/host/delete/{host_name}")
 def delete_host(host_name: str, db: Session = Depends(get_db), user: str = Depends(get_current_user)):
     host = db.query(Host).filter(Host.name == host_name).first()
@@ -184,18 +322,15 @@ def delete_host(host_name: str, db: Session = Depends(get_db), user: str = Depen
 
     host.active = False
     host.active_time = datetime.now()
-    db.commit()
+    commit_host(db, host)
 
     return {"detail": "Host desativado com sucesso"}
 
 @router.put("/host/update/{host_name}")
 def update_host(host_name: str, data: HostUpdate, db: Session = Depends(get_db), user: str = Depends(get_current_user)):
-    host = db.query(Host).filter(Host.name == host_name).first()
     resolved = None
-    
-    if not host:
-        raise HTTPException(status_code=404, detail="Host não encontrado")
-    
+
+    # DNS antes da primeira consulta (ver create_host)
     if is_ip(data.address):
         resolved = reverse_dns(data.address)
     else:
@@ -203,6 +338,11 @@ def update_host(host_name: str, data: HostUpdate, db: Session = Depends(get_db),
 
         if not ips:
             raise HTTPException(status_code=400, detail="Endereço inválido. ")
+
+    host = db.query(Host).filter(Host.name == host_name).first()
+    
+    if not host:
+        raise HTTPException(status_code=404, detail="Host não encontrado")
     
     host.address = data.address
     host.port = data.port
@@ -212,19 +352,21 @@ def update_host(host_name: str, data: HostUpdate, db: Session = Depends(get_db),
         normalized_url = normalize_http_url(data.http_url, data.port or host.port)
         host.http_url = normalized_url
 
-    db.commit()
+    if data.check_interval is not None:
+        host.check_interval = data.check_interval
+
+    commit_host(db, host)
 
     return {"detail": "Host atualizado com sucesso"}
 
 @router.get("/alerts/list")
-def list_alerts(db: Session = Depends(get_db)):
-    rows = (
-        db.query(Alert, Host.name)
+async def list_alerts(db: AsyncSession = Depends(get_async_db)):
+    rows = (await db.execute(
+        select(Alert, Host.name)
         .join(Host, Host.id == Alert.host_id)
         .order_by(Alert.timestamp.desc())
         .limit(50)
-        .all()
-    )
+    )).all()
 
     result = []
     for alert, host_name in rows:
@@ -239,193 +381,137 @@ def list_alerts(db: Session = Depends(get_db)):
     return result
 
 @router.get("/host/heatmap/{host_name}")
-def heatmap(host_name: str, db: Session = Depends(get_db)):
+async def heatmap(host_name: str, hours: int = 24, db: AsyncSession = Depends(get_async_db)):
 
-    host = db.query(Host).filter_by(name=host_name).first()
+    host = await db.scalar(select(Host).filter_by(name=host_name))
     if not host:
         raise HTTPException(404, "Host não encontrado")
 
-    since = datetime.utcnow() - timedelta(hours=24)
-
-    rows = (
-        db.query(CheckResult)
-        .filter(
-            CheckResult.host_id == host.id,
-            CheckResult.check_type == "ping",
-            CheckResult.timestamp >= since
-        )
-        .order_by(CheckResult.timestamp.desc())
-        .limit(1000)
-
-    )
+    hours = max(1, min(hours, MAX_CHART_HOURS))
+    until = datetime.utcnow()
+    since = until - timedelta(hours=hours)
 
-    buckets = {}
+    # média de latência do ping por intervalo (minuto até 48h, hora acima)
+    rows = (await db.run_sync(read_rollups, host.id, ["ping"], since, until))["ping"]
 
-    for r in rows:
-        bucket = r.timestamp.replace(
-            minute=r.timestamp.minute,
-            second=0,
-            microsecond=0
-        )
-
-        buckets.setdefault(bucket, []).append(r.latency)
-
-    result = []
-
-    for t, values in buckets.items():
-        lat = [v for v in values if v is not None]
-        avg = sum(lat)/len(lat) if lat else None
-
-        result.append({
-            "time": t.isoformat(),
-            "latency": avg
-        })
-
-    return sorted(result, key=lambda x: x["time"])
+    return [
+        {
+            "time": r.bucket.isoformat(),
+            "latency": r.lat_sum / r.lat_count if r.lat_count else None,
+            "p95": r.lat_p95
+        }
+        for r in rows
+    ]
 
 @router.get("/host/sla_chart/{name}")
-def sla_chart(name: str, db: Session = Depends(get_db)):
-
-    host = db.query(Host).filter_by(name=name).first()
+async def sla_chart(
+    name: str,
+    since: Optional[datetime] = Query(None, alias="from"),
+    until: Optional[datetime] = Query(None, alias="to"),
+    hours: int = 24,
+    window: Optional[str] = None,
+    max_points: int = 500,
+    db: AsyncSession = Depends(get_async_db)
+):
+    if not 3 <= max_points <= MAX_CHART_POINTS:
+        raise HTTPException(400, f"max_points deve estar entre 3 e {MAX_CHART_POINTS}")
+
+    host = await db.scalar(select(Host).filter_by(name=name))
     if not host:
-        return {"ping": [], "tcp": []}
-
-    window = 20
-
-    # -------------------
-    # PING
-    # -------------------
-    ping_rows = (
-        db.query(CheckResult)
-        .filter(CheckResult.host_id == host.id,
-                CheckResult.check_type == "ping")
-        .order_by(CheckResult.timestamp.asc())
-        .all()
-    )
-
-    ping_out = []
+        return {"ping": [], "tcp": [], "http": []}
 
-    for i in range(window, len(ping_rows)+1):
-        chunk = ping_rows[i-window:i]
-        ok = sum(1 for r in chunk if r.success)
+    # intervalo: from/to explícitos ou as últimas `hours` horas
+    until = naive_utc(until) or datetime.utcnow()
+    since = naive_utc(since) or until - timedelta(hours=max(1, min(hours, MAX_CHART_HOURS)))
 
-        ping_out.append({
-            "time": chunk[-1].timestamp,
-            "sla": round(ok / window * 100, 2)
-        })
-
-    # -------------------
-    # TCP
-    # -------------------
-    tcp_rows = (
-        db.query(CheckResult)
-        .filter(CheckResult.host_id == host.id,
-                CheckResult.check_type == "tcp")
-        .order_by(CheckResult.timestamp.asc())
-        .all()
-    )
-
-    tcp_out = []
+    if since >= until:
+        raise HTTPException(400, "from deve ser anterior a to")
 
-    for i in range(window, len(tcp_rows)+1):
-        chunk = tcp_rows[i-window:i]
-        ok = sum(1 for r in chunk if r.success)
+    since = max(since, until - timedelta(hours=MAX_CHART_HOURS))
 
-        tcp_out.append({
-            "time": chunk[-1].timestamp,
-            "sla": round(ok / window * 100, 2)
-        })
+    # janela em tempo ("20m", "6h"): o mesmo valor vale o mesmo em qualquer
+    # resolução (minuto até 48h, hora acima)
+    resolution = pick_resolution(since, until)
+    step = parse_duration(resolution)
 
-    # -------------------
-    # HTTP
-    # -------------------
-    http_rows = (
-        db.query(CheckResult)
-        .filter(CheckResult.host_id == host.id,
-                CheckResult.check_type == "http")
-        .order_by(CheckResult.timestamp.asc())
-        .all()
-    )
+    try:
+        length = parse_duration(window) if window else max(DEFAULT_SLA_WINDOW, step)
+    except ValueError as e:
+        raise HTTPException(400, str(e))
 
-    http_out = []
+    if length < step:
+        raise HTTPException(400, f"window menor que a resolução dos dados ({resolution}) neste intervalo")
 
-    for i in range(window, len(http_rows)+1):
-        chunk = http_rows[i-window:i]
-        ok = sum(1 for r in chunk if r.success)
+    if length > timedelta(hours=MAX_CHART_HOURS):
+        raise HTTPException(400, f"window maior que {MAX_CHART_HOURS}h")
 
-        http_out.append({
-            "time": chunk[-1].timestamp,
-            "sla": round(ok / window * 100, 2)
-        })
+    # SLA deslizante na janela sobre os rollups, depois LTTB
+    rollups = await db.run_sync(read_rollups, host.id, ["ping", "tcp", "http"], since, until, resolution)
 
     return {
-        "ping": ping_out,
-        "tcp": tcp_out,
-        "http": http_out
+        check_type: lttb(
+            sliding_sla([(r.bucket, r.count, r.successes) for r in rows], length, step),
+            max_points
+        )
+        for check_type, rows in rollups.items()
     }
     
 @router.get("/hosts/metrics/{host_name}")
-def host_metrics(host_name: str, db: Session = Depends(get_db)):
+async def host_metrics(host_name: str, db: AsyncSession = Depends(get_async_db)):
     return {
-        "mttr_seconds": get_mttr(db, host_name),
-        "total_incidents": total_incidents(db, host_name),
-        "total_downtime_seconds": total_downtime(db, host_name),
-        "availability_10m_percent": availability_last_10_min(db, host_name),
+        "mttr_seconds": await db.run_sync(get_mttr, host_name),
+        "total_incidents": await db.run_sync(total_incidents, host_name),
+        "total_downtime_seconds": await db.run_sync(total_downtime, host_name),
+        "availability_10m_percent": await db.run_sync(availability_last_10_min, host_name),
     }
 
 from datetime import datetime, timedelta
 
 @router.get("/hosts/metrics/{host_name}/history")
-def availability_history(host_name: str, db: Session = Depends(get_db)):
-    now = datetime.utcnow()
-    points = []
-
-    for i in range(60):
-        end = now - timedelta(minutes=i)
-        start = end - timedelta(minutes=1)
-
-        incidents = (
-            db.query(Incident)
-            .filter(
-                Incident.host_name == host_name,
-                Incident.started_time <= end
-            )
-            .all()
-        )
-
-        downtime = 0
+async def availability_history(
+    host_name: str,
+    bucket: str = "1m",
+    span: str = Query("1h", alias="range"),
+    db: AsyncSession = Depends(get_async_db)
+):
+    try:
+        step = parse_duration(bucket)
+        length = parse_duration(span)
+    except ValueError as e:
+        raise HTTPException(400, str(e))
 
-        for incident in incidents:
-            s = incident.started_time
-            e = incident.ended_time or end
+    if length / step > MAX_AVAILABILITY_BUCKETS:
+        raise HTTPException(400, f"máximo de {MAX_AVAILABILITY_BUCKETS} baldes")
 
-            overlap_start = max(s, start)
-            overlap_end = min(e, end)
+    now = datetime.utcnow()
+    since = now - length
 
-            if overlap_end > overlap_start:
-                downtime += (overlap_end - overlap_start).total_seconds()
+    # uma consulta + uma varredura, qualquer que seja o número de baldes
+    intervals = await db.run_sync(incident_intervals, host_name, since, now)
 
-        availability = ((60 - downtime) / 60) * 100
-        points.append({
+    return [
+        {
             "timestamp": start.isoformat(),
-            "availability": round(max(0, availability), 2)
-        })
-
-    return list(reversed(points))
+            "availability": round(availability, 2)
+        }
+        for start, availability in availability_buckets(intervals, since, now, step.total_seconds())
+    ]
 
 @router.get("/hosts/metrics/{host_name}/downtime")
-def downtime_history(host_name: str, db: Session = Depends(get_db)):
+async def downtime_history(
+    host_name: str,
+    span: str = Query("1h", alias="range"),
+    db: AsyncSession = Depends(get_async_db)
+):
+    try:
+        length = parse_duration(span)
+    except ValueError as e:
+        raise HTTPException(400, str(e))
+
     now = datetime.utcnow()
-    since = now - timedelta(hours=1)
 
-    incidents = (
-        db.query(Incident)
-        .filter(
-            Incident.host_name == host_name,
-            Incident.started_time >= since
-        )
-        .all()
-    )
+    # incidentes que encostam no intervalo (inclusive os que começaram antes)
+    incidents = await db.run_sync(overlapping_incidents, host_name, now - length, now)
 
     return [
         {
@@ -437,11 +523,11 @@ def downtime_history(host_name: str, db: Session = Depends(get_db)):
     ]
 
 @router.get("/hosts/metrics/{host_name}/error-budget")
-def error_budget(host_name: str, db: Session = Depends(get_db)):
+async def error_budget(host_name: str, db: AsyncSession = Depends(get_async_db)):
     sla = 99.9
     total_period = 30 * 24 * 60 * 60  # 30 dias
 
-    downtime = total_downtime(db, host_name)
+    downtime = await db.run_sync(total_downtime, host_name)
 
     allowed_downtime = total_period * (1 - sla / 100)
     remaining = allowed_downtime - downtime
@@ -454,7 +540,7 @@ def error_budget(host_name: str, db: Session = Depends(get_db)):
     }
 
 @router.post("/login")
-def login(data: dict, db: Session = Depends(get_db)):
+def login(data: dict, db: Session = Depends(get_read_db)):
     user = db.query(User).filter(User.username == data["username"]).first()
 
     if not user or not verify_password(data["password"], user.password_hash):
@@ -481,14 +567,13 @@ def change_password(data: dict, db: Session = Depends(get_db)):
     return {"message": "Senha alterada com sucesso"}
 
 @router.get("/incidents/latest")
-def get_latest_incidents(db: Session = Depends(get_db), user: str = Depends(get_current_user)):
+async def get_latest_incidents(db: AsyncSession = Depends(get_async_db), user: str = Depends(get_current_user)):
     # Busca os 15 incidentes mais recentes (abertos ou fechados)
-    incidents = (
-        db.query(Incident)
+    incidents = (await db.scalars(
+        select(Incident)
         .order_by(Incident.started_time.desc())
         .limit(15)
-        .all()
-    )
+    )).all()
     
     return [
         {
@@ -502,3 +587,66 @@ def get_latest_incidents(db: Session = Depends(get_db), user: str = Depends(get_
         }
         for i in incidents
     ]
+
+# /system/*: estado publicado pelo coletor (Backend/bridge.py)
+def collector_field(field):
+    status = read_status()
+    return status.get(field) if status else None
+
+@router.get("/system/collector")
+def collector_report(user: str = Depends(get_current_user)):
+    status = read_status()
+
+    return {
+        "lease": lease_info(COLLECTOR_LEASE),
+        "status_time": status["updated_time"] if status else None,
+        # workers de checagem e tamanho de cada shard (None sem --workers)
+        "shards": status.get("shards") if status else None,
+    }
+
+@router.get("/system/dns_cache")
+def dns_cache_stats(user: str = Depends(get_current_user)):
+    return collector_field("dns_cache")
+
+@router.get("/system/retention")
+def retention_report(user: str = Depends(get_current_user)):
+    # último relatório da limpeza (None até a primeira execução)
+    return collector_field("retention")
+
+@router.get("/system/cycles")
+def cycle_report(limit: int = Query(None, ge=1), user: str = Depends(get_current_user)):
+    # tempos por etapa dos ciclos recentes e hosts mais lentos
+    cycles = collector_field("cycles")
+
+    if cycles and limit:
+        cycles["recent"] = cycles["recent"][:limit]
+
+    return cycles
+
+@router.get("/metrics")
+def prometheus_metrics():
+    # formato texto do Prometheus, sem autenticação (scrape): métricas deste
+    # worker (latência da API) + as últimas publicadas pelo coletor
+    collector = collector_field("metrics") or ""
+    body = telemetry.registry.render(exclude=telemetry.families(collector)) + collector
+
+    return Response(body, media_type=telemetry.CONTENT_TYPE)
+
+@router.get("/events/stream")
+async def event_stream(request: Request, token: str, cursor: Optional[int] = None):
+    # EventSource não manda header Authorization: token vem na query
+    try:
+        decode_token(token)
+    except JWTError:
+        raise HTTPException(status_code=401, detail="Token inválido")
+
+    # reconexão automática do navegador manda o último id recebido
+    last_id = request.headers.get("last-event-id")
+    if last_id and last_id.isdigit():
+        cursor = int(last_id)
+
+    return StreamingResponse(
+        broadcaster.stream(cursor, request.is_disconnected),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
@@ -1,286 +1,122 @@
 from apscheduler.schedulers.background import BackgroundScheduler
-from datetime import datetime
 import time
 from sqlalchemy.orm import Session
-from Backend.database import SessionLocal
-from Backend.models import Host, CheckResult, Alert
-from Backend.checker import ping_host, tcp_check, resolve_dns_cached, http_check
-from Backend.metrics import calc_jitter_http, calc_jitter_ping, calc_jitter_tcp, calc_sla_rolling_http, calc_sla_rolling_ping, calc_sla_rolling_tcp, refine_severity, compute_health, calc_latency_trend_ping, classify_trend, calc_latency_trend_http, classify_trend_http
-from Backend.utils import close_incident, consecutive_failures, open_incident
+from Backend.clock import clock
+from Backend.database import ReadSession, SessionLocal
+from Backend.models import Host
+from Backend.cycles import CycleTimer, cycle_log
+from Backend.dns_cache import dns_cache, dns_prefetcher
+from Backend.engine import CheckEngine
+from Backend.host_scheduler import HostScheduler
+from Backend.metrics import refine_severity, compute_health, classify_trend, classify_trend_http
+from Backend.retention import run_retention
+from Backend.rolling import rolling_metrics
+from Backend.telemetry import cycle_seconds, gauge
+from Backend.writer import alert_row, check_row, incident_op, new_writes, write_buffer
 
 scheduler = BackgroundScheduler()
+engine = CheckEngine()
+
+# prefetch de DNS pelo mesmo backend das checagens (rede real ou simulada)
+dns_prefetcher.resolver = lambda name: engine.backend.resolve(name)
 
 ALERT_FAIL_THRESHOLD = 2
 ALERT_RECOVER_THRESHOLD = 1
 
-def check_all_hosts():
+# Campos do host que o ciclo altera (vão para o write buffer, não para a sessão)
+HOST_STATE_FIELDS = (
+    "dns_ttl", "dns_ttl_remaining", "last_ttl_alert", "status", "last_resolved_ip",
+    "fail_streak", "success_streak", "health_score", "severity", "last_check",
+    "sla_rolling_ping", "sla_rolling_tcp", "sla_rolling_http",
+    "jitter_ms_ping", "jitter_ms_tcp", "jitter_ms_http",
+    "slope", "trend", "slope_http", "trend_http",
+)
+
+def build_http_url(host):
+    # Se tiver URL customizada, usa ela
+    if host.http_url:
+        return host.http_url
+
+    # Se não tiver, monta automaticamente
+    if host.port in (80, 443):
+        protocol = "https" if host.port == 443 else "http"
+        return f"{protocol}://{host.address}"
+
+    # Porta diferente mas definida
+    if host.port:
+        return f"http://{host.address}:{host.port}"
+
+    return None
+
+def host_target(host):
+    return {
+        "id": host.id,
+        "name": host.name,
+        "address": host.address,
+        "port": host.port,
+        "url": build_http_url(host),
+    }
+
+def active_host_intervals():
+    db: Session = ReadSession()
+    try:
+        rows = db.query(Host.id, Host.check_interval).filter(Host.active == True).all()
+        return {host_id: interval for host_id, interval in rows}
+    finally:
+        db.close()
 
-    db: Session = SessionLocal()
+def load_batch(host_ids=None):
+    db: Session = ReadSession()
     try:
-        hosts = db.query(Host).filter(Host.active == True).all()
+        query = db.query(Host).filter(Host.active == True)
+        if host_ids is not None:
+            query = query.filter(Host.id.in_(host_ids))
+
+        return [host_target(h) for h in query.all()]
+
+    finally:
+        db.close()
+
+def save_batch(probes):
+    # devolve {host_id: (status, severity)} para o agendador adaptar o intervalo
+    outcome = {}
+
+    # write-behind das resoluções DNS novas (num worker de shard elas vão
+    # junto com os resultados para o escritor)
+    if not write_buffer.sink:
+        flush_dns_cache()
+
+    # leitura num leitor: quem grava é o write buffer
+    db: Session = ReadSession()
+    try:
+        # buffers de métricas: lidos do banco só na primeira vez
+        rolling_metrics.warm(db)
+
+        hosts = db.query(Host).filter(Host.id.in_(list(probes))).all()
 
         for host in hosts:
             try:
-                old_status = host.status
-
-                # =====================
-                # DNS
-                # =====================
-                dns_result = resolve_dns_cached(host.address, db)
-
-                ips = []
-                ttl = None
-                ttl_remaining = None
-
-                if isinstance(dns_result, tuple):
-                    if len(dns_result) == 3:
-                        ips, ttl, ttl_remaining = dns_result
-                    elif len(dns_result) == 1:
-                        ips = dns_result[0]
-                elif isinstance(dns_result, list):
-                    ips = dns_result
-
-                if ttl is not None:
-                    host.dns_ttl = ttl
-                if ttl_remaining is not None:
-                    host.dns_ttl_remaining = ttl_remaining
-
-                # alerta TTL baixo
-                if ttl is not None and ttl < 60:
-                    if not host.last_ttl_alert or (datetime.utcnow() - host.last_ttl_alert).seconds > 3600:
-                        db.add(Alert(
-                            host_id=host.id,
-                            alert_type="DNS_TTL_LOW",
-                            old_status="ttl",
-                            new_status=str(ttl)
-                        ))
-                        host.last_ttl_alert = datetime.utcnow()
-
-                # =====================
-                # DNS FAIL
-                # =====================
-                if not ips:
-                    host.status = "DOWN"
-                    host.last_resolved_ip = None
-
-                    db.add(CheckResult(
-                        host_id=host.id,
-                        host_name=host.name,
-                        check_type="dns",
-                        success=False,
-                        latency=None,
-                        error="DNS resolve failed"
-                    ))
-
-                    host.fail_streak = (host.fail_streak or 0) + 1
-                    host.success_streak = 0
-
-                    db.commit()
-                    continue
-
-                # DNS OK log
-                db.add(CheckResult(
-                    host_id=host.id,
-                    host_name=host.name,
-                    check_type="dns",
-                    success=True,
-                    latency=None,
-                    error=None
-                ))
-
-                # =====================
-                # Escolha IP rotativo
-                # =====================
-                index = (host.id + int(time.time()/20)) % len(ips)
-                ip = ips[index]
-
-                if host.last_resolved_ip and host.last_resolved_ip not in ips:
-                    db.add(Alert(
-                        host_id=host.id,
-                        alert_type="DNS_CHANGE",
-                        old_status=host.last_resolved_ip,
-                        new_status=str(ips)
-                    ))
-
-                host.last_resolved_ip = ip
-
-                # =====================
-                # CHECKS
-                # =====================
-                
-                #ping
-                ping_result = ping_host(ip)
-
-                #tcp
-                tcp_result = None
-                if host.port:
-                    tcp_result = tcp_check(ip, host.port)
-                
-                #http
-                http_result = None
-                url = None
-
-                # Se tiver URL customizada, usa ela
-                if host.http_url:
-                    url = host.http_url
-
-                # Se não tiver, monta automaticamente
-                elif host.port in (80, 443):
-                    protocol = "https" if host.port == 443 else "http"
-                    url = f"{protocol}://{host.address}"
-
-                # Porta diferente mas definida
-                elif host.port:
-                    url = f"http://{host.address}:{host.port}"
-
-                # Executa check se montou URL
-                if url:
-                    http_result = http_check(url)
-
-                    
-                score, severity = compute_health(ping_result, tcp_result, http_result)
-
-                host.health_score = score
-                host.severity = severity
-
-                if consecutive_failures(db,host.name, limit=3):
-                    open_incident(db, host.name, "Host indisponível")
-
-                elif severity == "HEALTHY":
-                    close_incident(db, host.name)
-
-                if severity == "CRITICAL":
-                    db.add(Alert(
-                        host_id=host.id,
-                        alert_type="HEALTH_CRITICAL",
-                        old_status=old_status,
-                        new_status=f"score={score}"
-                    ))
-
-                # =====================
-                # STATUS ENGINE (CORRETO)
-                # =====================
-
-                if http_result and not http_result["success"]:
-                    new_status = "DEGRADED"
-
-                elif http_result and http_result.get("status_code") and 500 <= http_result["status_code"] < 600:
-                    new_status = "CRITICAL"
-                
-                elif not ping_result["success"] and not tcp_result:
-                    new_status = "DOWN"
-                    
-                elif ping_result["success"]:
-                    new_status = "UP"
-
-                elif not ping_result["success"] and tcp_result and tcp_result["success"]:
-                    new_status = "UP"  # Condicao para ICMP bloqueado, gov.br ou site do if
-
-                elif tcp_result and not tcp_result["success"]:
-                    new_status = "DEGRADED"
-
-                else:
-                    new_status = "DOWN"
-
-                host.status = new_status
-
-                # =====================
-                # STREAK ENGINE
-                # =====================
-                if new_status == "UP":
-                    host.success_streak = (host.success_streak or 0) + 1
-                    host.fail_streak = 0
-
-                elif new_status == "DEGRADED":
-                    host.success_streak = 0
-
-                else:
-                    host.fail_streak = (host.fail_streak or 0) + 1
-                    host.success_streak = 0
-
-                # =====================
-                # ALERTAS TRANSIÇÃO
-                # =====================
-                if old_status and old_status != new_status:
-
-                    if new_status != "UP" and host.fail_streak >= ALERT_FAIL_THRESHOLD:
-                        db.add(Alert(
-                            host_id=host.id,
-                            old_status=old_status,
-                            new_status=new_status
-                        ))
-
-                    elif new_status == "UP" and host.success_streak >= ALERT_RECOVER_THRESHOLD:
-                        db.add(Alert(
-                            host_id=host.id,
-                            old_status=old_status,
-                            new_status="UP_RECOVERED"
-                        ))
-
-                host.last_check = datetime.utcnow()
-
-                # =====================
-                # LOG CHECKS
-                # =====================
-                db.add(CheckResult(
-                    host_id=host.id,
-                    host_name=host.name,
-                    check_type="ping",
-                    success=ping_result["success"],
-                    latency=ping_result.get("latency"),
-                    error=ping_result.get("error")
-                ))
-
-                if tcp_result:
-                    db.add(CheckResult(
-                        host_id=host.id,
-                        host_name=host.name,
-                        check_type="tcp",
-                        success=tcp_result["success"],
-                        latency=tcp_result.get("latency"),
-                        error=tcp_result.get("error")
-                    ))
-
-                if http_result:
-                    db.add(CheckResult(
-                        host_id=host.id,
-                        host_name=host.name,
-                        check_type="http",
-                        success=http_result["success"],
-                        latency=http_result.get("latency"),
-                        error=http_result.get("error")
-                    ))
-
-                host.sla_rolling_ping = calc_sla_rolling_ping(db, host.id, 50)
-                host.jitter_ms_ping = calc_jitter_ping(db, host.id, 10)
-                
-                host.sla_rolling_tcp = calc_sla_rolling_tcp(db, host.id, 50)
-                host.jitter_ms_tcp = calc_jitter_tcp(db, host.id, 10)
-
-                host.sla_rolling_http = calc_sla_rolling_http(db, host.id, 50)
-                host.jitter_ms_http = calc_jitter_http(db, host.id, 10) 
-
-                host.slope = calc_latency_trend_ping(db, host.id, 10)
-                host.trend = classify_trend(host.slope)
-
-                host.slope_http = calc_latency_trend_http(db, host.id, 10)
-                host.trend_http = classify_trend_http(host.slope_http)
+                # estado ainda no buffer é mais novo que o do banco
+                write_buffer.overlay(host)
 
-    
-                host.severity = refine_severity(
-                    host.severity,
-                    host.sla_rolling_ping,
-                    host.sla_rolling_tcp,
-                    host.sla_rolling_http,
-                    host.jitter_ms_ping,
-                    host.jitter_ms_tcp,
-                    host.jitter_ms_http
+                writes = new_writes()
+                started = time.perf_counter()
+                apply_probe(host, probes[host.id], writes)
+
+                probes[host.id].setdefault("timings", {})["metrics"] = time.perf_counter() - started
+
+                write_buffer.add(
+                    writes,
+                    host.id,
+                    {f: getattr(host, f) for f in HOST_STATE_FIELDS}
                 )
-                db.commit()
+                outcome[host.id] = (host.status, host.severity)
 
             except Exception as e:
                 print(f"[HOST ERROR] {host.name}: {e}")
-                db.rollback()
+
+        # a sessão só leu; quem grava é o write buffer
+        db.rollback()
 
     except Exception as e:
         print(f"[SCHEDULER ERROR] {e}")
@@ -288,44 +124,246 @@ def check_all_hosts():
     finally:
         db.close()
 
+    write_buffer.maybe_flush()
 
-def trim_history(db, host_id, check_type, limit=500):
-    old = (
-        db.query(CheckResult)
-        .filter(CheckResult.host_id == host_id,
-                CheckResult.check_type == check_type)
-        .order_by(CheckResult.timestamp.desc())
-        .offset(limit)
-        .all()
-    )
+    return outcome
+
+def check_all_hosts():
+    # checagem única de todos os hosts ativos (fora do agendador por host)
+    cycle = CycleTimer("check_all_hosts")
+
+    with cycle.phase("load"):
+        targets = load_batch()
+
+    with cycle.phase("probe"):
+        probes = engine.run(targets)
+
+    with cycle.phase("save"):
+        outcome = save_batch(probes)
+        write_buffer.flush()
+
+    summary = cycle.finish(targets, probes)
+    cycle_log.record(summary)
+    cycle_seconds.observe(summary["ms"] / 1000, source="check_all_hosts")
+
+    return outcome
+
+host_scheduler = HostScheduler(
+    engine, active_host_intervals, load_batch, save_batch,
+    flush=write_buffer.maybe_flush
+)
+
+gauge("noc_scheduler_queue_depth", "Hosts vencidos esperando sair num lote", host_scheduler.queue_depth)
+gauge("noc_scheduler_hosts", "Hosts na agenda", host_scheduler.scheduled)
+gauge("noc_scheduler_batches_running", "Lotes de checagem em andamento", host_scheduler.batches_running)
+
+def record_check(writes, host, check_type, result, **extra):
+    writes["checks"].append(check_row(host, check_type, result, **extra))
+    rolling_metrics.record(host.id, check_type, result["success"], result.get("latency"))
+
+def apply_probe(host, probe, writes):
+    old_status = host.status
+
+    # =====================
+    # DNS
+    # =====================
+    ips, ttl, ttl_remaining = probe["dns"]
+
+    if ttl is not None:
+        host.dns_ttl = ttl
+    if ttl_remaining is not None:
+        host.dns_ttl_remaining = ttl_remaining
+
+    # alerta TTL baixo
+    if ttl is not None and ttl < 60:
+        if not host.last_ttl_alert or (clock.utcnow() - host.last_ttl_alert).seconds > 3600:
+            writes["alerts"].append(alert_row(host.id, "ttl", str(ttl), "DNS_TTL_LOW"))
+            host.last_ttl_alert = clock.utcnow()
+
+    # =====================
+    # DNS FAIL
+    # =====================
+    if not ips:
+        host.status = "DOWN"
+        host.last_resolved_ip = None
+
+        record_check(writes, host, "dns", {"success": False, "error": "DNS resolve failed"})
+
+        host.fail_streak = (host.fail_streak or 0) + 1
+        host.success_streak = 0
+        return
 
-    for row in old:
-        db.delete(row)
+    # DNS OK log
+    record_check(writes, host, "dns", {"success": True})
+
+    # =====================
+    # IP rotativo (escolhido pelo engine)
+    # =====================
+    ip = probe["ip"]
+
+    if host.last_resolved_ip and host.last_resolved_ip not in ips:
+        writes["alerts"].append(
+            alert_row(host.id, host.last_resolved_ip, str(ips), "DNS_CHANGE")
+        )
+
+    host.last_resolved_ip = ip
+
+    # =====================
+    # CHECKS
+    # =====================
+    ping_result = probe["ping"]
+    tcp_result = probe["tcp"]
+    http_result = probe["http"]
+
+    score, severity = compute_health(ping_result, tcp_result, http_result)
+
+    host.health_score = score
+    host.severity = severity
+
+    if rolling_metrics.consecutive_failures(host.id):
+        writes["incidents"].append(incident_op("open", host.name, "Host indisponível"))
+
+    elif severity == "HEALTHY":
+        writes["incidents"].append(incident_op("close", host.name))
+
+    if severity == "CRITICAL":
+        writes["alerts"].append(
+            alert_row(host.id, old_status, f"score={score}", "HEALTH_CRITICAL")
+        )
+
+    # =====================
+    # STATUS ENGINE (CORRETO)
+    # =====================
+
+    if http_result and not http_result["success"]:
+        new_status = "DEGRADED"
+
+    elif http_result and http_result.get("status_code") and 500 <= http_result["status_code"] < 600:
+        new_status = "CRITICAL"
+    
+    elif not ping_result["success"] and not tcp_result:
+        new_status = "DOWN"
+        
+    elif ping_result["success"]:
+        new_status = "UP"
+
+    elif not ping_result["success"] and tcp_result and tcp_result["success"]:
+        new_status = "UP"  # Condicao para ICMP bloqueado, gov.br ou site do if
+
+    elif tcp_result and not tcp_result["success"]:
+        new_status = "DEGRADED"
+
+    else:
+        new_status = "DOWN"
+
+    host.status = new_status
+
+    # =====================
+    # STREAK ENGINE
+    # =====================
+    if new_status == "UP":
+        host.success_streak = (host.success_streak or 0) + 1
+        host.fail_streak = 0
+
+    elif new_status == "DEGRADED":
+        host.success_streak = 0
+
+    else:
+        host.fail_streak = (host.fail_streak or 0) + 1
+        host.success_streak = 0
+
+    # =====================
+    # ALERTAS TRANSIÇÃO
+    # =====================
+    if old_status and old_status != new_status:
+
+        if new_status != "UP" and host.fail_streak >= ALERT_FAIL_THRESHOLD:
+            writes["alerts"].append(alert_row(host.id, old_status, new_status))
+
+        elif new_status == "UP" and host.success_streak >= ALERT_RECOVER_THRESHOLD:
+            writes["alerts"].append(alert_row(host.id, old_status, "UP_RECOVERED"))
+
+    host.last_check = clock.utcnow()
+
+    # =====================
+    # LOG CHECKS
+    # =====================
+    record_check(writes, host, "ping", ping_result)
+
+    if tcp_result:
+        record_check(writes, host, "tcp", tcp_result)
+
+    if http_result:
+        record_check(
+            writes, host, "http", http_result,
+            dns_ms=http_result.get("dns_ms"),
+            connect_ms=http_result.get("connect_ms"),
+            tls_ms=http_result.get("tls_ms"),
+            ttfb_ms=http_result.get("ttfb_ms")
+        )
+
+    # SLA, jitter e slope vêm dos ring buffers (sem consulta ao banco)
+    for field, value in rolling_metrics.snapshot(host.id).items():
+        setattr(host, field, value)
+
+    host.trend = classify_trend(host.slope)
+    host.trend_http = classify_trend_http(host.slope_http)
+
+
+    host.severity = refine_severity(
+        host.severity,
+        host.sla_rolling_ping,
+        host.sla_rolling_tcp,
+        host.sla_rolling_http,
+        host.jitter_ms_ping,
+        host.jitter_ms_tcp,
+        host.jitter_ms_http
+    )
 
 def cleanup_old_data():
-    db: Session = SessionLocal()
     try:
-        # Pega todos os IDs de hosts ativos
-        hosts = db.query(Host).all()
-        for host in hosts:
-            for c_type in ["ping", "tcp", "http", "dns"]:
-                trim_history(db, host.id, c_type, limit=100)
-        db.commit()
-        print(f"[{datetime.now()}] Limpeza de histórico concluída.")
+        run_retention()
     except Exception as e:
         print(f"[CLEANUP ERROR] {e}")
+
+def flush_dns_cache():
+    if write_buffer.fenced:
+        return
+
+    db: Session = SessionLocal()
+    try:
+        dns_cache.flush(db)
+    except Exception as e:
+        print(f"[DNS CACHE ERROR] {e}")
     finally:
         db.close()
 
-def start_scheduler():
-    # Tarefa Principal
-    scheduler.add_job(
-        check_all_hosts,
-        "interval",
-        seconds=10,
-        id="check_hosts_job",
-        replace_existing=True
-    )
+def warm_dns_cache():
+    db: Session = ReadSession()
+    try:
+        dns_cache.warm(db)
+    except Exception as e:
+        print(f"[DNS CACHE ERROR] {e}")
+    finally:
+        db.close()
+
+def warm_rolling_metrics(host_ids=None):
+    db: Session = ReadSession()
+    try:
+        rolling_metrics.warm(db, host_ids)
+    except Exception as e:
+        print(f"[ROLLING ERROR] {e}")
+    finally:
+        db.close()
+
+def start_scheduler(check_hosts=True):
+    # check_hosts=False: coletor com workers de shard, aqui só a limpeza
+    if check_hosts:
+        warm_dns_cache()
+        dns_prefetcher.start()
+
+        # Tarefa Principal: cada host no seu próprio intervalo
+        host_scheduler.start()
 
     # Tarefa de limpeza (roda a cada 1 hora)
     scheduler.add_job(
@@ -338,4 +376,12 @@ def start_scheduler():
 
     scheduler.start()
 
+def stop_scheduler(wait=10, flush=True):
+    # flush=False: lease perdido, outro coletor já grava (write_buffer.fence)
+    scheduler.shutdown(wait=False)
+    dns_prefetcher.stop()
+    host_scheduler.stop(wait)
 
+    # o que sobrou no buffer (check_all_hosts e lotes cancelados)
+    if flush:
+        write_buffer.flush()
@@ -1,5 +1,6 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 from typing import Optional
+from Backend.host_scheduler import MIN_INTERVAL
 
 class HostCreate(BaseModel):
     name: str
@@ -10,9 +11,11 @@ class HostUpdate(BaseModel):
     address: str
     port: Optional[int] = None
     http_url: Optional[str] = None
+    check_interval: Optional[int] = Field(None, ge=MIN_INTERVAL)
 
 class HostCreate(BaseModel):
     name: str
     address: str
     port: Optional[int] = None
-    http_url: Optional[str] = None
\ No newline at end of file
+    http_url: Optional[str] = None
+    check_interval: Optional[int] = Field(None, ge=MIN_INTERVAL)
\ No newline at end of file
@@ -0,0 +1,325 @@
+import bisect
+import hashlib
+import multiprocessing
+import queue
+import signal
+import threading
+import time
+from datetime import datetime
+from Backend import scheduler
+from Backend.cycles import cycle_log
+from Backend.dns_cache import dns_cache, dns_prefetcher
+from Backend.host_scheduler import HostScheduler
+from Backend.leases import acquire, holders, lease_expiring, process_owner, prune, release
+from Backend.rolling import rolling_metrics
+from Backend.telemetry import cycle_seconds
+from Backend.writer import FLUSH_MAX_AGE, write_buffer
+
+# Coletor com shards: os hosts ativos são divididos entre N processos worker
+# (hash consistente no id do host), cada um com seu GIL, engine e agenda.
+#
+#   python -m Backend.collector --workers 4
+#
+# - cada worker segura um lease "worker:<dono>" no banco; os membros do anel
+#   são os leases válidos, então worker morto ou travado sai do anel quando o
+#   lease vence e só o shard dele é redistribuído
+# - workers não gravam: checks, alertas, incidentes, estado dos hosts e
+#   resoluções DNS vão por fila para o processo coletor, que é o escritor único
+
+WORKER_LEASE_PREFIX = "worker:"
+
+# Prazo do lease de cada worker e intervalo de renovação (também é de quanto
+# em quanto tempo o worker relê o anel e a lista de hosts)
+WORKER_LEASE_TTL = 15
+WORKER_RENEW_INTERVAL = 5
+
+# Pontos de cada worker no anel (mais pontos, divisão mais uniforme)
+VNODES = 64
+
+# Escritor: espera por resultados antes de checar o flush por tempo
+WRITER_POLL = 0.5
+
+# Tempo para um worker terminar os lotes em andamento ao parar
+STOP_WAIT = 10
+
+# Host que veio de outro worker só entra na agenda depois desse tempo: o dono
+# anterior ainda pode checá-lo até reler o anel, e o resultado passa pelo
+# buffer dele, pela fila e pelo buffer do escritor antes de chegar ao banco.
+# Só então as métricas rolantes são relidas
+HANDOFF_DELAY = WORKER_RENEW_INTERVAL + 2 * FLUSH_MAX_AGE + WRITER_POLL
+
+
+def _point(key):
+    return int.from_bytes(hashlib.md5(str(key).encode()).digest()[:8], "big")
+
+
+# Anel de hash consistente: entrar ou sair um membro só move os hosts que
+# caem nos pontos dele
+class HashRing:
+
+    def __init__(self, members, vnodes=VNODES):
+        self.members = sorted(members)
+
+        points = sorted(
+            (_point(f"{member}#{i}"), member)
+            for member in self.members
+            for i in range(vnodes)
+        )
+        self._points = [p for p, _ in points]
+        self._owners = [m for _, m in points]
+
+    def owner(self, key):
+        if not self._points:
+            return None
+
+        i = bisect.bisect(self._points, _point(key)) % len(self._points)
+        return self._owners[i]
+
+
+# =====================
+# WORKER (processo filho)
+# =====================
+class Shard:
+
+    def __init__(self, owner):
+        self.owner = owner
+        self.name = WORKER_LEASE_PREFIX + owner
+        self.ring = HashRing(())
+        self.hosts = {}
+
+        # {host_id: monotonic}: hosts novos no shard esperando o handoff
+        self.handoff = {}
+
+    def intervals(self):
+        # load_hosts da agenda do worker: só os hosts que caem neste shard
+        members = holders(WORKER_LEASE_PREFIX)
+
+        # quem tinha cada host antes (primeira leitura: os outros membros)
+        previous = self.ring if self.ring.members else HashRing(m for m in members if m != self.name)
+        self.ring = HashRing(members)
+
+        hosts = {
+            host_id: interval
+            for host_id, interval in scheduler.active_host_intervals().items()
+            if self.ring.owner(host_id) == self.name
+        }
+
+        now = time.monotonic()
+
+        for host_id in hosts:
+            if host_id not in self.hosts and host_id not in self.handoff:
+                before = previous.owner(host_id)
+                self.handoff[host_id] = now if before in (None, self.name) else now + HANDOFF_DELAY
+
+        self.handoff = {host_id: at for host_id, at in self.handoff.items() if host_id in hosts}
+
+        # hosts que chegaram: SLA, jitter, slope e falhas seguidas relidos do
+        # banco, já com os últimos resultados do dono anterior
+        arrived = [host_id for host_id, at in self.handoff.items() if at <= now]
+        for host_id in arrived:
+            del self.handoff[host_id]
+
+        self.hosts = {host_id: interval for host_id, interval in hosts.items() if host_id not in self.handoff}
+
+        write_buffer.forget(self.hosts)
+        rolling_metrics.forget(self.hosts)
+
+        if arrived:
+            scheduler.warm_rolling_metrics(arrived)
+
+        return self.hosts
+
+    def status(self):
+        return {
+            "hosts": len(self.hosts),
+            "handoff": len(self.handoff),
+            "members": len(self.ring.members),
+            "dns_cache": dns_cache.stats(),
+            "updated_time": datetime.utcnow().isoformat(),
+        }
+
+
+def new_cycles(after):
+    # ciclos gravados depois do id "after", do mais antigo para o mais novo
+    return [c for c in reversed(cycle_log.recent()) if c["id"] > after]
+
+
+def worker_main(results, stopping):
+    # Ctrl+C chega ao grupo todo; quem para os workers é o coletor
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+
+    done = threading.Event()
+    signal.signal(signal.SIGTERM, lambda *_: done.set())
+
+    owner = process_owner()
+    shard = Shard(owner)
+
+    renewed_at = time.monotonic()
+    if not acquire(shard.name, owner, WORKER_LEASE_TTL):
+        return
+
+    # o flush do write buffer entrega tudo ao escritor (com o DNS junto)
+    write_buffer.sink = lambda *pending: results.put(("writes", pending, dns_cache.take_dirty()))
+
+    hosts = HostScheduler(
+        scheduler.engine, shard.intervals, scheduler.load_batch, scheduler.save_batch,
+        flush=write_buffer.maybe_flush,
+        sync_interval=WORKER_RENEW_INTERVAL
+    )
+
+    scheduler.warm_dns_cache()
+    dns_prefetcher.start()
+    hosts.start()
+
+    parent = multiprocessing.parent_process()
+    sent = 0
+
+    try:
+        while not done.wait(WORKER_RENEW_INTERVAL) and not stopping.is_set():
+            # coletor morto: ninguém lê a fila
+            if parent and not parent.is_alive():
+                break
+
+            attempt = time.monotonic()
+
+            try:
+                renewed = acquire(shard.name, owner, WORKER_LEASE_TTL)
+            except Exception as e:
+                print(f"[SHARD ERROR] renovação do lease: {e}")
+
+                # banco ocupado: segue se o lease ainda não estiver para vencer
+                if not lease_expiring(renewed_at, WORKER_LEASE_TTL, WORKER_RENEW_INTERVAL):
+                    continue
+
+                renewed = False
+
+            if not renewed:
+                # o shard deste worker já pode estar com outro
+                print(f"[SHARD ERROR] lease perdido, {owner} saindo")
+                break
+
+            renewed_at = attempt
+
+            cycles = new_cycles(sent)
+            if cycles:
+                sent = cycles[-1]["id"]
+
+            results.put(("status", owner, shard.status(), cycles))
+
+    finally:
+        hosts.stop(STOP_WAIT)
+        dns_prefetcher.stop()
+        write_buffer.flush()
+        release(shard.name, owner)
+
+
+# =====================
+# COLETOR (processo pai)
+# =====================
+class ShardPool:
+
+    def __init__(self, size):
+        self.size = size
+        self._ctx = multiprocessing.get_context("spawn")
+        self.results = self._ctx.Queue()
+        self.stopping = self._ctx.Event()
+        self.processes = []
+        self.workers = {}
+
+        self._thread = None
+        self._drained = False
+
+    def start(self):
+        for _ in range(self.size):
+            self._spawn()
+
+        self._thread = threading.Thread(target=self._write, name="shard-writer", daemon=True)
+        self._thread.start()
+
+    def _spawn(self):
+        process = self._ctx.Process(
+            target=worker_main,
+            args=(self.results, self.stopping),
+            name="noc-shard",
+            daemon=True
+        )
+        process.start()
+        self.processes.append(process)
+
+    def supervise(self):
+        # worker que saiu: solta o lease dele (o shard é redistribuído já, sem
+        # esperar vencer) e sobe outro no lugar
+        if self.stopping.is_set():
+            return
+
+        for process in list(self.processes):
+            if process.is_alive():
+                continue
+
+            print(f"[SHARDS] worker {process.pid} saiu ({process.exitcode}), subindo outro")
+            owner = process_owner(process.pid)
+            release(WORKER_LEASE_PREFIX + owner, owner)
+
+            self.processes.remove(process)
+            self._spawn()
+
+        prune(WORKER_LEASE_PREFIX)
+
+    def _apply(self, message):
+        kind = message[0]
+
+        if kind == "writes":
+            _, pending, dns = message
+            write_buffer.merge(*pending)
+
+            if dns:
+                dns_cache.merge_dirty(dns)
+
+        elif kind == "status":
+            _, owner, status, cycles = message
+            self.workers[owner] = status
+
+            for cycle in cycles:
+                cycle_log.record({**{k: v for k, v in cycle.items() if k != "id"}, "worker": owner})
+                cycle_seconds.observe(cycle["ms"] / 1000, source=cycle["source"])
+
+    def _write(self):
+        # escritor único: junta no write buffer daqui o que os workers mandam
+        while True:
+            try:
+                self._apply(self.results.get(timeout=WRITER_POLL))
+            except queue.Empty:
+                if self._drained:
+                    break
+
+            except Exception as e:
+                print(f"[SHARDS ERROR] {e}")
+
+            write_buffer.maybe_flush()
+            scheduler.flush_dns_cache()
+
+    def status(self):
+        live = holders(WORKER_LEASE_PREFIX).values()
+
+        for owner in [o for o in self.workers if o not in live]:
+            del self.workers[owner]
+
+        return {
+            "size": self.size,
+            "workers": [{"owner": owner, **self.workers.get(owner, {})} for owner in sorted(live)],
+        }
+
+    def stop(self, wait=STOP_WAIT):
+        self.stopping.set()
+
+        for process in self.processes:
+            process.join(wait)
+
+            if process.is_alive():
+                process.terminate()
+
+        # o escritor para quando a fila esvaziar
+        self._drained = True
+
+        if self._thread:
+            self._thread.join(wait)
@@ -0,0 +1,282 @@
+import bisect
+import threading
+
+# Métricas internas do monitor no formato texto do Prometheus (GET /metrics).
+#
+# O caminho quente só mexe em memória do próprio thread: cada thread tem sua
+# célula por métrica e a leitura (scrape) soma as células de todos. Lock só
+# na primeira escrita de um thread novo. Gauges que já existem em outro lugar
+# (fila, buffer, cache DNS) são lidos por callback na hora do scrape.
+
+# Faixas (segundos) dos histogramas
+CYCLE_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+PROBE_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+FLUSH_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5)
+REQUEST_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5)
+LOCK_BUCKETS = (0.0001, 0.001, 0.005, 0.01, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def _label_text(names, values):
+    if not names:
+        return ""
+
+    pairs = []
+    for name, value in zip(names, values):
+        value = str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+        pairs.append(f'{name}="{value}"')
+
+    return "{" + ",".join(pairs) + "}"
+
+
+def _number(value):
+    if value == float("inf"):
+        return "+Inf"
+
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+
+    return repr(value) if isinstance(value, float) else str(value)
+
+
+class _Metric:
+    kind = None
+
+    def __init__(self, name, help, labels=()):
+        self.name = name
+        self.help = help
+        self.labels = tuple(labels)
+        self._local = threading.local()
+        self._cells = []
+        self._lock = threading.Lock()
+
+    def _cell(self):
+        # dict do thread atual {valores dos labels: valor}
+        cell = getattr(self._local, "cell", None)
+
+        if cell is None:
+            cell = self._local.cell = {}
+            with self._lock:
+                self._cells.append(cell)
+
+        return cell
+
+    def _key(self, labels):
+        return tuple(labels.get(name, "") for name in self.labels)
+
+    def header(self):
+        return [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+
+
+# Contador somado das células ou lido de uma função no scrape (callback)
+class Counter(_Metric):
+    kind = "counter"
+
+    def __init__(self, name, help, labels=(), callback=None):
+        super().__init__(name, help, labels)
+        self.callback = callback
+
+    def inc(self, amount=1, **labels):
+        cell = self._cell()
+        key = self._key(labels)
+        cell[key] = cell.get(key, 0) + amount
+
+    def values(self):
+        if self.callback is not None:
+            value = self.callback()
+
+            # callback devolve um número ou {valor do label: número}
+            if isinstance(value, dict):
+                return {k if isinstance(k, tuple) else (k,): v for k, v in value.items() if v is not None}
+
+            return {} if value is None else {(): value}
+
+        totals = {}
+
+        with self._lock:
+            cells = list(self._cells)
+
+        for cell in cells:
+            for key, value in list(cell.items()):
+                totals[key] = totals.get(key, 0) + value
+
+        return totals
+
+    def render(self):
+        lines = self.header()
+        values = self.values()
+
+        # sem labels a série existe desde o início (0)
+        if not values and not self.labels and self.callback is None:
+            values = {(): 0}
+
+        for key, value in sorted(values.items()):
+            lines.append(f"{self.name}{_label_text(self.labels, key)} {_number(value)}")
+
+        return lines
+
+
+# Como o contador, mas pode descer
+class Gauge(Counter):
+    kind = "gauge"
+
+    def dec(self, amount=1, **labels):
+        self.inc(-amount, **labels)
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name, help, labels=(), buckets=PROBE_BUCKETS):
+        super().__init__(name, help, labels)
+        self.buckets = tuple(buckets)
+
+    def observe(self, value, **labels):
+        cell = self._cell()
+        key = self._key(labels)
+        slots = cell.get(key)
+
+        if slots is None:
+            # contagem por faixa (+Inf no fim), soma
+            slots = cell[key] = [0] * (len(self.buckets) + 1) + [0.0]
+
+        slots[bisect.bisect_left(self.buckets, value)] += 1
+        slots[-1] += value
+
+    def values(self):
+        totals = {}
+
+        with self._lock:
+            cells = list(self._cells)
+
+        for cell in cells:
+            for key, slots in list(cell.items()):
+                total = totals.get(key)
+                if total is None:
+                    totals[key] = list(slots)
+                else:
+                    totals[key] = [a + b for a, b in zip(total, slots)]
+
+        return totals
+
+    def render(self):
+        lines = self.header()
+        bounds = self.buckets + (float("inf"),)
+
+        for key, slots in sorted(self.values().items()):
+            cumulative = 0
+
+            for bound, count in zip(bounds, slots):
+                cumulative += count
+                labels = _label_text(self.labels + ("le",), key + (_number(float(bound)),))
+                lines.append(f"{self.name}_bucket{labels} {cumulative}")
+
+            labels = _label_text(self.labels, key)
+            lines.append(f"{self.name}_sum{labels} {_number(round(slots[-1], 6))}")
+            lines.append(f"{self.name}_count{labels} {cumulative}")
+
+        return lines
+
+
+class Registry:
+
+    def __init__(self):
+        self.metrics = []
+
+    def add(self, metric):
+        self.metrics.append(metric)
+        return metric
+
+    def counter(self, name, help, labels=(), callback=None):
+        return self.add(Counter(name, help, labels, callback))
+
+    def gauge(self, name, help, labels=(), callback=None):
+        return self.add(Gauge(name, help, labels, callback))
+
+    def histogram(self, name, help, labels=(), buckets=PROBE_BUCKETS):
+        return self.add(Histogram(name, help, labels, buckets))
+
+    def render(self, exclude=()):
+        lines = []
+
+        for metric in self.metrics:
+            if metric.name in exclude:
+                continue
+
+            try:
+                lines.extend(metric.render())
+            except Exception as e:
+                print(f"[TELEMETRY ERROR] {metric.name}: {e}")
+
+        return "\n".join(lines) + "\n"
+
+
+registry = Registry()
+
+
+def families(text):
+    # nomes das métricas num texto já renderizado (linhas "# TYPE nome tipo")
+    return {line.split()[2] for line in text.splitlines() if line.startswith("# TYPE ")}
+
+
+# =====================
+# MÉTRICAS
+# =====================
+cycle_seconds = registry.histogram(
+    "noc_cycle_duration_seconds",
+    "Duração de um ciclo de checagem (carga, probes e gravação do lote)",
+    ("source",), CYCLE_BUCKETS,
+)
+cycle_overruns = registry.counter(
+    "noc_cycle_overruns_total",
+    "Hosts cujo próximo horário já tinha passado quando o ciclo terminou",
+)
+probe_seconds = registry.histogram(
+    "noc_probe_latency_seconds",
+    "Latência medida por checagem",
+    ("check_type", "success"), PROBE_BUCKETS,
+)
+probes_in_flight = registry.gauge(
+    "noc_probes_in_flight",
+    "Probes executando agora",
+    ("check_type",),
+)
+flush_seconds = registry.histogram(
+    "noc_db_flush_duration_seconds",
+    "Duração do flush do write buffer (uma transação)",
+    (), FLUSH_BUCKETS,
+)
+flush_rows = registry.counter(
+    "noc_db_flush_rows_total",
+    "Linhas gravadas pelo write buffer",
+    ("table",),
+)
+flush_errors = registry.counter(
+    "noc_db_flush_errors_total",
+    "Flushes do write buffer que falharam",
+)
+request_seconds = registry.histogram(
+    "noc_http_request_duration_seconds",
+    "Latência das requisições da API por rota",
+    ("method", "route", "status"), REQUEST_BUCKETS,
+)
+db_lock_wait = registry.histogram(
+    "noc_db_lock_wait_seconds",
+    "Espera pelo lock de escrita do SQLite (BEGIN IMMEDIATE)",
+    (), LOCK_BUCKETS,
+)
+db_busy = registry.counter(
+    "noc_db_busy_total",
+    "Comandos que desistiram com 'database is locked'",
+    ("role",),
+)
+
+
+# Valores que já são contados em outro módulo: lidos na hora do scrape
+def gauge(name, help, callback, labels=()):
+    return registry.gauge(name, help, labels, callback)
+
+
+def counter(name, help, callback, labels=()):
+    return registry.counter(name, help, labels, callback)
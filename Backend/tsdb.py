@@ -0,0 +1,440 @@
+import bisect
+import json
+import math
+import mmap
+import os
+import re
+import struct
+import threading
+from collections import OrderedDict
+from datetime import datetime, timezone
+
+# Série temporal das checagens em disco, fora do SQLite: por host e tipo de
+# checagem, registros de tamanho fixo em segmentos só de acréscimo, lidos
+# por mmap. Guarda semanas de amostras cruas ocupando uma fração da tabela
+# checks (16 bytes por checagem, sem nome do host, tipo nem texto do erro).
+#
+#   <raiz>/<host_id>/<check_type>/<primeiro timestamp>[.<n>].seg
+#   <raiz>/errors.jsonl            texto de cada código de erro (uma linha cada)
+#
+# O erro guardado é o texto normalizado (sem URL, IP, host, porta): a tabela de
+# códigos fica com os tipos de erro, não com um código por host. O texto cru
+# continua na tabela checks do SQLite.
+#
+# O segmento tem tamanho fixo (arquivo esparso, só ocupa o que foi escrito)
+# e um cabeçalho que é o índice dele: quantos registros e o primeiro/último
+# timestamp. Só o coletor escreve (listener do write buffer); a API lê os
+# mesmos arquivos em modo leitura e devolve fatias (memoryview) sem cópia.
+
+TSDB_PATH = os.getenv("NOC_TSDB_PATH", "./noclite.tsdb")
+
+# timestamp (epoch, float64), latência ms (float32, NaN sem latência),
+# código do erro (0 = sem erro), flags (bit 0 = sucesso), 1 byte de folga
+RECORD = struct.Struct("<dfHBx")
+
+# magic, registros gravados, capacidade, primeiro e último timestamp
+HEADER = struct.Struct("<8sIIdd")
+MAGIC = b"NOCTSDB1"
+
+# 65536 registros = 1 MiB por segmento (uma semana de checagens a cada 10s)
+SEGMENT_RECORDS = 65536
+
+# Segmentos mapeados ao mesmo tempo (cada mmap segura um descritor)
+MAX_OPEN_SEGMENTS = 256
+
+# Segmentos com tudo mais velho que isso são apagados inteiros
+TSDB_RETENTION_DAYS = 30
+
+SUCCESS = 1
+
+# Tipos de checagem com série (também viram nome de diretório)
+CHECK_TYPES = ("dns", "ping", "tcp", "http")
+
+# Códigos de erro: o último é o "outros" quando a tabela enche
+MAX_ERROR_CODES = 65535
+MAX_ERROR_LENGTH = 200
+
+# Partes do erro que variam por host (ordem importa: URL antes de host/IP)
+ERROR_PATTERNS = (
+    (re.compile(r"\b[a-zA-Z][\w+.-]*://[^\s'\"<>]+"), "<url>"),
+    (re.compile(r"\b\d{1,3}(?:\.\d{1,3}){3}(?::\d+)?\b"), "<ip>"),
+    (re.compile(r"\[?\b(?:[0-9a-fA-F]{0,4}:){2,7}[0-9a-fA-F]{0,4}\b\]?(?::\d+)?"), "<ip>"),
+    (re.compile(r"\b(?:[\w-]+\.)+[a-zA-Z]{2,}(?::\d+)?\b"), "<host>"),
+    (re.compile(r"\b\d{4,}\b"), "<n>"),
+)
+
+
+def epoch(dt):
+    # timestamps do monitor são UTC sem fuso
+    return dt.replace(tzinfo=timezone.utc).timestamp()
+
+
+def from_epoch(ts):
+    return datetime.fromtimestamp(ts, timezone.utc).replace(tzinfo=None)
+
+
+def normalize_error(text):
+    for pattern, placeholder in ERROR_PATTERNS:
+        text = pattern.sub(placeholder, text)
+
+    return text[:MAX_ERROR_LENGTH]
+
+
+def _segment_name(first_ts, seq=0):
+    # segundo do primeiro registro; .<n> quando outro segmento começou no
+    # mesmo segundo (o anterior encheu)
+    if seq:
+        return f"{int(first_ts):012d}.{seq}.seg"
+    return f"{int(first_ts):012d}.seg"
+
+
+def _segment_key(name):
+    # (segundo, n): ordem dos segmentos da série
+    parts = name[:-4].split(".")
+    return int(parts[0]), int(parts[1]) if len(parts) > 1 else 0
+
+
+# Texto dos erros <-> código de 16 bits. O arquivo só recebe linhas no fim
+# (código = número da linha); quem lê carrega só as linhas completas novas
+class ErrorCodes:
+
+    def __init__(self, path):
+        self.path = path
+        self._codes = {}
+        self._texts = [None]
+        self._offset = 0
+        self._lock = threading.Lock()
+        self._load()
+
+    def _load(self):
+        try:
+            with open(self.path, "rb") as f:
+                f.seek(self._offset)
+                data = f.read()
+        except FileNotFoundError:
+            return
+
+        complete = data[:data.rfind(b"\n") + 1]
+        self._offset += len(complete)
+
+        for line in complete.splitlines():
+            text = json.loads(line)
+            self._codes[text] = len(self._texts)
+            self._texts.append(text)
+
+    def code(self, text):
+        if not text:
+            return 0
+
+        text = normalize_error(text)
+
+        with self._lock:
+            code = self._codes.get(text)
+            if code is not None:
+                return code
+
+            if len(self._texts) >= MAX_ERROR_CODES:
+                return MAX_ERROR_CODES
+
+            line = (json.dumps(text) + "\n").encode()
+            with open(self.path, "ab") as f:
+                f.write(line)
+
+            code = len(self._texts)
+            self._texts.append(text)
+            self._codes[text] = code
+            self._offset += len(line)
+
+            return code
+
+    def text(self, code):
+        if not code:
+            return None
+
+        with self._lock:
+            if code >= len(self._texts):
+                # código novo gravado pelo coletor depois da última leitura
+                self._load()
+
+            return self._texts[code] if code < len(self._texts) else "outros"
+
+
+class Segment:
+
+    def __init__(self, path, writable=False):
+        self.path = path
+
+        with open(path, "r+b" if writable else "rb") as f:
+            self.mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_WRITE if writable else mmap.ACCESS_READ)
+
+        magic, _, self.capacity, _, _ = HEADER.unpack_from(self.mm)
+        if magic != MAGIC:
+            raise ValueError(f"segmento inválido: {path}")
+
+    @classmethod
+    def create(cls, path, first_ts, capacity=SEGMENT_RECORDS):
+        tmp = path + ".tmp"
+
+        with open(tmp, "wb") as f:
+            f.write(HEADER.pack(MAGIC, 0, capacity, first_ts, first_ts))
+            f.truncate(HEADER.size + capacity * RECORD.size)
+
+        os.replace(tmp, path)
+        return cls(path, writable=True)
+
+    def header(self):
+        # (registros, primeiro timestamp, último timestamp)
+        _, count, _, first, last = HEADER.unpack_from(self.mm)
+        return count, first, last
+
+    def append(self, records):
+        # records: [(ts, latency, code, flags)]; devolve quantos couberam
+        count, first, _ = self.header()
+        room = min(len(records), self.capacity - count)
+
+        for i in range(room):
+            RECORD.pack_into(self.mm, HEADER.size + (count + i) * RECORD.size, *records[i])
+
+        # o cabeçalho por último: quem lê só enxerga registros completos
+        if room:
+            HEADER.pack_into(self.mm, 0, MAGIC, count + room, self.capacity, first, records[room - 1][0])
+
+        return room
+
+    def _timestamp(self, i):
+        return RECORD.unpack_from(self.mm, HEADER.size + i * RECORD.size)[0]
+
+    def _search(self, count, ts):
+        # primeiro registro com timestamp >= ts (registros em ordem de tempo)
+        low, high = 0, count
+        while low < high:
+            mid = (low + high) // 2
+            if self._timestamp(mid) < ts:
+                low = mid + 1
+            else:
+                high = mid
+
+        return low
+
+    def slice(self, since, until):
+        # memoryview dos registros em [since, until), sem copiar
+        count, _, _ = self.header()
+        start = self._search(count, since) if since is not None else 0
+        end = self._search(count, until) if until is not None else count
+
+        return memoryview(self.mm)[HEADER.size + start * RECORD.size:HEADER.size + end * RECORD.size]
+
+    def close(self):
+        try:
+            self.mm.close()
+        except BufferError:
+            # ainda há fatias em uso: o mmap fecha quando a última sumir
+            pass
+
+
+class TimeSeriesStore:
+
+    def __init__(self, root=TSDB_PATH, segment_records=SEGMENT_RECORDS):
+        self.root = root
+        self.segment_records = segment_records
+        self.writable = False
+        self.errors = ErrorCodes(os.path.join(root, "errors.jsonl"))
+
+        self._open = OrderedDict()
+        self._tail = {}
+        self._lock = threading.Lock()
+
+    def start_writing(self):
+        # só no coletor: segmentos mapeados para escrita
+        os.makedirs(self.root, exist_ok=True)
+        self.writable = True
+
+    def _series_dir(self, host_id, check_type):
+        # check_type vira caminho: só os tipos conhecidos
+        if check_type not in CHECK_TYPES:
+            raise ValueError(f"tipo de checagem inválido: {check_type}")
+
+        return os.path.join(self.root, str(int(host_id)), check_type)
+
+    def _segment_files(self, host_id, check_type):
+        try:
+            names = os.listdir(self._series_dir(host_id, check_type))
+        except FileNotFoundError:
+            return []
+
+        return sorted((n for n in names if n.endswith(".seg")), key=_segment_key)
+
+    def _segment(self, path, first_ts=None):
+        # LRU de segmentos mapeados; com first_ts cria o arquivo
+        segment = self._open.get(path)
+
+        if segment is not None:
+            self._open.move_to_end(path)
+            return segment
+
+        if first_ts is not None:
+            segment = Segment.create(path, first_ts, self.segment_records)
+        else:
+            segment = Segment(path, writable=self.writable)
+
+        self._open[path] = segment
+
+        while len(self._open) > MAX_OPEN_SEGMENTS:
+            _, evicted = self._open.popitem(last=False)
+            evicted.close()
+
+        return segment
+
+    # =====================
+    # ESCRITA (coletor)
+    # =====================
+    def append(self, host_id, check_type, records):
+        key = (host_id, check_type)
+        directory = self._series_dir(host_id, check_type)
+
+        with self._lock:
+            while records:
+                path = self._tail.get(key)
+
+                if path is None:
+                    files = self._segment_files(host_id, check_type)
+                    if files:
+                        path = self._tail[key] = os.path.join(directory, files[-1])
+
+                segment = self._segment(path) if path else None
+
+                if segment is None or segment.header()[0] >= segment.capacity:
+                    os.makedirs(directory, exist_ok=True)
+                    first_ts = records[0][0]
+
+                    # nome já usado (segmento encheu no mesmo segundo): o próximo
+                    # .<n>, sem mexer no segundo (o cabeçalho e o nome batem)
+                    seq = 0
+                    while os.path.exists(os.path.join(directory, _segment_name(first_ts, seq))):
+                        seq += 1
+
+                    path = self._tail[key] = os.path.join(directory, _segment_name(first_ts, seq))
+                    segment = self._segment(path, first_ts=first_ts)
+
+                written = segment.append(records)
+                records = records[written:]
+
+    def store_checks(self, checks, alerts, incidents, hosts):
+        # listener do write buffer (depois do commit)
+        series = {}
+
+        for c in checks:
+            latency = c.get("latency")
+            series.setdefault((c["host_id"], c["check_type"]), []).append((
+                epoch(c["timestamp"]),
+                math.nan if latency is None else latency,
+                self.errors.code(c.get("error")),
+                SUCCESS if c["success"] else 0,
+            ))
+
+        for (host_id, check_type), records in series.items():
+            records.sort(key=lambda r: r[0])
+            self.append(host_id, check_type, records)
+
+    def trim(self, now, days=TSDB_RETENTION_DAYS):
+        # apaga segmentos inteiros mais velhos que a retenção
+        cutoff = now - days * 86400
+        removed = 0
+
+        if not os.path.isdir(self.root):
+            return 0
+
+        with self._lock:
+            for host_dir in os.listdir(self.root):
+                host_path = os.path.join(self.root, host_dir)
+                if not os.path.isdir(host_path):
+                    continue
+
+                for check_type in os.listdir(host_path):
+                    directory = os.path.join(host_path, check_type)
+
+                    # o último segmento de cada série é o que recebe escrita
+                    names = sorted((n for n in os.listdir(directory) if n.endswith(".seg")), key=_segment_key)
+
+                    for name in names[:-1]:
+                        path = os.path.join(directory, name)
+                        segment = self._open.pop(path, None) or Segment(path)
+                        _, _, last = segment.header()
+                        segment.close()
+
+                        if last < cutoff:
+                            os.remove(path)
+                            removed += 1
+
+        return removed
+
+    # =====================
+    # LEITURA (API)
+    # =====================
+    def slices(self, host_id, check_type, since=None, until=None):
+        # [memoryview] com os registros em [since, until) (epoch), sem cópia
+        files = self._segment_files(host_id, check_type)
+        directory = self._series_dir(host_id, check_type)
+        starts = [_segment_key(name)[0] for name in files]
+
+        # segmentos que podem ter algo no intervalo. O nome é o segundo do
+        # primeiro registro e cada segmento termina onde o seguinte começa:
+        # do anterior ao primeiro que começa no segundo de since em diante,
+        # até o último que começa antes de until
+        first = max(0, bisect.bisect_left(starts, math.floor(since)) - 1) if since is not None else 0
+        last = bisect.bisect_left(starts, until) if until is not None else len(files)
+
+        views = []
+
+        with self._lock:
+            for name in files[first:last]:
+                view = self._segment(os.path.join(directory, name)).slice(since, until)
+                if len(view):
+                    views.append(view)
+
+        return views
+
+    def count(self, views):
+        return sum(len(v) for v in views) // RECORD.size
+
+    def last(self, views, limit):
+        # só os `limit` registros mais novos, ainda sem cópia
+        keep = limit * RECORD.size
+        tail = []
+
+        for view in reversed(views):
+            if keep <= 0:
+                break
+
+            tail.append(view[-keep:] if len(view) > keep else view)
+            keep -= len(view)
+
+        tail.reverse()
+        return tail
+
+    def decode(self, views):
+        # (datetime UTC, latência ou None, sucesso, erro)
+        for view in views:
+            for ts, latency, code, flags in RECORD.iter_unpack(view):
+                yield (
+                    from_epoch(ts),
+                    None if latency != latency else round(latency, 3),
+                    bool(flags & SUCCESS),
+                    self.errors.text(code),
+                )
+
+    def stats(self):
+        size = 0
+        segments = 0
+
+        for directory, _, names in os.walk(self.root):
+            for name in names:
+                if name.endswith(".seg"):
+                    segments += 1
+                    # arquivo esparso: blocos de fato ocupados
+                    size += os.stat(os.path.join(directory, name)).st_blocks * 512
+
+        return {"segments": segments, "disk_bytes": size, "open_segments": len(self._open)}
+
+
+tsdb = TimeSeriesStore()
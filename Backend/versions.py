@@ -0,0 +1,53 @@
+from sqlalchemy import func, insert, select, update
+from Backend.models import Host, VersionCounter
+
+# Versões dos hosts: cada gravação de estado de host recebe um número maior
+# que todos os anteriores (Host.version). O contador fica no banco porque API
+# e coletor são processos diferentes. O UPDATE do contador segura o lock de
+# escrita do SQLite até o commit, então uma versão menor nunca fica visível
+# depois de uma maior: quem lê o contador e depois os hosts com versão acima
+# do cursor não perde nada.
+class VersionClock:
+
+    def __init__(self, name="hosts"):
+        self.name = name
+        self._current = None
+
+    @property
+    def current(self):
+        # último valor visto neste processo (ETag sem consultar o banco)
+        return self._current
+
+    def seen(self, value):
+        if value is not None and (self._current is None or value > self._current):
+            self._current = value
+
+    def allocate(self, db, n=1):
+        # primeira de n versões seguidas; quem chama comita na mesma transação
+        stmt = (
+            update(VersionCounter)
+            .where(VersionCounter.name == self.name)
+            .values(value=VersionCounter.value + n)
+            .returning(VersionCounter.value)
+        )
+        last = db.execute(stmt).scalar()
+
+        if last is None:
+            # banco criado antes da migração 7 ter o que copiar
+            start = db.execute(select(func.coalesce(func.max(Host.version), 0))).scalar()
+            db.execute(insert(VersionCounter).values(name=self.name, value=start + n))
+            last = start + n
+
+        self.seen(last)
+        return last - n + 1
+
+    def read(self, db):
+        value = db.execute(
+            select(VersionCounter.value).where(VersionCounter.name == self.name)
+        ).scalar() or 0
+
+        self.seen(value)
+        return value
+
+
+host_versions = VersionClock()
@@ -0,0 +1,346 @@
+import threading
+import time
+from sqlalchemy import insert, select, update
+from Backend.clock import clock
+from Backend.database import SessionLocal
+from Backend.models import Alert, CheckResult, Host, Incident
+from Backend.rollups import upsert_rollups
+from Backend.telemetry import flush_errors, flush_rows, flush_seconds, gauge
+from Backend.versions import host_versions
+
+# Política de flush: o que vier primeiro
+FLUSH_MAX_ROWS = 1000
+FLUSH_MAX_AGE = 2.0
+
+# Se o banco ficar fora por muito tempo, descarta os checks mais antigos
+BUFFER_MAX_ROWS = 200000
+
+# Campos do host que mudam a cada checagem sem mudar o estado: não geram versão
+UNVERSIONED_FIELDS = ("last_check", "dns_ttl_remaining", "version")
+
+
+def new_writes():
+    # escritas de um host num ciclo; só entram no buffer se o host terminou sem erro
+    return {"checks": [], "alerts": [], "incidents": []}
+
+
+# Buffer de escrita atrasada: junta checks, alertas, incidentes e estado dos
+# hosts de vários hosts/ciclos e grava tudo numa transação só.
+class WriteBehindBuffer:
+
+    def __init__(self, session_factory=SessionLocal, max_rows=FLUSH_MAX_ROWS, max_age=FLUSH_MAX_AGE):
+        self.session_factory = session_factory
+        self.max_rows = max_rows
+        self.max_age = max_age
+
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._reset()
+
+        # chamados com (checks, alerts, incidents, hosts) depois de cada commit
+        self.listeners = []
+
+        # worker de shard (Backend/shards.py): em vez de gravar, o flush entrega
+        # (checks, alerts, incidents, hosts) para o escritor único
+        self.sink = None
+
+        # último estado entregue de cada host, que o banco ainda pode não ter
+        self._sent = {}
+
+        # coletor que perdeu o lease: nada mais é gravado (outro assumiu)
+        self.fenced = False
+
+    def _reset(self):
+        self._checks = []
+        self._alerts = []
+        self._incidents = []
+        self._hosts = {}
+        self._since = None
+
+    def _take(self):
+        with self._lock:
+            pending = (self._checks, self._alerts, self._incidents, self._hosts)
+            self._reset()
+
+        return pending
+
+    def add(self, writes, host_id=None, host_fields=None):
+        with self._lock:
+            self._checks.extend(writes["checks"])
+            self._alerts.extend(writes["alerts"])
+            self._incidents.extend(writes["incidents"])
+
+            if host_id is not None:
+                self._hosts.setdefault(host_id, {}).update(host_fields)
+
+            if self._since is None:
+                self._since = time.monotonic()
+
+    def merge(self, checks, alerts, incidents, hosts):
+        # escritas entregues por um worker de shard
+        with self._lock:
+            self._checks.extend(checks)
+            self._alerts.extend(alerts)
+            self._incidents.extend(incidents)
+
+            for host_id, fields in hosts.items():
+                self._hosts.setdefault(host_id, {}).update(fields)
+
+            if self._since is None:
+                self._since = time.monotonic()
+
+    def fence(self):
+        # descarta o que está pendente e recusa os próximos flushes
+        with self._flush_lock:
+            self.fenced = True
+            dropped = self.size()
+            self._take()
+
+        if dropped:
+            print(f"[WRITER] lease perdido, {dropped} linhas descartadas sem gravar")
+
+    def pending_host(self, host_id):
+        # estado do host ainda não gravado (quem lê o banco aplica isso por cima)
+        with self._lock:
+            return {**self._sent.get(host_id, {}), **self._hosts.get(host_id, {})}
+
+    def forget(self, keep):
+        # hosts que saíram do shard deste worker
+        with self._lock:
+            for host_id in [h for h in self._sent if h not in keep]:
+                del self._sent[host_id]
+
+    def overlay(self, host):
+        for field, value in self.pending_host(host.id).items():
+            setattr(host, field, value)
+
+    def size(self):
+        with self._lock:
+            return len(self._checks) + len(self._alerts) + len(self._incidents) + len(self._hosts)
+
+    def should_flush(self):
+        with self._lock:
+            if self._since is None:
+                return False
+
+            rows = len(self._checks) + len(self._alerts) + len(self._incidents) + len(self._hosts)
+            return rows >= self.max_rows or time.monotonic() - self._since >= self.max_age
+
+    def maybe_flush(self):
+        if not self.fenced and self.should_flush():
+            return self.flush()
+
+        return 0
+
+    def _requeue(self, checks, alerts, incidents, hosts):
+        with self._lock:
+            self._checks = checks + self._checks
+            self._alerts = alerts + self._alerts
+            self._incidents = incidents + self._incidents
+
+            for host_id, fields in hosts.items():
+                # o que chegou depois da falha é mais novo e vence
+                self._hosts[host_id] = {**fields, **self._hosts.get(host_id, {})}
+
+            overflow = len(self._checks) - BUFFER_MAX_ROWS
+            if overflow > 0:
+                print(f"[WRITER] buffer cheio, descartando {overflow} checks antigos")
+                del self._checks[:overflow]
+
+            if self._since is None:
+                self._since = time.monotonic()
+
+    def _apply_incidents(self, db, ops):
+        # devolve só as operações que abriram ou fecharam uma linha
+        names = {op["host_name"] for op in ops}
+        applied = []
+
+        open_rows = {
+            i.host_name: i
+            for i in db.query(Incident).filter(
+                Incident.host_name.in_(names),
+                Incident.status == "OPEN"
+            )
+        }
+
+        for op in ops:
+            name = op["host_name"]
+
+            if op["action"] == "open":
+                if name in open_rows:
+                    continue
+
+                incident = Incident(
+                    host_name=name,
+                    reason=op["reason"],
+                    started_time=op["time"]
+                )
+                db.add(incident)
+                open_rows[name] = incident
+                applied.append(op)
+
+            else:
+                incident = open_rows.pop(name, None)
+                if not incident:
+                    continue
+
+                incident.status = "CLOSED"
+                incident.ended_time = op["time"]
+
+                duration = incident.ended_time - incident.started_time
+                incident.duration_seconds = int(duration.total_seconds())
+                applied.append(op)
+
+        return applied
+
+    def _changed_hosts(self, db, hosts):
+        # ids cujo estado gravado difere do que está no banco
+        fields = sorted({f for values in hosts.values() for f in values if f not in UNVERSIONED_FIELDS})
+        columns = [getattr(Host, f) for f in fields]
+
+        stored = {
+            row[0]: row[1:]
+            for row in db.execute(select(Host.id, *columns).where(Host.id.in_(list(hosts))))
+        }
+
+        changed = []
+        for host_id, values in hosts.items():
+            row = stored.get(host_id)
+            if row is None or any(f in values and values[f] != v for f, v in zip(fields, row)):
+                changed.append(host_id)
+
+        return changed
+
+    def flush(self):
+        # um flush por vez; o próximo pega o que chegou nesse meio tempo
+        with self._flush_lock:
+            if self.fenced:
+                return 0
+
+            checks, alerts, incidents, hosts = self._take()
+
+            rows = len(checks) + len(alerts) + len(incidents) + len(hosts)
+            if not rows:
+                return 0
+
+            if self.sink:
+                return self._forward(checks, alerts, incidents, hosts, rows)
+
+            started = time.perf_counter()
+            applied = []
+            db = self.session_factory()
+            try:
+                if checks:
+                    db.execute(insert(CheckResult), checks)
+
+                    # rollups por minuto/hora no mesmo commit
+                    upsert_rollups(db, checks)
+
+                if alerts:
+                    db.execute(insert(Alert), alerts)
+
+                if incidents:
+                    applied = self._apply_incidents(db, incidents)
+
+                if hosts:
+                    # versão sobrando de um flush que falhou
+                    for fields in hosts.values():
+                        fields.pop("version", None)
+
+                    # versão nova (contador no mesmo commit) só para quem mudou
+                    # status ou métricas; last_check sozinho não conta
+                    changed = self._changed_hosts(db, hosts)
+                    if changed:
+                        first = host_versions.allocate(db, len(changed))
+                        for i, host_id in enumerate(changed):
+                            hosts[host_id]["version"] = first + i
+
+                    db.execute(
+                        update(Host),
+                        [{"id": host_id, **fields} for host_id, fields in hosts.items()]
+                    )
+
+                db.commit()
+
+            except Exception as e:
+                db.rollback()
+                flush_errors.inc()
+                print(f"[WRITER ERROR] {e}")
+                self._requeue(checks, alerts, incidents, hosts)
+                return 0
+
+            finally:
+                db.close()
+
+            flush_seconds.observe(time.perf_counter() - started)
+            for table, written in (("checks", checks), ("alerts", alerts), ("incidents", incidents), ("hosts", hosts)):
+                if written:
+                    flush_rows.inc(len(written), table=table)
+
+            for listener in self.listeners:
+                try:
+                    # incidentes: só o que mudou de fato (close em host saudável é no-op)
+                    listener(checks, alerts, applied, hosts)
+                except Exception as e:
+                    print(f"[WRITER ERROR] listener: {e}")
+
+            return rows
+
+    def _forward(self, checks, alerts, incidents, hosts, rows):
+        try:
+            self.sink(checks, alerts, incidents, hosts)
+        except Exception as e:
+            print(f"[WRITER ERROR] envio ao escritor: {e}")
+            self._requeue(checks, alerts, incidents, hosts)
+            return 0
+
+        with self._lock:
+            for host_id, fields in hosts.items():
+                self._sent.setdefault(host_id, {}).update(fields)
+
+        return rows
+
+
+def check_row(host, check_type, result, **extra):
+    return {
+        "host_id": host.id,
+        "host_name": host.name,
+        "check_type": check_type,
+        "success": result["success"],
+        "latency": result.get("latency"),
+        "error": result.get("error"),
+        "timestamp": clock.utcnow(),
+        "dns_ms": None,
+        "connect_ms": None,
+        "tls_ms": None,
+        "ttfb_ms": None,
+        **extra,
+    }
+
+
+def alert_row(host_id, old_status, new_status, alert_type=None):
+    return {
+        "host_id": host_id,
+        "alert_type": alert_type,
+        "old_status": old_status,
+        "new_status": new_status,
+        "timestamp": clock.utcnow(),
+    }
+
+
+def incident_op(action, host_name, reason=None):
+    return {
+        "action": action,
+        "host_name": host_name,
+        "reason": reason,
+        "time": clock.utcnow(),
+    }
+
+
+write_buffer = WriteBehindBuffer()
+
+gauge(
+    "noc_write_buffer_pending_rows",
+    "Linhas no write buffer esperando o próximo flush",
+    write_buffer.size
+)
@@ -60,6 +60,8 @@ document.getElementById("loginForm").onsubmit = async function(e) {
             } else {
                 alert("Login realizado com sucesso!");
                 loadHosts();
+                loadTimeline();
+                connectEvents();
             }
         } else {
             alert("Erro: " + (data.detail || "Credenciais inválidas"));
@@ -265,8 +267,6 @@ async function loadHosts() {
 }
 
 async function loadLastResult(name) {
-    const box = document.getElementById("result-" + name);
-
     const res = await fetchWithAuth(`${API}/host/history/${name}`);
     
     if (!res || !res.ok) return;
@@ -277,6 +277,13 @@ async function loadLastResult(name) {
     const lastTcp  = data.checks.find(c => c.type === "tcp");
     const lastHttp = data.checks.find(c => c.type === "http");
 
+    renderLastResult(name, lastPing, lastTcp, lastHttp);
+}
+
+function renderLastResult(name, lastPing, lastTcp, lastHttp) {
+    const box = document.getElementById("result-" + name);
+    if (!box) return;
+
     const pingDot = lastPing?.success ? "bg-success" : "bg-danger";
     const tcpDot  = lastTcp?.success ? "bg-success" : "bg-danger";
     const httpDot = lastHttp?.success ? "bg-success" : "bg-danger";
@@ -567,20 +574,6 @@ function showAlertCard(alert) {
     }, 6000);
 }
 
-let lastAlertTime = null;
-
-async function checkAlerts() {
-    const res = await fetchWithAuth(`${API}/alerts/list`);
-    const alerts = await res.json();
-
-    alerts.forEach(a => {
-        if (!lastAlertTime || a.timestamp > lastAlertTime) {
-            showAlertCard(a);
-            lastAlertTime = a.timestamp;
-        }
-    });
-}
-
 async function softDeleteHost(name) {
 
     if (!confirm("Remover host?")) return;
@@ -791,15 +784,95 @@ function filterHosts() {
 }
 
 // ======================
-// Inicialização e Loop
+// Stream de eventos (SSE)
 // ======================
+// O backend empurra estado dos hosts, alertas e incidentes assim que grava;
+// o EventSource reconecta sozinho e retoma do último id (Last-Event-ID).
+let eventSource = null;
+
+// Recarga da lista/timeline pedida por eventos: junta uma rajada numa só
+const RELOAD_DEBOUNCE_MS = 1000;
+let reloadTimer = null;
+let reloadTimeline = false;
+
+function scheduleReload(timeline) {
+    reloadTimeline = reloadTimeline || timeline;
+    if (reloadTimer) return;
+
+    reloadTimer = setTimeout(() => {
+        reloadTimer = null;
+        loadHosts();
+        if (reloadTimeline) loadTimeline();
+        reloadTimeline = false;
+    }, RELOAD_DEBOUNCE_MS);
+}
+
+function updateHostCard(h) {
+    const card = document.getElementById(`card-${h.name}`);
+
+    // host novo: recarrega a lista para montar o card
+    if (!card) {
+        scheduleReload(false);
+        return;
+    }
+
+    let statusColor = "bg-secondary";
+    if (h.status === "UP") statusColor = "bg-success";
+    else if (h.status === "DOWN") statusColor = "bg-danger";
+    else if (h.status === "DEGRADED") statusColor = "bg-warning";
 
-setInterval(loadHosts, 10000);
-setInterval(loadTimeline, 10000);
-setInterval(checkAlerts, 5000);
+    const indicator = card.querySelector(".status-indicator");
+    indicator.className = `status-indicator ${statusColor}`;
+
+    const checks = h.checks || {};
+    if (checks.ping || checks.tcp || checks.http) {
+        renderLastResult(h.name, checks.ping, checks.tcp, checks.http);
+    }
+
+    const container = document.getElementById("chart-container-" + h.name);
+    if (container && !container.classList.contains("hidden")) {
+        loadLatencyChart(h.name);
+    }
+}
+
+function connectEvents() {
+    const token = localStorage.getItem("token");
+    if (!token) return;
+
+    if (eventSource) eventSource.close();
+
+    eventSource = new EventSource(`${API}/events/stream?token=${encodeURIComponent(token)}`);
+
+    eventSource.addEventListener("host", e => updateHostCard(JSON.parse(e.data)));
+
+    eventSource.addEventListener("alert", e => showAlertCard(JSON.parse(e.data)));
+
+    eventSource.addEventListener("incident", () => scheduleReload(true));
+
+    // eventos perdidos (servidor reiniciou ou cliente ficou muito tempo fora)
+    eventSource.addEventListener("reset", () => {
+        loadHosts();
+        loadTimeline();
+    });
+
+    eventSource.onerror = () => {
+        // fechado de vez (ex.: token expirado): tenta de novo mais tarde
+        if (eventSource.readyState === EventSource.CLOSED) {
+            setTimeout(connectEvents, 10000);
+        }
+    };
+}
+
+// ======================
+// Inicialização
+// ======================
 
 document.getElementById("refreshBtn").addEventListener("click", loadHosts);
-window.onload = loadHosts;
+window.onload = () => {
+    loadHosts();
+    loadTimeline();
+    connectEvents();
+};
 
 window.onclick = function(event) {
         const modal = document.getElementById("editModal");
@@ -810,5 +883,6 @@ window.onclick = function(event) {
 
 document.getElementById("logoutBtn").onclick = () => {
     localStorage.removeItem("token");
+    if (eventSource) eventSource.close();
     window.location.reload(); // Recarrega para voltar ao estado de login
 };
\ No newline at end of file
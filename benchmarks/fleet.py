@@ -0,0 +1,284 @@
+import argparse
+import asyncio
+import importlib
+import json
+import os
+import random
+import resource
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+# Capacidade de uma instância: frota sintética de N hosts checada contra
+# servidores locais (loopback), sem depender da rede.
+#
+#   python benchmarks/fleet.py [--sizes 100,1000,10000] [--cycles 3]
+#                              [--latency-ms 5] [--jitter-ms 2]
+#                              [--error-rate 0.05] [--timeout-rate 0.01]
+#                              [--driver Backend.scheduler:check_all_hosts]
+#
+# Cada tamanho roda num processo separado (banco novo em NOC_DATABASE_URL e
+# pico de RSS só daquele tamanho). Perfis dos alvos:
+#   ok      - TCP aceita, HTTP 200 depois de latency-ms (+- jitter-ms)
+#   error   - porta TCP fechada (recusa), HTTP 500
+#   timeout - TCP aceita, HTTP nunca responde (o cliente estoura o timeout)
+
+DEFAULT_SIZES = "100,1000,10000"
+API_REQUESTS = 20
+
+
+# =====================
+# ALVOS LOCAIS
+# =====================
+class LoopbackTargets:
+
+    def __init__(self, latency_ms, jitter_ms, hang_seconds, seed=42):
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.hang_seconds = hang_seconds
+        self.random = random.Random(seed)
+        self.ports = {}
+        self._loop = None
+        self._ready = threading.Event()
+
+    def start(self):
+        threading.Thread(target=lambda: asyncio.run(self._main()), daemon=True).start()
+        self._ready.wait()
+
+        # porta sem ninguém escutando: conexão recusada
+        sock = socket.socket()
+        sock.bind(("127.0.0.1", 0))
+        self.ports["closed"] = sock.getsockname()[1]
+        sock.close()
+
+        return self
+
+    async def _main(self):
+        self._loop = asyncio.get_running_loop()
+
+        for profile in ("ok", "error", "timeout"):
+            server = await asyncio.start_server(
+                lambda r, w, p=profile: self._serve(r, w, p),
+                "127.0.0.1", 0, backlog=4096
+            )
+            self.ports[profile] = server.sockets[0].getsockname()[1]
+
+        self._ready.set()
+        await asyncio.Event().wait()
+
+    async def _serve(self, reader, writer, profile):
+        try:
+            # keep-alive: várias requisições na mesma conexão
+            while True:
+                request = await reader.readuntil(b"\r\n\r\n")
+                if not request:
+                    break
+
+                if profile == "timeout":
+                    await asyncio.sleep(self.hang_seconds)
+                    break
+
+                delay = max(0.0, self.latency_ms + self.random.uniform(-self.jitter_ms, self.jitter_ms))
+                await asyncio.sleep(delay / 1000)
+
+                status = "200 OK" if profile == "ok" else "500 Internal Server Error"
+                body = b"ok" if profile == "ok" else b"error"
+                writer.write(
+                    f"HTTP/1.1 {status}\r\nContent-Length: {len(body)}\r\n"
+                    f"Content-Type: text/plain\r\n\r\n".encode() + body
+                )
+                await writer.drain()
+
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+
+        finally:
+            writer.close()
+
+    def host_fields(self, profile):
+        if profile == "error":
+            return {"port": self.ports["closed"], "http_url": f"http://127.0.0.1:{self.ports['error']}/"}
+
+        port = self.ports[profile]
+        return {"port": port, "http_url": f"http://127.0.0.1:{port}/"}
+
+
+def pick_profiles(size, error_rate, timeout_rate, seed=42):
+    rng = random.Random(seed)
+    profiles = []
+
+    for _ in range(size):
+        r = rng.random()
+        if r < timeout_rate:
+            profiles.append("timeout")
+        elif r < timeout_rate + error_rate:
+            profiles.append("error")
+        else:
+            profiles.append("ok")
+
+    return profiles
+
+
+# =====================
+# EXECUÇÃO (processo filho, um tamanho)
+# =====================
+def run_size(args):
+    path = os.path.join(tempfile.mkdtemp(), "fleet.db")
+    os.environ["NOC_DATABASE_URL"] = f"sqlite:///{path}"
+
+    # importados depois do NOC_DATABASE_URL
+    from fastapi.testclient import TestClient
+    from sqlalchemy import insert
+    from Backend.cycles import cycle_log
+    from Backend.database import engine
+    from Backend.main import app
+    from Backend.models import Host
+    from Backend.security import create_access_token
+    from Backend.telemetry import flush_rows, probe_seconds
+
+    targets = LoopbackTargets(args.latency_ms, args.jitter_ms, args.hang_seconds).start()
+    profiles = pick_profiles(args.size, args.error_rate, args.timeout_rate)
+
+    with engine.begin() as conn:
+        conn.execute(insert(Host), [
+            {
+                "name": f"bench-{i}",
+                "address": "127.0.0.1",
+                "status": "UNKNOWN",
+                "active": True,
+                **targets.host_fields(profile),
+            }
+            for i, profile in enumerate(profiles)
+        ])
+
+    module, name = args.driver.split(":")
+    drive = getattr(importlib.import_module(module), name)
+
+    cycles = []
+
+    for _ in range(args.cycles):
+        t = time.perf_counter()
+        drive()
+        cycles.append(time.perf_counter() - t)
+
+    elapsed = sum(cycles)
+    # contagens por faixa (o último valor é a soma das latências)
+    probes = sum(sum(slots[:-1]) for slots in probe_seconds.values().values())
+    rows = sum(flush_rows.values().values())
+
+    client = TestClient(app)
+    headers = {"Authorization": "Bearer " + create_access_token({"sub": "bench"})}
+    api = []
+
+    for _ in range(args.api_requests):
+        t = time.perf_counter()
+        response = client.get("/hosts/list", headers=headers)
+        api.append((time.perf_counter() - t) * 1000)
+        assert response.status_code == 200, response.text
+
+    api.sort()
+
+    result = {
+        "hosts": args.size,
+        "profiles": {p: profiles.count(p) for p in ("ok", "error", "timeout")},
+        "cycles": args.cycles,
+        "cycle_s": [round(c, 3) for c in cycles],
+        "cycle_mean_s": round(statistics.mean(cycles), 3),
+        "probes": probes,
+        "probes_per_s": round(probes / elapsed, 1),
+        "db_rows": rows,
+        "db_rows_per_s": round(rows / elapsed, 1),
+        # etapas do último ciclo (somadas por host, ver Backend/cycles.py)
+        "last_cycle": cycle_log.recent(1)[0] if cycle_log.recent(1) else None,
+        "peak_rss_mb": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+        "api_hosts_list_p50_ms": round(api[len(api) // 2], 2),
+        "api_hosts_list_p95_ms": round(api[min(len(api) - 1, int(len(api) * 0.95))], 2),
+    }
+
+    engine.dispose()
+    os.remove(path)
+
+    print("RESULT " + json.dumps(result))
+
+
+# =====================
+# EXECUÇÃO (processo pai)
+# =====================
+def report(results):
+    columns = (
+        ("hosts", "hosts"),
+        ("cycle_mean_s", "ciclo (s)"),
+        ("probes_per_s", "probes/s"),
+        ("db_rows_per_s", "linhas/s"),
+        ("peak_rss_mb", "RSS (MB)"),
+        ("api_hosts_list_p50_ms", "list p50 (ms)"),
+        ("api_hosts_list_p95_ms", "list p95 (ms)"),
+    )
+
+    print("\n" + "  ".join(f"{title:>14}" for _, title in columns))
+    for r in results:
+        print("  ".join(f"{r[key]:>14}" for key, _ in columns))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de capacidade com frota sintética")
+    parser.add_argument("--sizes", default=DEFAULT_SIZES)
+    parser.add_argument("--cycles", type=int, default=3)
+    parser.add_argument("--latency-ms", type=float, default=5)
+    parser.add_argument("--jitter-ms", type=float, default=2)
+    parser.add_argument("--error-rate", type=float, default=0.05)
+    parser.add_argument("--timeout-rate", type=float, default=0.01)
+    parser.add_argument("--hang-seconds", type=float, default=60)
+    parser.add_argument("--driver", default="Backend.scheduler:check_all_hosts")
+    parser.add_argument("--api-requests", type=int, default=API_REQUESTS)
+    parser.add_argument("--json", help="grava os resultados nesse arquivo")
+    parser.add_argument("--size", type=int, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.size:
+        run_size(args)
+        return
+
+    results = []
+    child = [
+        "--cycles", str(args.cycles),
+        "--latency-ms", str(args.latency_ms),
+        "--jitter-ms", str(args.jitter_ms),
+        "--error-rate", str(args.error_rate),
+        "--timeout-rate", str(args.timeout_rate),
+        "--hang-seconds", str(args.hang_seconds),
+        "--driver", args.driver,
+        "--api-requests", str(args.api_requests),
+    ]
+
+    for size in (int(s) for s in args.sizes.split(",")):
+        print(f"[BENCH] {size} hosts, {args.cycles} ciclos...", flush=True)
+
+        done = subprocess.run(
+            [sys.executable, os.path.abspath(__file__), *child, "--size", str(size)],
+            cwd=ROOT, capture_output=True, text=True
+        )
+
+        lines = [l for l in done.stdout.splitlines() if l.startswith("RESULT ")]
+        if done.returncode or not lines:
+            print(f"[BENCH ERROR] {size} hosts:\n{done.stderr[-2000:]}")
+            continue
+
+        results.append(json.loads(lines[-1][len("RESULT "):]))
+
+    report(results)
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
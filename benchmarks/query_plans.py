@@ -0,0 +1,145 @@
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import create_engine, text
+from Backend.migrations import INDEXES, migrate
+from Backend.models import Base
+
+# Compara o plano (EXPLAIN QUERY PLAN) e o tempo das consultas quentes
+# num banco sem os índices compostos e depois da migração.
+#
+#   python benchmarks/query_plans.py [hosts] [checks_por_host]
+
+HOSTS = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+CHECKS_PER_HOST = int(sys.argv[2]) if len(sys.argv) > 2 else 2000
+REPEAT = 20
+
+QUERIES = {
+    "sla/jitter (metrics)": (
+        "SELECT success, latency FROM checks "
+        "WHERE host_id = :host_id AND check_type = 'ping' "
+        "ORDER BY timestamp DESC LIMIT 50"
+    ),
+    "host_history": (
+        "SELECT * FROM checks WHERE host_id = :host_id "
+        "ORDER BY timestamp DESC LIMIT 200"
+    ),
+    "heatmap (24h)": (
+        "SELECT timestamp, latency FROM checks "
+        "WHERE host_id = :host_id AND check_type = 'ping' AND timestamp >= :since "
+        "ORDER BY timestamp DESC LIMIT 1000"
+    ),
+    "sla_chart": (
+        "SELECT timestamp, success FROM checks "
+        "WHERE host_id = :host_id AND check_type = 'http' ORDER BY timestamp"
+    ),
+    "consecutive_failures": (
+        "SELECT success FROM checks WHERE host_name = :host_name "
+        "ORDER BY timestamp DESC LIMIT 3"
+    ),
+    "incidente aberto": (
+        "SELECT * FROM incidents WHERE host_name = :host_name AND status = 'OPEN'"
+    ),
+    "downtime_history": (
+        "SELECT * FROM incidents WHERE host_name = :host_name AND started_time >= :since"
+    ),
+    "alerts/list": (
+        "SELECT * FROM alerts ORDER BY timestamp DESC LIMIT 50"
+    ),
+}
+
+
+def seed(engine):
+    random.seed(42)
+    start = datetime.utcnow() - timedelta(days=2)
+    types = ("dns", "ping", "tcp", "http")
+
+    with engine.begin() as conn:
+        for host_id in range(1, HOSTS + 1):
+            t = start
+            checks = []
+            for i in range(CHECKS_PER_HOST):
+                t += timedelta(seconds=10)
+                ok = random.random() < 0.95
+                checks.append({
+                    "host_id": host_id,
+                    "host_name": f"host-{host_id}",
+                    "check_type": types[i % 4],
+                    "success": ok,
+                    "latency": random.uniform(1, 200) if ok else None,
+                    "timestamp": t,
+                })
+
+            conn.execute(text(
+                "INSERT INTO checks (host_id, host_name, check_type, success, latency, timestamp) "
+                "VALUES (:host_id, :host_name, :check_type, :success, :latency, :timestamp)"
+            ), checks)
+
+            conn.execute(text(
+                "INSERT INTO incidents (host_name, status, reason, started_time) "
+                "VALUES (:name, 'CLOSED', 'bench', :t)"
+            ), [{"name": f"host-{host_id}", "t": start + timedelta(hours=h)} for h in range(20)])
+
+            conn.execute(text(
+                "INSERT INTO alerts (host_id, old_status, new_status, timestamp) "
+                "VALUES (:host_id, 'UP', 'DOWN', :t)"
+            ), [{"host_id": host_id, "t": start + timedelta(hours=h)} for h in range(20)])
+
+
+def measure(engine, label):
+    params = {
+        "host_id": HOSTS // 2,
+        "host_name": f"host-{HOSTS // 2}",
+        "since": datetime.utcnow() - timedelta(hours=24),
+    }
+
+    print(f"\n===== {label} =====")
+
+    with engine.connect() as conn:
+        for name, sql in QUERIES.items():
+            plan = conn.execute(text("EXPLAIN QUERY PLAN " + sql), params).all()
+
+            t = time.perf_counter()
+            for _ in range(REPEAT):
+                conn.execute(text(sql), params).all()
+            ms = (time.perf_counter() - t) / REPEAT * 1000
+
+            print(f"{name:24} {ms:9.3f} ms")
+            for row in plan:
+                print(f"{'':26}{row[-1]}")
+
+
+def main():
+    path = os.path.join(tempfile.mkdtemp(), "bench.db")
+    engine = create_engine(f"sqlite:///{path}")
+
+    # schema antigo: tabelas sem os índices compostos
+    Base.metadata.create_all(bind=engine)
+    with engine.begin() as conn:
+        for name, _, _ in INDEXES:
+            conn.execute(text(f"DROP INDEX IF EXISTS {name}"))
+
+    t = time.perf_counter()
+    seed(engine)
+    print(f"{HOSTS} hosts x {CHECKS_PER_HOST} checks em {time.perf_counter() - t:.1f}s ({path})")
+
+    measure(engine, "ANTES (sem índices)")
+
+    t = time.perf_counter()
+    migrate(engine)
+    print(f"migração em {time.perf_counter() - t:.2f}s")
+
+    measure(engine, "DEPOIS (migração 2)")
+
+    engine.dispose()
+    os.remove(path)
+
+
+if __name__ == "__main__":
+    main()
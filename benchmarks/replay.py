@@ -0,0 +1,159 @@
+import argparse
+import json
+import os
+import resource
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+# Replay de horas de monitoramento com a rede simulada (Backend/probes.py) e
+# o relógio virtual (Backend/clock.py): perfila banco, rollups, retenção e
+# métricas sem alvos reais e sem esperar o tempo passar.
+#
+#   python benchmarks/replay.py [--hosts 1000] [--hours 6] [--step 10]
+#                               [--seed 1] [--scenario '{"loss": 0.02}']
+#                               [--db arquivo.db]
+#
+# Cada passo avança o relógio "step" segundos e roda um check_all_hosts.
+# O relógio começa "hours" atrás, então no fim os dados terminam perto de
+# agora e as rotas de gráfico enxergam o histórico inteiro.
+
+RETENTION_EVERY_HOURS = 1
+API_REQUESTS = 10
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay com rede simulada e relógio virtual")
+    parser.add_argument("--hosts", type=int, default=1000)
+    parser.add_argument("--hours", type=float, default=6)
+    parser.add_argument("--step", type=float, default=10, help="segundos virtuais por ciclo")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--scenario", default="{}", help="JSON que sobrescreve o SCENARIO")
+    parser.add_argument("--db", help="mantém o banco nesse arquivo")
+    parser.add_argument("--json", help="grava o resultado nesse arquivo")
+    args = parser.parse_args()
+
+    path = os.path.abspath(args.db) if args.db else os.path.join(tempfile.mkdtemp(), "replay.db")
+    os.environ["NOC_DATABASE_URL"] = f"sqlite:///{path}"
+    os.environ["NOC_TSDB_PATH"] = os.path.splitext(path)[0] + ".tsdb"
+
+    # importados depois do NOC_DATABASE_URL e do NOC_TSDB_PATH
+    from fastapi.testclient import TestClient
+    from sqlalchemy import insert
+    from Backend import scheduler
+    from Backend.clock import clock
+    from Backend.cycles import cycle_log
+    from Backend.database import engine
+    from Backend.main import app
+    from Backend.models import Host
+    from Backend.probes import SimulatedBackend
+    from Backend.retention import run_retention
+    from Backend.security import create_access_token
+    from Backend.telemetry import flush_rows
+    from Backend.tsdb import tsdb
+    from Backend.writer import write_buffer
+
+    backend = SimulatedBackend(seed=args.seed, scenario=json.loads(args.scenario))
+    scheduler.engine.backend = backend
+
+    # como no coletor: amostras cruas também na série temporal
+    tsdb.start_writing()
+    write_buffer.listeners.append(tsdb.store_checks)
+
+    with engine.begin() as conn:
+        conn.execute(insert(Host), [
+            {
+                "name": f"sim-{i}",
+                "address": f"sim-{i}.test",
+                "status": "UNKNOWN",
+                "active": True,
+                # HTTPS, HTTP e SSH (com porta o scheduler também monta a URL)
+                "port": (443, 80, 22)[i % 3],
+            }
+            for i in range(args.hosts)
+        ])
+
+    start = datetime.utcnow() - timedelta(hours=args.hours)
+    clock.freeze(start)
+
+    steps = int(args.hours * 3600 / args.step)
+    next_retention = start + timedelta(hours=RETENTION_EVERY_HOURS)
+    retention_seconds = 0.0
+    started = time.perf_counter()
+
+    try:
+        for i in range(steps):
+            now = clock.advance(args.step)
+            scheduler.check_all_hosts()
+
+            if now >= next_retention:
+                t = time.perf_counter()
+                run_retention()
+                retention_seconds += time.perf_counter() - t
+                next_retention += timedelta(hours=RETENTION_EVERY_HOURS)
+
+            if (i + 1) % max(1, steps // 10) == 0:
+                print(f"[REPLAY] {now:%Y-%m-%d %H:%M} ({i + 1}/{steps}) {time.perf_counter() - started:.1f}s", flush=True)
+
+    finally:
+        clock.resume()
+
+    wall = time.perf_counter() - started
+    rows = sum(flush_rows.values().values())
+    summary = cycle_log.summary()
+
+    client = TestClient(app)
+    headers = {"Authorization": "Bearer " + create_access_token({"sub": "replay"})}
+    routes = {
+        "hosts/list": "/hosts/list",
+        "sla_chart": f"/host/sla_chart/sim-0?hours={max(1, int(args.hours))}",
+        "history": f"/hosts/metrics/sim-0/history?range={max(1, int(args.hours))}h",
+        "samples": f"/host/samples/sim-0?hours={max(1, int(args.hours))}",
+    }
+    api = {}
+
+    for label, url in routes.items():
+        times = []
+        for _ in range(API_REQUESTS):
+            t = time.perf_counter()
+            response = client.get(url, headers=headers)
+            times.append((time.perf_counter() - t) * 1000)
+            assert response.status_code == 200, (url, response.text)
+
+        times.sort()
+        api[label] = round(times[len(times) // 2], 2)
+
+    result = {
+        "hosts": args.hosts,
+        "virtual_hours": args.hours,
+        "cycles": steps,
+        "wall_s": round(wall, 1),
+        "speedup": round(args.hours * 3600 / wall, 1),
+        "cycle_median_ms": summary["median_ms"],
+        "stages_ms_last_cycles": summary["stages_ms"],
+        "db_rows": rows,
+        "db_rows_per_s": round(rows / wall, 1),
+        "retention_s": round(retention_seconds, 2),
+        "db_mb": round(os.path.getsize(path) / 1024 / 1024, 1),
+        "tsdb_mb": round(tsdb.stats()["disk_bytes"] / 1024 / 1024, 1),
+        "peak_rss_mb": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+        "api_p50_ms": api,
+    }
+
+    print(json.dumps(result, indent=2))
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(result, f, indent=2)
+
+    engine.dispose()
+    if not args.db:
+        os.remove(path)
+
+
+if __name__ == "__main__":
+    main()
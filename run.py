@@ -5,6 +5,9 @@ import os
 from Backend.models import User
 from Backend.security import hash_password
 
+# Espera antes de subir de novo um coletor que saiu
+COLLECTOR_RESTART_DELAY = 5
+
 def run_project():
     # Caminho absoluto da raiz do projeto (onde o run.py está)
     base_path = os.path.dirname(os.path.abspath(__file__))
@@ -16,6 +19,10 @@ def run_project():
         "--port", "8000", 
         "--reload"
     ]
+    # checagens e gravações: processo próprio (a API só lê)
+    collector_cmd = [
+        sys.executable, "-m", "Backend.collector"
+    ]
     frontend_cmd = [
         sys.executable, "-m", "http.server", "3000", 
         "--directory", "Frontend"
@@ -23,6 +30,7 @@ def run_project():
 
     try:
         pasta_back = subprocess.Popen(backend_cmd, cwd=base_path)
+        coletor = subprocess.Popen(collector_cmd, cwd=base_path)
         pasta_front = subprocess.Popen(frontend_cmd, cwd=base_path)
 
         print(f"API: http://127.0.0.1:8000")
@@ -31,9 +39,17 @@ def run_project():
         while True:
             time.sleep(1)
 
+            # coletor saiu (lease perdido, erro): sobe outro, que espera o
+            # lease vencer se ainda houver outro coletor ativo
+            if coletor.poll() is not None:
+                print(f"Coletor saiu ({coletor.returncode}), reiniciando em {COLLECTOR_RESTART_DELAY}s...")
+                time.sleep(COLLECTOR_RESTART_DELAY)
+                coletor = subprocess.Popen(collector_cmd, cwd=base_path)
+
     except KeyboardInterrupt:
         print("\nDesligando o sistema...")
         pasta_back.terminate()
+        coletor.terminate()
         pasta_front.terminate()
         print("Desligado.")
 
@@ -0,0 +1,37 @@
+import asyncio
+import os
+import sys
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from Backend.clock import clock
+from Backend.dns_cache import DNSMemoryCache, DNSPrefetcher, PREFETCH_MARGIN
+from Backend.probes import SimulatedBackend
+
+
+def test_cache_and_prefetch_follow_virtual_clock():
+    backend = SimulatedBackend(seed=1)
+    cache = DNSMemoryCache()
+    prefetcher = DNSPrefetcher(cache, resolver=backend.resolve)
+    start = datetime(2020, 1, 1)
+
+    clock.freeze(start)
+    try:
+        ips, ttl, remaining = asyncio.run(cache.resolve_async("sim-1.test", backend.resolve))
+        assert ips == [backend.address_ip("sim-1.test")]
+        assert remaining == ttl
+
+        # nada vence antes da margem de prefetch, no tempo virtual
+        clock.advance(ttl * (1 - PREFETCH_MARGIN) - 1)
+        assert cache.due_for_prefetch(clock.utcnow())[0] == []
+
+        clock.advance(1)
+        assert cache.due_for_prefetch(clock.utcnow())[0] == ["sim-1.test"]
+
+        asyncio.run(prefetcher._refresh("sim-1.test", asyncio.Semaphore(1)))
+        assert cache.stats()["refreshes"] == 1
+        assert cache._entries["sim-1.test"]["resolved"] == start + timedelta(seconds=ttl * (1 - PREFETCH_MARGIN))
+
+    finally:
+        clock.resume()
@@ -0,0 +1,67 @@
+import os
+import random
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from Backend.events import DisplayedHosts, flush_events, latency_moved
+
+HOST = {"status": "UP", "severity": "OK", "health_score": 100}
+
+
+def check(latency, success=True, check_type="ping"):
+    return {"check_type": check_type, "success": success, "latency": latency, "error": None}
+
+
+def test_latency_jitter_does_not_repeat_host_event():
+    displayed = DisplayedHosts()
+    rng = random.Random(1)
+    sent = 0
+
+    # ±10% em volta de 20ms, 360 ciclos de 10s: só o refresh gera evento
+    for i in range(360):
+        latency = 20 * (1 + rng.uniform(-0.1, 0.1))
+        sent += displayed.changed(1, HOST, {"ping": check(latency)}, now=i * 10)
+
+    assert sent == 360 * 10 // displayed.refresh
+
+
+def test_host_event_on_displayed_change():
+    displayed = DisplayedHosts()
+
+    assert displayed.changed(1, HOST, {"ping": check(20.0)}, now=0)
+    assert not displayed.changed(1, HOST, {"ping": check(21.0)}, now=1)
+
+    # status, sucesso e faixa de latência aparecem no card
+    assert displayed.changed(1, {**HOST, "status": "DOWN"}, {"ping": check(21.0)}, now=2)
+    assert displayed.changed(1, {**HOST, "status": "DOWN"}, {"ping": check(None, False)}, now=3)
+    assert displayed.changed(1, {**HOST, "status": "DOWN"}, {"ping": check(200.0)}, now=4)
+
+
+def test_host_event_refreshed_after_interval():
+    displayed = DisplayedHosts(refresh=60)
+
+    assert displayed.changed(1, HOST, {"ping": check(20.0)}, now=0)
+    assert not displayed.changed(1, HOST, {"ping": check(20.5)}, now=59)
+    assert displayed.changed(1, HOST, {"ping": check(20.5)}, now=60)
+
+
+def test_latency_moved():
+    assert not latency_moved(None, None)
+    assert latency_moved(None, 10.0)
+    assert latency_moved(10.0, None)
+    assert not latency_moved(0.2, 0.9)
+    assert not latency_moved(100, 124)
+    assert latency_moved(100, 125)
+    assert latency_moved(100, 80)
+
+
+def test_flush_events_skips_unchanged_hosts():
+    displayed = DisplayedHosts()
+    row = {"host_id": 1, "host_name": "a", "timestamp": None, **check(20.0)}
+
+    first = flush_events([row], [], [], {1: dict(HOST)}, displayed)
+    again = flush_events([{**row, "latency": 20.4}], [], [], {1: dict(HOST)}, displayed)
+
+    assert [kind for kind, _ in first] == ["host"]
+    assert again == []
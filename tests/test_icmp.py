@@ -0,0 +1,57 @@
+import asyncio
+import os
+import socket
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from Backend import probes
+from Backend.icmp import icmp_target
+
+
+def test_target_keeps_ipv6_scope():
+    family, key, addr = icmp_target("fe80::1%1")
+
+    assert family == socket.AF_INET6
+    # a resposta chega sem o escopo
+    assert key == "fe80::1"
+    assert addr == ("fe80::1", 0, 0, 1)
+
+
+def test_target_without_scope():
+    assert icmp_target("192.0.2.1") == (socket.AF_INET, "192.0.2.1", ("192.0.2.1", 0))
+    assert icmp_target("2001:db8:0::1") == (socket.AF_INET6, "2001:db8::1", ("2001:db8::1", 0, 0, 0))
+
+
+def test_ipv6_falls_back_when_icmpv6_is_unavailable(monkeypatch):
+    calls = []
+
+    async def system_ping(ip):
+        calls.append(("system", ip))
+        return {"success": True, "error": None, "latency": 1.0}
+
+    class Pinger:
+        async def ping(self, ip):
+            calls.append(("icmp", ip))
+            return {"success": True, "error": None, "latency": 1.0}
+
+        def close(self):
+            pass
+
+    monkeypatch.setattr(probes, "icmp_available", lambda family=socket.AF_INET: family == socket.AF_INET)
+    monkeypatch.setattr(probes, "IcmpPinger", Pinger)
+    monkeypatch.setattr(probes, "ping_host_async", system_ping)
+
+    backend = probes.NetworkBackend()
+
+    async def run():
+        backend.bind(1)
+        try:
+            await backend.ping("192.0.2.1")
+            await backend.ping("2001:db8::1")
+        finally:
+            await backend.close()
+
+    asyncio.run(run())
+
+    assert calls == [("icmp", "192.0.2.1"), ("system", "2001:db8::1")]
@@ -0,0 +1,128 @@
+import os
+import random
+import sys
+from datetime import datetime, timedelta
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from Backend.metrics import availability_buckets, lttb, merge_intervals, parse_duration, sliding_sla
+
+T0 = datetime(2026, 1, 1)
+
+
+def minutes(n):
+    return T0 + timedelta(minutes=n)
+
+
+def test_merge_intervals():
+    merged = merge_intervals([(5, 7), (1, 3), (2, 4), (4, 4.5), (8, 9)])
+
+    # encostados (4 e 4) também se juntam
+    assert merged == [[1, 4.5], [5, 7], [8, 9]]
+    assert merge_intervals([]) == []
+
+
+def test_availability_buckets():
+    down = merge_intervals([(minutes(2), minutes(4)), (minutes(4.5), minutes(6))])
+
+    buckets = availability_buckets(down, minutes(0), minutes(11), 300)
+
+    # último balde cortado em until (1 minuto, sem queda)
+    assert buckets == [(minutes(0), 50.0), (minutes(5), 80.0), (minutes(10), 100.0)]
+
+
+def test_availability_buckets_match_brute_force():
+    rng = random.Random(3)
+    raw = []
+    for _ in range(30):
+        start = rng.uniform(-30, 600)
+        raw.append((minutes(start), minutes(start + rng.uniform(0, 40))))
+
+    down = merge_intervals(raw)
+    since, until = minutes(0), minutes(600)
+
+    for start, pct in availability_buckets(down, since, until, 1800):
+        end = min(start + timedelta(seconds=1800), until)
+        lost = sum(max(0.0, (min(e, end) - max(s, start)).total_seconds()) for s, e in down)
+
+        assert pct == pytest.approx((1 - lost / (end - start).total_seconds()) * 100)
+
+
+def test_sliding_sla_window_in_time():
+    step = timedelta(minutes=1)
+    buckets = [(minutes(i), 10, ok) for i, ok in enumerate((10, 10, 0, 10, 10, 10))]
+
+    points = sliding_sla(buckets, timedelta(minutes=3), step)
+
+    # só depois de uma janela inteira; cada ponto cobre os 3 últimos baldes
+    assert [(p["time"], p["sla"]) for p in points] == [
+        (minutes(2), 66.67),
+        (minutes(3), 66.67),
+        (minutes(4), 66.67),
+        (minutes(5), 100.0),
+    ]
+
+
+def test_sliding_sla_gap_does_not_stretch_window():
+    step = timedelta(minutes=1)
+    buckets = [(minutes(0), 10, 0), (minutes(1), 10, 0), (minutes(5), 10, 10)]
+
+    points = sliding_sla(buckets, timedelta(minutes=3), step)
+
+    # baldes 0 e 1 já saíram da janela de 3 minutos que termina em 6
+    assert points[-1] == {"time": minutes(5), "sla": 100.0}
+
+
+def test_sliding_sla_matches_brute_force():
+    rng = random.Random(5)
+    step = timedelta(minutes=1)
+    window = timedelta(minutes=7)
+
+    buckets = []
+    for i in range(300):
+        if rng.random() < 0.2:
+            continue
+        count = rng.randint(1, 6)
+        buckets.append((minutes(i), count, rng.randint(0, count)))
+
+    for point in sliding_sla(buckets, window, step):
+        end = point["time"] + step
+        inside = [(c, ok) for t, c, ok in buckets if end - window <= t < end]
+
+        assert point["sla"] == round(sum(ok for _, ok in inside) / sum(c for c, _ in inside) * 100, 2)
+
+
+def series(values):
+    return [{"time": minutes(i), "sla": v} for i, v in enumerate(values)]
+
+
+def test_lttb_keeps_ends_and_spike():
+    points = series([100.0] * 200)
+    points[117]["sla"] = 10.0
+
+    sampled = lttb(points, 20)
+
+    assert len(sampled) == 20
+    assert sampled[0] is points[0] and sampled[-1] is points[-1]
+    assert points[117] in sampled
+    assert [p["time"] for p in sampled] == sorted(p["time"] for p in sampled)
+
+
+def test_lttb_small_inputs_unchanged():
+    points = series([1, 2, 3, 4])
+
+    assert lttb(points, 4) is points
+    assert lttb(points, 10) is points
+    assert lttb(points, 2) is points
+
+
+def test_parse_duration():
+    assert parse_duration("15m") == timedelta(minutes=15)
+    assert parse_duration(" 2H ") == timedelta(hours=2)
+    assert parse_duration("7d") == timedelta(days=7)
+
+    for bad in ("0m", "m", "5x", "-1h", "1.5h", ""):
+        with pytest.raises(ValueError):
+            parse_duration(bad)
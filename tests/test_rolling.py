@@ -0,0 +1,125 @@
+import os
+import sys
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+
+from sqlalchemy import create_engine, insert
+from sqlalchemy.orm import Session
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from Backend.database import Base
+from Backend.models import CheckResult
+from Backend.rolling import RollingMetrics, rolling_metrics
+from Backend.scheduler import apply_probe
+from Backend.writer import new_writes
+
+FAILED = {"success": False, "latency": None, "error": "timeout"}
+
+
+def failing_probe():
+    # DNS resolve, ping/tcp/http falham
+    return {
+        "dns": (["192.0.2.1"], 300, 300),
+        "ip": "192.0.2.1",
+        "ping": dict(FAILED),
+        "tcp": dict(FAILED),
+        "http": dict(FAILED),
+    }
+
+
+def host(host_id):
+    return SimpleNamespace(
+        id=host_id, name=f"host-{host_id}", status="UP",
+        dns_ttl=None, dns_ttl_remaining=None, last_ttl_alert=None, last_resolved_ip=None,
+        fail_streak=0, success_streak=0, health_score=None, severity=None, last_check=None,
+        sla_rolling_ping=None, sla_rolling_tcp=None, sla_rolling_http=None,
+        jitter_ms_ping=None, jitter_ms_tcp=None, jitter_ms_http=None,
+        slope=None, trend=None, slope_http=None, trend_http=None,
+    )
+
+
+def test_dns_success_does_not_hide_failures():
+    metrics = RollingMetrics()
+
+    for _ in range(3):
+        metrics.record(1, "dns", True, None)
+        metrics.record(1, "ping", False, None)
+
+    assert metrics.consecutive_failures(1)
+
+    metrics.record(1, "dns", True, None)
+    metrics.record(1, "ping", True, 10.0)
+
+    assert not metrics.consecutive_failures(1)
+
+
+def test_incident_opens_when_checks_fail_with_dns_ok():
+    h = host(9001)
+    opened = []
+
+    for _ in range(3):
+        writes = new_writes()
+        apply_probe(h, failing_probe(), writes)
+        opened += [op for op in writes["incidents"] if op["action"] == "open"]
+
+    assert rolling_metrics.consecutive_failures(h.id)
+
+    writes = new_writes()
+    apply_probe(h, failing_probe(), writes)
+
+    assert [op["host_name"] for op in writes["incidents"] if op["action"] == "open"] == [h.name]
+
+
+def test_warm_ignores_dns_rows():
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(engine)
+
+    start = datetime(2026, 1, 1)
+    rows = []
+
+    for i in range(3):
+        rows.append({"host_id": 1, "host_name": "a", "check_type": "dns", "success": True, "timestamp": start + timedelta(seconds=10 * i)})
+        rows.append({"host_id": 1, "host_name": "a", "check_type": "ping", "success": False, "timestamp": start + timedelta(seconds=10 * i + 1)})
+
+    # DNS mais novo que tudo
+    rows.append({"host_id": 1, "host_name": "a", "check_type": "dns", "success": True, "timestamp": start + timedelta(seconds=60)})
+
+    with engine.begin() as conn:
+        conn.execute(insert(CheckResult), rows)
+
+    metrics = RollingMetrics()
+    with Session(engine) as db:
+        metrics.warm(db)
+
+    assert metrics.consecutive_failures(1)
+
+
+def test_warm_hosts_replaces_stale_state():
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(engine)
+
+    start = datetime(2026, 1, 1)
+    with engine.begin() as conn:
+        conn.execute(insert(CheckResult), [
+            {"host_id": 1, "host_name": "a", "check_type": "ping", "success": False, "timestamp": start + timedelta(seconds=10 * i)}
+            for i in range(4)
+        ])
+
+    metrics = RollingMetrics()
+
+    # estado de antes do rebalance: host 1 saudável, host 2 de outro shard
+    for _ in range(5):
+        metrics.record(1, "ping", True, 5.0)
+        metrics.record(2, "ping", True, 5.0)
+
+    with Session(engine) as db:
+        metrics.warm(db, [1])
+
+    assert metrics.snapshot(1)["sla_rolling_ping"] == 0
+    assert metrics.consecutive_failures(1)
+    assert metrics.snapshot(2)["sla_rolling_ping"] == 100
+
+    metrics.forget({1})
+
+    assert metrics.snapshot(2)["sla_rolling_ping"] is None
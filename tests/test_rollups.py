@@ -0,0 +1,96 @@
+import os
+import random
+import sys
+from datetime import datetime, timedelta
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from Backend.rollups import ROLLUP_BOUNDS, _add, _empty, _merge, aggregate, percentile, pick_resolution
+
+T0 = datetime(2026, 1, 1, 10, 0)
+
+
+def stats_of(latencies, success=True):
+    stats = _empty()
+    for latency in latencies:
+        _add(stats, success, latency)
+    return stats
+
+
+def exact_p95(latencies):
+    ordered = sorted(latencies)
+    return ordered[max(0, -(-len(ordered) * 95 // 100) - 1)]
+
+
+def bucket_of(value):
+    for i, bound in enumerate(ROLLUP_BOUNDS):
+        if value <= bound:
+            return i
+    return len(ROLLUP_BOUNDS)
+
+
+def test_p95_interpolates_within_bucket():
+    # 76..100 caem todos na faixa (75, 100]
+    assert percentile(stats_of(range(1, 101))) == 95.0
+
+
+def test_p95_clamped_to_min_max():
+    assert percentile(stats_of([42.0] * 50)) == 42.0
+    assert percentile(stats_of([20000.0, 30000.0])) <= 30000.0
+
+
+def test_p95_without_latency():
+    assert percentile(stats_of([None, None], success=False)) is None
+    assert percentile(_empty()) is None
+
+
+def test_p95_in_same_bucket_as_exact():
+    rng = random.Random(11)
+
+    for _ in range(50):
+        latencies = [rng.lognormvariate(3, 1) for _ in range(rng.randint(20, 500))]
+        estimate = percentile(stats_of(latencies))
+
+        assert bucket_of(estimate) == bucket_of(exact_p95(latencies))
+
+
+def test_merge_equals_single_pass():
+    rng = random.Random(2)
+    a = [rng.uniform(0, 300) for _ in range(100)]
+    b = [rng.uniform(0, 3000) for _ in range(100)] + [None]
+
+    merged = stats_of(a)
+    _merge(merged, stats_of(b))
+
+    single = stats_of(a + b)
+
+    assert merged["lat_sum"] == pytest.approx(single.pop("lat_sum"))
+    merged.pop("lat_sum")
+    assert merged == single
+    assert percentile(merged) == percentile(stats_of(a + b))
+
+
+def test_aggregate_truncates_per_resolution():
+    checks = [
+        {"host_id": 1, "check_type": "ping", "timestamp": T0 + timedelta(seconds=s), "success": s != 70, "latency": 10.0}
+        for s in (5, 30, 70, 3700)
+    ]
+
+    out = aggregate(checks)
+
+    assert {k: v["count"] for k, v in out["1m"].items()} == {
+        (1, "ping", T0): 2,
+        (1, "ping", T0 + timedelta(minutes=1)): 1,
+        (1, "ping", T0 + timedelta(hours=1, minutes=1)): 1,
+    }
+    assert {k: (v["count"], v["successes"]) for k, v in out["1h"].items()} == {
+        (1, "ping", T0): (3, 2),
+        (1, "ping", T0 + timedelta(hours=1)): (1, 1),
+    }
+
+
+def test_pick_resolution():
+    assert pick_resolution(T0, T0 + timedelta(hours=48)) == "1m"
+    assert pick_resolution(T0, T0 + timedelta(hours=48, seconds=1)) == "1h"
@@ -0,0 +1,129 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from Backend import scheduler, shards
+from Backend.cycles import cycle_log
+from Backend.dns_cache import dns_cache
+from Backend.shards import HANDOFF_DELAY, HashRing, Shard, ShardPool
+from Backend.writer import write_buffer
+
+KEYS = range(5000)
+
+
+def owners(ring):
+    return {key: ring.owner(key) for key in KEYS}
+
+
+def test_ring_join_moves_only_to_new_member():
+    before = owners(HashRing(["worker:a", "worker:b", "worker:c", "worker:d"]))
+    after = owners(HashRing(["worker:a", "worker:b", "worker:c", "worker:d", "worker:e"]))
+
+    moved = [key for key in KEYS if before[key] != after[key]]
+
+    assert moved
+    assert all(after[key] == "worker:e" for key in moved)
+
+    # ~1/5 dos hosts, com folga para a distribuição dos vnodes
+    assert 0.1 < len(moved) / len(KEYS) < 0.3
+
+
+def test_ring_leave_moves_only_its_hosts():
+    before = owners(HashRing(["worker:a", "worker:b", "worker:c", "worker:d"]))
+    after = owners(HashRing(["worker:a", "worker:b", "worker:d"]))
+
+    for key in KEYS:
+        if before[key] != "worker:c":
+            assert after[key] == before[key]
+        else:
+            assert after[key] != "worker:c"
+
+
+def test_ring_is_independent_of_member_order():
+    assert owners(HashRing(["worker:b", "worker:a"])) == owners(HashRing(["worker:a", "worker:b"]))
+    assert HashRing(()).owner(1) is None
+
+
+def check(host_id, ts):
+    return {"host_id": host_id, "host_name": f"h{host_id}", "check_type": "ping", "success": True, "timestamp": ts}
+
+
+def test_pool_apply_merges_worker_writes():
+    pool = ShardPool(0)
+    write_buffer._take()
+    dns_cache.take_dirty()
+
+    try:
+        pool._apply(("writes", ([check(1, 1)], [], [], {1: {"status": "UP", "fail_streak": 0}}), {"a.test": {"ips": ["192.0.2.1"]}}))
+        pool._apply(("writes", ([check(1, 2), check(2, 2)], [], [{"action": "open", "host_name": "h2"}], {1: {"status": "DOWN"}, 2: {"status": "UP"}}), {}))
+
+        checks, alerts, incidents, hosts = write_buffer._take()
+
+        assert [(c["host_id"], c["timestamp"]) for c in checks] == [(1, 1), (1, 2), (2, 2)]
+        assert incidents == [{"action": "open", "host_name": "h2"}]
+
+        # campo mais novo vence, os outros ficam
+        assert hosts == {1: {"status": "DOWN", "fail_streak": 0}, 2: {"status": "UP"}}
+        assert dns_cache.take_dirty() == {"a.test": {"ips": ["192.0.2.1"]}}
+
+    finally:
+        write_buffer._take()
+        pool.results.close()
+
+
+def test_pool_apply_records_worker_status():
+    pool = ShardPool(0)
+    cycle = {"id": 7, "source": "scheduler", "ms": 12.0, "hosts": 3}
+
+    pool._apply(("status", "vm:1", {"hosts": 3}, [cycle]))
+    pool.results.close()
+
+    assert pool.workers == {"vm:1": {"hosts": 3}}
+    assert cycle_log.recent()[0]["worker"] == "vm:1"
+
+
+def test_arrived_hosts_wait_for_handoff(monkeypatch):
+    clock = [1000.0]
+    members = {"worker:a": "a", "worker:b": "b"}
+    warmed = []
+
+    monkeypatch.setattr(shards, "holders", lambda prefix: dict(members))
+    monkeypatch.setattr(shards.time, "monotonic", lambda: clock[0])
+    monkeypatch.setattr(scheduler, "active_host_intervals", lambda: {h: 10 for h in range(200)})
+    monkeypatch.setattr(scheduler, "warm_rolling_metrics", lambda host_ids: warmed.append(sorted(host_ids)))
+
+    shard = Shard("a")
+
+    # a entrou num anel que já tinha b: a parte de a vem de b e espera
+    assert shard.intervals() == {}
+    mine = set(shard.handoff)
+    assert 0 < len(mine) < 200
+
+    clock[0] += HANDOFF_DELAY
+    assert set(shard.intervals()) == mine
+    assert warmed == [sorted(mine)]
+
+    # b saiu: os hosts dele também esperam o handoff
+    del members["worker:b"]
+    clock[0] += 5
+    assert set(shard.intervals()) == mine
+    assert set(shard.handoff) == set(range(200)) - mine
+
+    clock[0] += HANDOFF_DELAY
+    assert len(shard.intervals()) == 200
+    assert warmed[-1] == sorted(set(range(200)) - mine)
+    assert not shard.handoff
+
+
+def test_hosts_without_previous_owner_start_at_once(monkeypatch):
+    warmed = []
+
+    monkeypatch.setattr(shards, "holders", lambda prefix: {"worker:a": "a"})
+    monkeypatch.setattr(scheduler, "active_host_intervals", lambda: {1: 10, 2: 10})
+    monkeypatch.setattr(scheduler, "warm_rolling_metrics", lambda host_ids: warmed.append(sorted(host_ids)))
+
+    shard = Shard("a")
+
+    assert shard.intervals() == {1: 10, 2: 10}
+    assert warmed == [[1, 2]]
@@ -0,0 +1,140 @@
+import math
+import os
+import random
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from Backend.tsdb import HEADER, RECORD, Segment, TimeSeriesStore, _segment_key
+
+START = 1_700_000_000.0
+
+
+def record(ts, latency=10.0, success=True):
+    return (ts, latency, 0, 1 if success else 0)
+
+
+def store(root, segment_records=4):
+    s = TimeSeriesStore(str(root), segment_records=segment_records)
+    s.start_writing()
+    return s
+
+
+def timestamps(views):
+    return [RECORD.unpack_from(v, i)[0] for v in views for i in range(0, len(v), RECORD.size)]
+
+
+def segment_files(root, host_id=1, check_type="ping"):
+    directory = os.path.join(str(root), str(host_id), check_type)
+    return sorted(os.listdir(directory), key=_segment_key), directory
+
+
+def test_rollover_into_new_segments(tmp_path):
+    s = store(tmp_path)
+    s.append(1, "ping", [record(START + i) for i in range(10)])
+
+    files, directory = segment_files(tmp_path)
+
+    assert len(files) == 3
+    assert timestamps(s.slices(1, "ping")) == [START + i for i in range(10)]
+
+    # nome = segundo do primeiro registro, igual ao do cabeçalho
+    for name in files:
+        _, first, last = Segment(os.path.join(directory, name)).header()
+        assert _segment_key(name)[0] == int(first)
+        assert first <= last
+
+
+def test_rollover_within_same_second(tmp_path):
+    s = store(tmp_path)
+    ts = [START + i * 0.01 for i in range(10)]
+    s.append(1, "ping", [record(t) for t in ts])
+
+    files, directory = segment_files(tmp_path)
+
+    assert files == ["001700000000.seg", "001700000000.1.seg", "001700000000.2.seg"]
+
+    for i, name in enumerate(files):
+        _, first, _ = Segment(os.path.join(directory, name)).header()
+        assert first == ts[i * 4]
+
+    assert timestamps(s.slices(1, "ping", ts[3], ts[6])) == ts[3:6]
+    assert timestamps(s.slices(1, "ping", ts[5], ts[9])) == ts[5:9]
+
+
+def test_header_count_is_what_readers_see(tmp_path):
+    s = store(tmp_path, segment_records=16)
+    s.append(1, "ping", [record(START + i) for i in range(3)])
+
+    # coletor caiu depois de gravar o registro e antes do cabeçalho
+    files, directory = segment_files(tmp_path)
+    path = os.path.join(directory, files[0])
+    with open(path, "r+b") as f:
+        f.seek(HEADER.size + 3 * RECORD.size)
+        f.write(RECORD.pack(*record(START + 99)))
+
+    reopened = store(tmp_path, segment_records=16)
+    assert timestamps(reopened.slices(1, "ping")) == [START, START + 1, START + 2]
+
+    # o próximo append grava por cima do registro órfão
+    reopened.append(1, "ping", [record(START + 3)])
+    assert timestamps(reopened.slices(1, "ping")) == [START + i for i in range(4)]
+
+
+def test_slices_match_brute_force_across_segments(tmp_path):
+    rng = random.Random(7)
+    s = store(tmp_path, segment_records=8)
+
+    ts = []
+    t = START
+    for _ in range(200):
+        # vários registros no mesmo segundo e buracos maiores que um segmento
+        t += rng.choice((0.1, 0.5, 1, 3, 40))
+        ts.append(t)
+
+    for i in range(0, len(ts), 7):
+        s.append(1, "ping", [record(x) for x in ts[i:i + 7]])
+
+    for _ in range(300):
+        since = rng.uniform(ts[0] - 5, ts[-1] + 5)
+        until = since + rng.uniform(0, 300)
+
+        assert timestamps(s.slices(1, "ping", since, until)) == [x for x in ts if since <= x < until]
+
+    assert timestamps(s.slices(1, "ping", None, ts[50])) == ts[:50]
+    assert timestamps(s.slices(1, "ping", ts[150], None)) == ts[150:]
+
+
+def test_trim_keeps_tail_segment(tmp_path):
+    s = store(tmp_path)
+    s.append(1, "ping", [record(START + i) for i in range(10)])
+    s.append(2, "ping", [record(START + i) for i in range(3)])
+
+    # tudo mais velho que a retenção: sai tudo menos o último de cada série
+    removed = s.trim(START + 86400 * 365, days=30)
+
+    assert removed == 2
+    assert segment_files(tmp_path, 1)[0] == ["001700000008.seg"]
+    assert segment_files(tmp_path, 2)[0] == ["001700000000.seg"]
+
+    # a série continua recebendo escrita no mesmo segmento
+    s.append(1, "ping", [record(START + 10)])
+    assert timestamps(s.slices(1, "ping")) == [START + 8, START + 9, START + 10]
+
+
+def test_trim_keeps_recent_segments(tmp_path):
+    s = store(tmp_path)
+    s.append(1, "ping", [record(START + i * 86400) for i in range(12)])
+
+    # segmentos: dias 0-3, 4-7, 8-11; corte no dia 5
+    assert s.trim(START + 35 * 86400, days=30) == 1
+    assert [_segment_key(n)[0] for n in segment_files(tmp_path)[0]] == [int(START + 4 * 86400), int(START + 8 * 86400)]
+
+
+def test_decode(tmp_path):
+    s = store(tmp_path)
+    s.append(1, "ping", [record(START, 12.5), record(START + 1, math.nan, success=False)])
+
+    rows = list(s.decode(s.slices(1, "ping")))
+
+    assert [(latency, success) for _, latency, success, _ in rows] == [(12.5, True), (None, False)]